@@ -3,6 +3,8 @@ from rank_bm25 import BM25Okapi
 from llama_index.core.schema import NodeWithScore, QueryBundle
 from llama_index.core.retrievers import BaseRetriever
 
+from src.utils.instrumentacao import span
+
 class BM25RetrieverCustom(BaseRetriever):
     """BM25Retriever customizado que aceita parâmetros k1 e b"""
     
@@ -19,11 +21,9 @@ class BM25RetrieverCustom(BaseRetriever):
         self._similarity_top_k = similarity_top_k
         self._tokenizer = tokenizer or self._default_tokenizer
         
-        # Criar corpus tokenizado
-        self._corpus = [self._tokenizer(node.get_content()) for node in self._nodes]
-        
-        # Inicializar BM25 com parâmetros customizados
-        self.bm25 = BM25Okapi(self._corpus, k1=k1, b=b)
+        # Corpus tokenizado só durante a construção: o BM25Okapi guarda apenas frequências
+        # e tamanhos, e manter os tokens custaria uma lista de strings por documento
+        self.bm25 = BM25Okapi([self._tokenizer(node.get_content()) for node in self._nodes], k1=k1, b=b)
         
         super().__init__(**kwargs)
     
@@ -34,14 +34,16 @@ class BM25RetrieverCustom(BaseRetriever):
     def _retrieve(self, query_bundle: QueryBundle) -> List[NodeWithScore]:
         """Recupera documentos usando BM25"""
         query = query_bundle.query_str
-        tokenized_query = self._tokenizer(query)
+        with span("bm25.tokenizacao"):
+            tokenized_query = self._tokenizer(query)
         
         # Obter scores BM25
-        scores = self.bm25.get_scores(tokenized_query)
+        with span("bm25.pontuacao", documentos=len(self._nodes)):
+            scores = self.bm25.get_scores(tokenized_query)
         
-        # Criar lista de (score, node) e ordenar
-        scored_nodes = list(zip(scores, self._nodes))
-        scored_nodes.sort(key=lambda x: x[0], reverse=True)
+            # Criar lista de (score, node) e ordenar
+            scored_nodes = list(zip(scores, self._nodes))
+            scored_nodes.sort(key=lambda x: x[0], reverse=True)
         
         # Retornar top-k resultados
         results = []
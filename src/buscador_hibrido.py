@@ -4,104 +4,297 @@ Combina BM25 e embeddings do Gemini para busca em documentos jurídicos do TCU
 """
 
 import os
+import logging
+import threading
 import time
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, TYPE_CHECKING
 
-# Imports do LlamaIndex
-from llama_index.core import VectorStoreIndex, Settings
-from llama_index.embeddings.huggingface import HuggingFaceEmbedding
-from llama_index.core.vector_stores import SimpleVectorStore
-from llama_index.core.storage.storage_context import StorageContext
-from llama_index.core.schema import TextNode
-from llama_index.core.retrievers import QueryFusionRetriever
-
-# Imports para o Reranker
-from transformers import AutoModelForSequenceClassification
-import torch
+# LlamaIndex, torch e transformers são importados sob demanda dentro dos métodos:
+# importar este módulo não deve custar o carregamento dessas bibliotecas.
+if TYPE_CHECKING:
+    from llama_index.core.schema import TextNode, QueryBundle
 
 # Imports locais
-from src.documento import DocumentoJuris
+from src.documento import AcervoDocumentos, DocumentoJuris, ResultadoBusca
 from src.utils.preprocessamento import PreprocessadorTexto
-from src.bm25 import BM25RetrieverCustom
+from src.utils.cache import CacheEmbeddingsConsulta, CacheResultados, normalizar_consulta
+from src.utils.instrumentacao import instrumentar, span
 from typing import List, Dict, Any, Optional, Tuple
 
 from src.similaridade import calcular_similaridade_entre_pares as calcular_similaridade_pares
-from src.reranking import rerank_nodes
+from src.similaridade import carregar_modelo_embeddings, MODELO_EMBEDDINGS
+from src.reranking import rerank_nodes, carregar_reranker, MODELO_RERANKER
+from src.utils.modelos import lock_inferencia
 
 from dotenv import load_dotenv
 
 # Carregar variáveis de ambiente do arquivo .env
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# Sentinela para modelos ainda não carregados (None indica falha de carregamento)
+_NAO_CARREGADO = object()
+
 class BuscadorHibridoLlamaIndex:
     """
     Sistema de busca híbrida usando LlamaIndex
     Combina BM25 e embeddings do Gemini
     """
     
-    def __init__(self):
+    def __init__(
+        self,
+        cache_embeddings_capacidade: int = 1024,
+        cache_embeddings_caminho: Optional[str] = None,
+        cache_resultados_capacidade: int = 256,
+        cache_resultados_ttl: Optional[float] = 600.0,
+        aquecer_modelos: bool = False,
+        bm25_k1: float = 1.2,
+        bm25_b: float = 0.75,
+    ):
         """
-        Inicializa o buscador híbrido com embedding português jurídico
+        Inicializa o buscador híbrido com embedding português jurídico.
+
+        Os modelos (embeddings e reranker) são carregados sob demanda, no primeiro acesso
+        a `embeddings_model` / `reranker_model`.
+
+        Args:
+            cache_embeddings_capacidade: Máximo de consultas no cache LRU de embeddings.
+            cache_embeddings_caminho: Arquivo JSON opcional para persistir o cache de embeddings.
+            cache_resultados_capacidade: Máximo de buscas híbridas completas mantidas em cache.
+            cache_resultados_ttl: Validade (s) de cada resultado em cache; None desativa a expiração.
+            aquecer_modelos: Se True, inicia o carregamento dos modelos em uma thread de fundo.
+            bm25_k1: Saturação de frequência de termo do BM25 (ver `python -m src.run_varredura`).
+            bm25_b: Normalização pelo tamanho do documento do BM25.
         """
+        self.cache_embeddings = CacheEmbeddingsConsulta(
+            capacidade=cache_embeddings_capacidade,
+            caminho=cache_embeddings_caminho,
+            modelo=MODELO_EMBEDDINGS,
+        )
+        self.cache_resultados = CacheResultados(
+            capacidade=cache_resultados_capacidade,
+            ttl_segundos=cache_resultados_ttl,
+        )
+        # Incrementada a cada mudança do índice/retrievers; compõe a chave do cache de resultados
+        self.versao_indice = 0
         self.preprocessador = PreprocessadorTexto()
-        self.documentos = []
+        # Documentos indexados em colunas; resultados de busca referenciam posições do acervo
+        self.acervo = AcervoDocumentos()
+        self.nodes = []
         self.bm25_retriever = None
+        self.bm25_k1 = bm25_k1
+        self.bm25_b = bm25_b
+        self.vector_index = None
         self.vector_retriever = None
-        self.embeddings_model = None
         
         # Retrievers do LlamaIndex
         self.hybrid_retriever = None
-        self.reranker_model = None
-        self.reranker_device = 'cuda' if torch.cuda.is_available() else 'cpu'
+        self._reranker_device = None
         self.hybrid_similarity_top_k = 10
 
-        # Configurar modelo de embeddings português jurídico
+        # Modelos carregados sob demanda (ver propriedades embeddings_model / reranker_model)
+        self._embeddings_model = _NAO_CARREGADO
+        self._reranker_model = _NAO_CARREGADO
+        self._lock_embeddings = threading.Lock()
+        self._lock_reranker = threading.Lock()
+        self._handle_embeddings = None
+        self._handle_reranker = None
+        self.tempos_carregamento: Dict[str, float] = {}
+
+        if aquecer_modelos:
+            self.aquecer_modelos(em_background=True)
+
+    @property
+    def documentos(self) -> List[DocumentoJuris]:
+        """Documentos indexados (reconstruídos a partir do acervo)."""
+        return self.acervo.documentos()
+
+    @property
+    def reranker_device(self) -> str:
+        """Device do reranker ('cuda' se disponível), resolvido no primeiro acesso."""
+        if self._reranker_device is None:
+            import torch
+            self._reranker_device = 'cuda' if torch.cuda.is_available() else 'cpu'
+        return self._reranker_device
+
+    @reranker_device.setter
+    def reranker_device(self, device: str):
+        self._reranker_device = device
+
+    @property
+    def embeddings_model(self):
+        """Modelo de embeddings, carregado no primeiro acesso (None se o carregamento falhar)."""
+        if self._embeddings_model is _NAO_CARREGADO:
+            with self._lock_embeddings:
+                if self._embeddings_model is _NAO_CARREGADO:
+                    self._embeddings_model = self._carregar_embeddings()
+        return self._embeddings_model
+
+    @embeddings_model.setter
+    def embeddings_model(self, modelo):
+        self._embeddings_model = modelo
+
+    @property
+    def reranker_model(self):
+        """Modelo de reranking, carregado no primeiro acesso (None se o carregamento falhar)."""
+        if self._reranker_model is _NAO_CARREGADO:
+            with self._lock_reranker:
+                if self._reranker_model is _NAO_CARREGADO:
+                    self._reranker_model = self._carregar_reranker()
+        return self._reranker_model
+
+    @reranker_model.setter
+    def reranker_model(self, modelo):
+        self._reranker_model = modelo
+
+    def _carregar_embeddings(self):
+        """Obtém o modelo de embeddings português jurídico do registro compartilhado."""
+        inicio = time.perf_counter()
         try:
-            self.embeddings_model = HuggingFaceEmbedding(
-                model_name="stjiris/bert-large-portuguese-cased-legal-mlm-sts-v1.0",
-                trust_remote_code=True
-            )
+            self._handle_embeddings = carregar_modelo_embeddings(MODELO_EMBEDDINGS)
+            self.tempos_carregamento["embeddings"] = time.perf_counter() - inicio
             print("✓ Modelo de embeddings português jurídico configurado com sucesso")
-            print("  - Modelo: stjiris/bert-large-portuguese-cased-legal-mlm-sts-v1.0")
+            print(f"  - Modelo: {MODELO_EMBEDDINGS}")
             print("  - Especializado em domínio jurídico português")
+            print(f"  - Tempo de carregamento: {self.tempos_carregamento['embeddings']:.2f}s")
+            return self._handle_embeddings.modelo
         except Exception as e:
             print(f"⚠ Erro ao configurar embeddings: {e}")
-            self.embeddings_model = None
+            return None
 
-        # Configurar modelo de Reranking
+    def _carregar_reranker(self):
+        """Obtém o modelo de Reranking do registro compartilhado."""
+        inicio = time.perf_counter()
         try:
-            self.reranker_model = AutoModelForSequenceClassification.from_pretrained(
-                'jinaai/jina-reranker-v2-base-multilingual',
-                torch_dtype="auto",
-                trust_remote_code=True,
-            )
-            self.reranker_model.to(self.reranker_device)
-            self.reranker_model.eval()
+            self._handle_reranker = carregar_reranker(MODELO_RERANKER, device=self.reranker_device)
+            self.tempos_carregamento["reranker"] = time.perf_counter() - inicio
             print(f"✓ Modelo de Reranking configurado com sucesso em {self.reranker_device}")
-            print("  - Modelo: jinaai/jina-reranker-v2-base-multilingual")
+            print(f"  - Modelo: {MODELO_RERANKER}")
+            print(f"  - Tempo de carregamento: {self.tempos_carregamento['reranker']:.2f}s")
+            return self._handle_reranker.modelo
         except Exception as e:
             print(f"⚠ Erro ao configurar Reranker: {e}")
-            self.reranker_model = None
+            return None
+
+    def liberar_modelos(self) -> None:
+        """
+        Devolve os modelos ao registro compartilhado. O buscador volta ao estado
+        "não carregado" e recarrega (ou reutiliza) os modelos no próximo acesso.
+        """
+        with self._lock_embeddings:
+            if self._handle_embeddings is not None:
+                self._handle_embeddings.liberar()
+                self._handle_embeddings = None
+            self._embeddings_model = _NAO_CARREGADO
+        with self._lock_reranker:
+            if self._handle_reranker is not None:
+                self._handle_reranker.liberar()
+                self._handle_reranker = None
+            self._reranker_model = _NAO_CARREGADO
 
-    def carregar_documentos(self, documentos: List[DocumentoJuris]):
+    def aquecer_modelos(self, em_background: bool = True) -> Optional[threading.Thread]:
+        """
+        Carrega antecipadamente os modelos de embeddings e de reranking.
+
+        Args:
+            em_background: Se True, carrega em uma thread daemon e a retorna; acessos
+                concorrentes aos modelos aguardam o término do carregamento em curso.
+
+        Returns:
+            A thread de aquecimento (ou None quando executado de forma síncrona).
+        """
+        def _aquecer():
+            _ = self.embeddings_model
+            _ = self.reranker_model
+
+        if not em_background:
+            _aquecer()
+            return None
+        thread = threading.Thread(target=_aquecer, name="aquecer-modelos", daemon=True)
+        thread.start()
+        return thread
+
+    def carregar_documentos(self, documentos: List[DocumentoJuris], indexar_embeddings: bool = True):
         """
         Carrega e processa documentos, criando nós compartilhados para BM25 e Embeddings.
         
         Args:
             documentos: Lista de documentos jurídicos
+            indexar_embeddings: Se False, monta apenas o BM25 (o modelo de embeddings não é carregado)
         """
-        self.documentos = documentos
         print(f"✓ {len(documentos)} documentos carregados para processamento")
 
+        # Índices do corpus anterior não podem sobreviver (ex.: indexar_embeddings=False
+        # depois de uma carga completa fundiria o BM25 novo com o denso antigo)
+        self.vector_index = None
+        self.vector_retriever = None
+        self.hybrid_retriever = None
+
+        # 1. Criar Nós (Nodes) compartilhados a partir do ENUNCIADO
+        with span("indice.criar_nodes", documentos=len(documentos)):
+            nodes = self._criar_nodes(documentos)
+        self.nodes = nodes
+        self.acervo = AcervoDocumentos()
+        self.acervo.adicionar(documentos, [node.text for node in nodes])
+
+        # 2. Configurar BM25 usando os nós compartilhados
+        with span("indice.bm25"):
+            self._configurar_bm25(nodes)
+        
+        # 3. Configurar Embeddings usando os nós compartilhados
+        if indexar_embeddings and self.embeddings_model:
+            with span("indice.embeddings"):
+                self._configurar_embeddings(nodes)
+        
+        # 4. Configurar o retriever híbrido
+        self._configurar_retrievers_llama()
+
+        # 5. Resultados em cache de índices anteriores deixam de valer
+        self._invalidar_indice()
+
+    def adicionar_documentos(self, documentos: List[DocumentoJuris]):
+        """
+        Atualização incremental: insere novos documentos no índice vetorial existente
+        e reconstrói o BM25 (que não suporta inserção) sobre todos os nós.
+
+        Args:
+            documentos: Novos documentos jurídicos
+        """
+        if not self.bm25_retriever:
+            self.carregar_documentos(documentos)
+            return
+
+        novos_nodes = self._criar_nodes(documentos)
+        self.acervo.adicionar(documentos, [node.text for node in novos_nodes])
+        self.nodes = list(self.nodes) + novos_nodes
+
+        bm25_top_k = self.bm25_retriever._similarity_top_k
+        self._configurar_bm25(self.nodes)
+        self.set_bm25_top_k(bm25_top_k)
+
+        if getattr(self, 'vector_index', None) is not None:
+            try:
+                self.vector_index.insert_nodes(novos_nodes)
+                print(f"✓ {len(novos_nodes)} nós inseridos no índice vetorial")
+            except Exception as e:
+                print(f"✗ Erro ao inserir nós no índice vetorial: {e}")
+
+        self._configurar_retrievers_llama()
+        self._invalidar_indice()
+
+    def _criar_nodes(self, documentos: List[DocumentoJuris]) -> List["TextNode"]:
+        """Cria os nós de texto (a partir do ENUNCIADO) truncados para o limite do modelo."""
+        from llama_index.core.schema import TextNode
+
         # Configurar tokenizer para truncamento
         from transformers import AutoTokenizer
-        tokenizer = AutoTokenizer.from_pretrained("stjiris/bert-large-portuguese-cased-legal-mlm-sts-v1.0")
+        tokenizer = AutoTokenizer.from_pretrained(MODELO_EMBEDDINGS)
 
-        # 1. Criar Nós (Nodes) compartilhados a partir do ENUNCIADO
         nodes = []
         textos_truncados = 0
-        for doc in documentos:
-            texto_limpo = self.preprocessador.remove_html(doc.enunciado)
+        textos_limpos = self.preprocessador.normalizar_textos([doc.enunciado for doc in documentos])
+        for doc, texto_limpo in zip(documentos, textos_limpos):
             
             # Truncar para o limite do modelo de embedding
             tokens = tokenizer.encode(texto_limpo, add_special_tokens=True)
@@ -127,29 +320,22 @@ class BuscadorHibridoLlamaIndex:
         print(f"✓ {len(nodes)} nós de texto compartilhados criados (a partir do 'enunciado')")
         if textos_truncados > 0:
             print(f"  - {textos_truncados} textos foram truncados para 1024 tokens.")
-
-        # 2. Configurar BM25 usando os nós compartilhados
-        self._configurar_bm25(nodes)
-        
-        # 3. Configurar Embeddings usando os nós compartilhados
-        if self.embeddings_model:
-            self._configurar_embeddings(nodes)
-        
-        # 4. Configurar o retriever híbrido
-        self._configurar_retrievers_llama()
+        return nodes
     
-    def _configurar_bm25(self, nodes: List[TextNode]):
+    def _configurar_bm25(self, nodes: List["TextNode"]):
         """Configura o retriever BM25 a partir de nós pré-criados."""
+        from src.bm25 import BM25RetrieverCustom
+
         try:
             self.bm25_retriever = BM25RetrieverCustom(
                 nodes=nodes,
                 tokenizer=self.preprocessador.tokenizador_pt_remove_html,
                 similarity_top_k=10,
-                k1=1.2,
-                b=0.75
+                k1=self.bm25_k1,
+                b=self.bm25_b
             )
             print("✓ BM25 retriever configurado com sucesso")
-            print("  - Parâmetros: k1=1.2, b=0.75")
+            print(f"  - Parâmetros: k1={self.bm25_k1}, b={self.bm25_b}")
             print("  - Fonte: Nós compartilhados (apenas 'enunciado')")
             
         except Exception as e:
@@ -158,6 +344,8 @@ class BuscadorHibridoLlamaIndex:
     
     def _configurar_retrievers_llama(self):
         """Configura os retrievers do LlamaIndex para busca híbrida"""
+        from llama_index.core.retrievers import QueryFusionRetriever
+
         try:
             # Configurar Vector Retriever se embeddings estão disponíveis
             if self.vector_retriever:
@@ -177,8 +365,12 @@ class BuscadorHibridoLlamaIndex:
         except Exception as e:
             print(f"Erro ao configurar retrievers do LlamaIndex: {e}")
         
-    def _configurar_embeddings(self, nodes: List[TextNode]):
+    def _configurar_embeddings(self, nodes: List["TextNode"]):
         """Configura o retriever de embeddings a partir de nós pré-criados."""
+        from llama_index.core import VectorStoreIndex, Settings
+        from llama_index.core.vector_stores import SimpleVectorStore
+        from llama_index.core.storage.storage_context import StorageContext
+
         try:
             # Configurar Settings do LlamaIndex para o modelo de embedding
             Settings.embed_model = self.embeddings_model
@@ -189,14 +381,13 @@ class BuscadorHibridoLlamaIndex:
             vector_store = SimpleVectorStore()
             storage_context = StorageContext.from_defaults(vector_store=vector_store)
             
-            self.vector_index = VectorStoreIndex(
-                nodes=nodes,  # Usar os nós compartilhados
-                storage_context=storage_context
-            )
+            with lock_inferencia(self.embeddings_model):
+                self.vector_index = VectorStoreIndex(
+                    nodes=nodes,  # Usar os nós compartilhados
+                    storage_context=storage_context
+                )
             
-            self.vector_retriever = self.vector_index.as_retriever(
-                similarity_top_k=10
-            )
+            self.vector_retriever = self._criar_retriever_denso(10)
             
             print("✓ Vector retriever configurado com sucesso")
             print("  - Modelo: Embedding português jurídico")
@@ -206,7 +397,8 @@ class BuscadorHibridoLlamaIndex:
             print(f"✗ Erro ao configurar embeddings: {e}")
             self.vector_retriever = None
     
-    def buscar_bm25(self, query: str, top_k: int = 10) -> List[Dict[str, Any]]:
+    @instrumentar("busca.bm25")
+    def buscar_bm25(self, query: str, top_k: int = 10) -> List[ResultadoBusca]:
         """
         Realiza busca usando BM25
         
@@ -218,33 +410,20 @@ class BuscadorHibridoLlamaIndex:
             Lista de resultados com scores
         """
         if not self.bm25_retriever:
-            print("⚠ BM25 retriever não está configurado")
+            logger.warning("⚠ BM25 retriever não está configurado")
             return []
         
         try:
             # Realizar busca
             nodes = self.bm25_retriever.retrieve(query)
-            
-            # Converter para formato padrão
-            resultados = []
-            for i, node in enumerate(nodes[:top_k]):
-                resultado = {
-                    "id": node.metadata.get("id", f"doc_{i}"),
-                    "enunciado": node.metadata.get("enunciado", ""),
-                    "excerto": node.metadata.get("excerto", ""),
-                    "score": getattr(node, 'score', 0.0),  # Score aproximado
-                    "texto_completo": node.text,
-                    "metodo": "BM25"
-                }
-                resultados.append(resultado)
-            
-            return resultados
+            return self._resultados(nodes[:top_k], "BM25")
             
         except Exception as e:
-            print(f"✗ Erro na busca BM25: {e}")
+            logger.error("✗ Erro na busca BM25: %s", e, extra={"consulta": query})
             return []
     
-    def buscar_embeddings(self, query: str, top_k: int = 10) -> List[Dict[str, Any]]:
+    @instrumentar("busca.embeddings")
+    def buscar_embeddings(self, query: str, top_k: int = 10) -> List[ResultadoBusca]:
         """
         Realiza busca usando embeddings
         
@@ -256,37 +435,27 @@ class BuscadorHibridoLlamaIndex:
             Lista de resultados com scores
         """
         if not self.vector_retriever:
-            print("⚠ Vector retriever não está configurado")
+            logger.warning("⚠ Vector retriever não está configurado")
             return []
         
         try:
-            # Realizar busca
-            nodes = self.vector_retriever.retrieve(query)
-            
-            # Converter para formato padrão
-            resultados = []
-            for i, node in enumerate(nodes[:top_k]):
-                resultado = {
-                    "id": node.metadata.get("id", f"doc_{i}"),
-                    "enunciado": node.metadata.get("enunciado", ""),
-                    "excerto": node.metadata.get("excerto", ""),
-                    "score": getattr(node, 'score', 0.0),  # Score aproximado
-                    "texto_completo": node.text,
-                    "metodo": "Embeddings"
-                }
-                resultados.append(resultado)
-            
-            return resultados
+            # Realizar busca (embedding da consulta vem do cache LRU)
+            nodes = self.vector_retriever.retrieve(self._query_bundle(query))
+            return self._resultados(nodes[:top_k], "Embeddings")
             
         except Exception as e:
-            print(f"✗ Erro na busca por embeddings: {e}")
+            logger.error("✗ Erro na busca por embeddings: %s", e, extra={"consulta": query})
             return []
     
-    def buscar_hibrido(self, consulta: str, top_k: int = 10, use_reranker: bool = False) -> List[Dict]:
+    @instrumentar("busca.hibrida")
+    def buscar_hibrido(self, consulta: str, top_k: int = 10, use_reranker: bool = False) -> List[ResultadoBusca]:
         """
         Realiza busca híbrida usando o QueryFusionRetriever (RRF).
         O retriever já foi configurado para usar os nós compartilhados, eliminando duplicatas.
 
+        Resultados ficam em cache (LRU + TTL) pela consulta normalizada, parâmetros e versão
+        do índice; chamadas idênticas simultâneas são colapsadas em um único cálculo.
+
         Args:
             consulta: Consulta de busca.
             top_k: Número de resultados a retornar.
@@ -295,43 +464,97 @@ class BuscadorHibridoLlamaIndex:
         Returns:
             Lista de resultados únicos ordenados pelo score do RRF.
         """
-        print(f"\n=== BUSCA HÍBRIDA com QueryFusionRetriever ===")
-        print(f"Consulta: {consulta}")
+        logger.info("\n=== BUSCA HÍBRIDA com QueryFusionRetriever ===")
+        logger.info("Consulta: %s", consulta, extra={"consulta": consulta, "top_k": top_k, "reranker": use_reranker})
+
+        chave = (normalizar_consulta(consulta), top_k, bool(use_reranker), self.versao_indice)
+        resultados = self.cache_resultados.obter_ou_calcular(
+            chave, lambda: self._buscar_hibrido_sem_cache(consulta, top_k, use_reranker)
+        )
+        # Os registros são somente leitura; basta não expor a própria lista em cache
+        return list(resultados) if resultados is not None else None
 
+    def _buscar_hibrido_sem_cache(self, consulta: str, top_k: int, use_reranker: bool) -> List[ResultadoBusca]:
+        """Executa BM25 + denso + fusão (+ reranker) sem consultar o cache de resultados."""
         if not self.hybrid_retriever:
-            print("⚠ Hybrid retriever (QueryFusionRetriever) não está configurado.")
+            logger.warning("⚠ Hybrid retriever (QueryFusionRetriever) não está configurado.")
 
         try:
             # Usar o QueryFusionRetriever que já aplica RRF e lida com duplicatas
-            retrieved_nodes = self.hybrid_retriever.retrieve(consulta)
+            bundle = self._query_bundle(consulta)
+            with span("busca.fusao"):
+                retrieved_nodes = self.hybrid_retriever.retrieve(bundle)
 
-            print(f"QueryFusionRetriever retornou {len(retrieved_nodes)} nós únicos.")
+            logger.info("QueryFusionRetriever retornou %d nós únicos.", len(retrieved_nodes), extra={"nos": len(retrieved_nodes)})
 
             # Aplicar Reranking se o modelo estiver disponível e use_reranker for True
-            if self.reranker_model and use_reranker:
+            if use_reranker and self.reranker_model:
                  retrieved_nodes = rerank_nodes(self.reranker_model, consulta, retrieved_nodes, top_n=top_k)
 
-            # Formatar os resultados para o padrão esperado
-            resultados_formatados = []
-            for node in retrieved_nodes[:top_k]:
-                resultado = {
-                    "id": getattr(getattr(node, 'node', node), 'metadata', {}).get("id"),
-                    "titulo": getattr(getattr(node, 'node', node), 'metadata', {}).get("titulo", ""),
-                    "conteudo": getattr(getattr(node, 'node', node), 'text', None),
-                    "score": getattr(node, 'score', None),
-                    "metodo": "Híbrido (RRF + Reranker)" if use_reranker else "Híbrido (QueryFusionRetriever)",
-                    "metadata": {
-                        "enunciado": getattr(getattr(node, 'node', node), 'metadata', {}).get("enunciado", ""),
-                        "excerto": getattr(getattr(node, 'node', node), 'metadata', {}).get("excerto", ""),
-                    }
-                }
-                resultados_formatados.append(resultado)
-            
-            print(f"Retornando os {len(resultados_formatados)} melhores resultados.")
-            return resultados_formatados
+            metodo = "Híbrido (RRF + Reranker)" if use_reranker else "Híbrido (QueryFusionRetriever)"
+            resultados = self._resultados(retrieved_nodes[:top_k], metodo, hibrido=True)
+            logger.info("Retornando os %d melhores resultados.", len(resultados))
+            return resultados
 
         except Exception as e:
-            print(f"✗ Erro na busca híbrida com QueryFusionRetriever: {e}")
+            logger.error("✗ Erro na busca híbrida com QueryFusionRetriever: %s", e, extra={"consulta": consulta})
+
+    def _resultados(self, nodes: List[Any], metodo: str, hibrido: bool = False) -> List[ResultadoBusca]:
+        """Registros de resultado (posição no acervo + score) para os nós retornados."""
+        return [
+            ResultadoBusca(
+                self.acervo, self.acervo.posicao(getattr(node, 'node', node).node_id),
+                getattr(node, 'score', None), metodo, hibrido,
+            )
+            for node in nodes
+        ]
+
+    def _node_por_id(self, node_id: str) -> "TextNode":
+        return self.nodes[self.acervo.posicao(node_id)]
+
+    def _criar_retriever_denso(self, top_k: int):
+        """Retriever vetorial que devolve os nós em memória (sem reconstruí-los do docstore)."""
+        from src.retriever_denso import RetrieverDensoAcervo
+
+        return RetrieverDensoAcervo(
+            self.vector_index, self._node_por_id, similarity_top_k=top_k, embed_model=self.embeddings_model,
+        )
+
+    def _invalidar_indice(self) -> None:
+        """Avança a versão do índice, tornando obsoletos os resultados em cache."""
+        self.versao_indice += 1
+        self.cache_resultados.limpar()
+
+    def estatisticas_cache_resultados(self) -> Dict[str, float]:
+        """Retorna hits/misses, requisições colapsadas e expiradas do cache de resultados."""
+        return self.cache_resultados.estatisticas()
+
+    def _query_bundle(self, consulta: str) -> "QueryBundle":
+        """
+        Monta o QueryBundle com o embedding da consulta obtido do cache LRU.
+        Sem modelo de embeddings, o bundle segue apenas com o texto (BM25).
+        """
+        from llama_index.core.schema import QueryBundle
+
+        if not self.vector_retriever or not self.embeddings_model:
+            return QueryBundle(query_str=consulta)
+        modelo = self.embeddings_model
+
+        def _gerar(texto: str):
+            # Só em miss do cache de embeddings de consulta
+            with span("embeddings.consulta"), lock_inferencia(modelo):
+                return modelo.get_query_embedding(texto)
+
+        embedding = self.cache_embeddings.obter(consulta, _gerar)
+        return QueryBundle(query_str=consulta, embedding=embedding)
+
+    def estatisticas_cache_embeddings(self) -> Dict[str, float]:
+        """Retorna hits/misses e ocupação do cache de embeddings de consulta."""
+        return self.cache_embeddings.estatisticas()
+
+    def salvar_cache_embeddings(self, caminho: Optional[str] = None) -> None:
+        """Persiste o cache de embeddings de consulta em disco."""
+        self.cache_embeddings.salvar(caminho)
 
     # Método removido; reranking agora é responsabilidade de `src.reranking.rerank_nodes`
 
@@ -363,14 +586,17 @@ class BuscadorHibridoLlamaIndex:
             
         Returns:
             Dicionário com métricas de performance
+
+        Mede uma única execução de cada método; para latência/throughput sobre a
+        carga de query.csv, use `python utils/benchmark_busca.py`.
         """
         metricas = {}
         
         # Testar BM25
         if self.bm25_retriever:
-            inicio = time.time()
+            inicio = time.perf_counter()
             resultados_bm25 = self.buscar_bm25(query)
-            tempo_bm25 = time.time() - inicio
+            tempo_bm25 = time.perf_counter() - inicio
             metricas["bm25"] = {
                 "tempo": tempo_bm25,
                 "resultados": len(resultados_bm25),
@@ -381,9 +607,9 @@ class BuscadorHibridoLlamaIndex:
         
         # Testar embeddings
         if self.vector_retriever:
-            inicio = time.time()
+            inicio = time.perf_counter()
             resultados_embeddings = self.buscar_embeddings(query)
-            tempo_embeddings = time.time() - inicio
+            tempo_embeddings = time.perf_counter() - inicio
             metricas["embeddings"] = {
                 "tempo": tempo_embeddings,
                 "resultados": len(resultados_embeddings),
@@ -394,9 +620,9 @@ class BuscadorHibridoLlamaIndex:
         
         # Testar híbrido
         if self.bm25_retriever or self.vector_retriever:
-            inicio = time.time()
+            inicio = time.perf_counter()
             resultados_hibrido = self.buscar_hibrido(query)
-            tempo_hibrido = time.time() - inicio
+            tempo_hibrido = time.perf_counter() - inicio
             metricas["hibrido"] = {
                 "tempo": tempo_hibrido,
                 "resultados": len(resultados_hibrido),
@@ -411,18 +637,32 @@ class BuscadorHibridoLlamaIndex:
         if self.bm25_retriever:
             try:
                 self.bm25_retriever.set_top_k(k)
+                self._invalidar_indice()
             except Exception:
                 pass
 
+    def set_bm25_parametros(self, k1: float, b: float):
+        """Reconstrói o BM25 sobre os nós atuais com novos k1/b (mantém o top-k)."""
+        self.bm25_k1, self.bm25_b = k1, b
+        if not self.bm25_retriever:
+            return
+        bm25_top_k = self.bm25_retriever._similarity_top_k
+        self._configurar_bm25(self.nodes)
+        self.set_bm25_top_k(bm25_top_k)
+        self._configurar_retrievers_llama()
+        self._invalidar_indice()
+
     def set_embeddings_top_k(self, k: int):
         try:
             if hasattr(self, 'vector_index') and self.vector_index is not None:
-                self.vector_retriever = self.vector_index.as_retriever(similarity_top_k=k)
+                self.vector_retriever = self._criar_retriever_denso(k)
+                self._invalidar_indice()
         except Exception:
             pass
 
     def set_hibrido_top_k(self, k: int):
         self.hybrid_similarity_top_k = k
+        self._invalidar_indice()
         try:
             self._configurar_retrievers_llama()
         except Exception:
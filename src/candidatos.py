@@ -2,6 +2,7 @@ import os
 import csv
 from typing import List, Dict
 from src.buscador_hibrido import BuscadorHibridoLlamaIndex
+from src.utils.instrumentacao import span
 
 def executar_busca_candidatos(
     queries: List[Dict],
@@ -12,11 +13,13 @@ def executar_busca_candidatos(
     embeddings_top_k: int = 50,
     hybrid_top_k: int = 50,
     rerank_top_n: int = 20,
+    cache_embeddings_caminho: str = None,
 ):
     os.makedirs(os.path.dirname(output_csv_path), exist_ok=True)
     os.makedirs(persist_dir, exist_ok=True)
 
-    buscador = BuscadorHibridoLlamaIndex()
+    # Modelos carregam em background enquanto os nós são tokenizados
+    buscador = BuscadorHibridoLlamaIndex(cache_embeddings_caminho=cache_embeddings_caminho, aquecer_modelos=True)
     buscador.carregar_documentos(documentos)
     buscador.set_bm25_top_k(bm25_top_k)
     buscador.set_embeddings_top_k(embeddings_top_k)
@@ -40,7 +43,12 @@ def executar_busca_candidatos(
                 "RANK": rank,
             })
 
-    with open(output_csv_path, "w", newline="", encoding="utf-8") as f:
+    if cache_embeddings_caminho:
+        buscador.salvar_cache_embeddings()
+    print(f"Cache de embeddings de consulta: {buscador.estatisticas_cache_embeddings()}")
+    print(f"Cache de resultados híbridos: {buscador.estatisticas_cache_resultados()}")
+
+    with span("io.gravar_candidatos", linhas=len(rows)), open(output_csv_path, "w", newline="", encoding="utf-8") as f:
         writer = csv.DictWriter(f, fieldnames=["QUERY_ID", "DOC_ID", "RERANK_SCORE", "RANK"])
         writer.writeheader()
         writer.writerows(rows)
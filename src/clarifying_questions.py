@@ -1,24 +1,44 @@
 from typing import List, Dict, Optional
-import os
 import json
-import time
-
-try:
-    import google.generativeai as genai  # type: ignore
-    _HAS_GEMINI = True
-except Exception:
-    _HAS_GEMINI = False
+import logging
 
 from src.similaridade import _texto_do_resultado
-from src.utils.gemini import configurar_gemini, strip_code_fences, extrair_texto_resposta
+from src.utils.gemini import LimiteDiarioAtingido, estimar_tokens, obter_cliente_gemini, strip_code_fences
+from src.utils.instrumentacao import contar, instrumentar
+from src.utils.orcamento_prompt import TrechoPrompt, ajustar_ao_orcamento
 
 from dotenv import load_dotenv
 
 # Carregar variáveis de ambiente do arquivo .env
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+
+def _ajustar_caso(conversa: str, caso1: str, caso2: str, tokens_fixos: int):
+    """Conversa e documentos dentro do orçamento de tokens do prompt.
+
+    Os documentos são encurtados primeiro, preservando o início; a pergunta depende
+    dos últimos turnos, então a conversa só perde turnos inteiros do meio (mantém a
+    pergunta original e os últimos turnos) se os documentos já estiverem no mínimo.
+    """
+    textos, _ = ajustar_ao_orcamento(
+        [
+            TrechoPrompt("conversa", str(conversa), prioridade=3, minimo=256, manter="turnos"),
+            TrechoPrompt("documento 1", str(caso1), prioridade=2, minimo=128),
+            TrechoPrompt("documento 2", str(caso2), prioridade=2, minimo=128),
+        ],
+        tokens_fixos=tokens_fixos,
+    )
+    return textos
+
 
 def _formatar_prompt(conversa, caso1, caso2):
+    conversa, caso1, caso2 = _ajustar_caso(conversa, caso1, caso2, _TOKENS_FIXOS_PROMPT)
+    return _formatar_prompt_completo(conversa, caso1, caso2)
+
+
+def _formatar_prompt_completo(conversa, caso1, caso2):
     return (
         f"""
 Você é um assistente de IA especialista em Direito Brasileiro. A conversa atual é: [{conversa}].
@@ -44,16 +64,52 @@ Não inclua nada além do JSON.
 
 
 
+_TOKENS_FIXOS_PROMPT = estimar_tokens(_formatar_prompt_completo("", "", ""))
+
+
+def _formatar_prompt_lote(casos: List[Dict[str, str]]) -> str:
+    # Cada caso respeita o mesmo orçamento de um prompt por par
+    casos = [
+        dict(zip(("conversa", "caso1", "caso2"), _ajustar_caso(c["conversa"], c["caso1"], c["caso2"], _TOKENS_FIXOS_PROMPT)))
+        for c in casos
+    ]
+    blocos = "\n".join(
+        f"""
+### Caso {i}
+Conversa: [{caso["conversa"]}]
+Documento 1: [{caso["caso1"]}]
+Documento 2: [{caso["caso2"]}]
+"""
+        for i, caso in enumerate(casos)
+    )
+    return (
+        f"""
+Você é um assistente de IA especialista em Direito Brasileiro. Abaixo estão {len(casos)} casos independentes.
+Em cada caso há a conversa atual de um usuário e dois documentos similares, mas distintos, retornados por uma busca inicial.
+{blocos}
+Para CADA caso, de forma independente dos demais:
+1. **Analisar** e identificar a **única diferença mais importante** (factual ou jurídica) entre o Documento 1 e o Documento 2.
+2. Com base **apenas** nessa diferença chave, gere uma única pergunta clarificadora clara em Português do Brasil.
+
+OBJETIVO DA PERGUNTA:
+Ajudar o usuário a especificar melhor sua intenção, permitindo entender qual contexto (do Doc 1 ou Doc 2) é mais relevante para o caso dele.
+A pergunta NÃO deve mencionar "Documento 1" ou "Documento 2". A pergunta deve indagar sobre a situação ou necessidade específica do usuário.
+
+Retorne APENAS um array JSON com um objeto por caso, na ordem dos casos:
+[{{"id": <número do caso>, "question": "<sua pergunta em PT-BR aqui>", "rationale": "<diferença chave identificada e o porquê desta pergunta>"}}, ...]
+
+Não inclua nada além do JSON.
+"""
+    )
+
+
+@instrumentar("perguntas.par")
 def _gerar_via_gemini(prompt: str) -> Dict[str, str]:
     """
     Gera uma pergunta clarificadora via Gemini e retorna um dict:
     { 'full_text': <resposta bruta do modelo>, 'question': <pergunta extraída> }.
     Levanta RuntimeError em caso de falha.
     """
-    configurar_gemini()
-
-    # Permite customizar o nome do modelo via env; define um padrão se não houver.
-    model_name = os.getenv("GEMINI_MODEL_NAME", "gemini-2.5-flash-lite")
     try:
         # Configuração para forçar saída JSON, e tentar schema estruturado
         schema = {
@@ -66,15 +122,8 @@ def _gerar_via_gemini(prompt: str) -> Dict[str, str]:
         }
 
         gen_config = {"response_mime_type": "application/json", "response_schema": schema, "temperature": 0}
-        model = genai.GenerativeModel(model_name, generation_config=gen_config)
-        try:
-            resp = model.generate_content(prompt, generation_config=gen_config)
-        except Exception as e:
-            raise RuntimeError(f"Falha ao gerar conteúdo com Gemini: {e}")
-        time.sleep(1)
-
-        # Extrai texto da resposta usando utilitário compartilhado
-        full_text = extrair_texto_resposta(resp)
+        # Cliente compartilhado: limite de taxa, concorrência e retentativas em 429
+        full_text = obter_cliente_gemini().gerar(prompt, gen_config)
         if full_text is None:
             raise RuntimeError("Resposta do Gemini não contém texto gerado.")
 
@@ -92,6 +141,8 @@ def _gerar_via_gemini(prompt: str) -> Dict[str, str]:
             raise RuntimeError(f"Campo 'question' ausente ou inválido no JSON. Conteúdo: {full_text}")
 
         return {"full_text": full_text, "question": question.strip()}
+    except LimiteDiarioAtingido:
+        raise
     except Exception as e:
         raise RuntimeError(f"Falha ao gerar conteúdo com Gemini: {e}")
 
@@ -115,9 +166,8 @@ Não inclua nada além do JSON.
     )
 
 
+@instrumentar("perguntas.sem_pares")
 def gerar_perguntas_sem_pares(pergunta: str, max_perguntas: int = 3) -> List[Dict]:
-    configurar_gemini()
-    model_name = os.getenv("GEMINI_MODEL_NAME", "gemini-2.5-flash-lite")
     n = max(1, max_perguntas)
     prompt = _formatar_prompt_sem_pares(pergunta, n)
     try:
@@ -133,10 +183,7 @@ def gerar_perguntas_sem_pares(pergunta: str, max_perguntas: int = 3) -> List[Dic
             },
         }
         gen_config = {"response_mime_type": "application/json", "response_schema": schema, "temperature": 0}
-        model = genai.GenerativeModel(model_name, generation_config=gen_config)
-        resp = model.generate_content(prompt, generation_config=gen_config)
-        time.sleep(1)
-        full_text = extrair_texto_resposta(resp)
+        full_text = obter_cliente_gemini().gerar(prompt, gen_config)
         if full_text is None:
             raise RuntimeError("Resposta do Gemini não contém texto gerado.")
         full_text = strip_code_fences(full_text)
@@ -158,6 +205,108 @@ def gerar_perguntas_sem_pares(pergunta: str, max_perguntas: int = 3) -> List[Dic
     except Exception as e:
         raise RuntimeError(f"Falha ao gerar perguntas sem pares: {e}")
 
+def gerar_perguntas_clarificadoras_em_lote(
+    tarefas: List[Dict],
+    tamanho_lote: int = 8,
+) -> List[Optional[Dict]]:
+    """
+    Gera uma pergunta clarificadora por tarefa, agrupando várias tarefas em cada requisição.
+
+    Cada tarefa é {'conversa': str, 'par': <par de calcular_similaridade_entre_pares>}; as
+    tarefas podem vir de queries diferentes. Até `tamanho_lote` casos vão em um único prompt
+    com schema de array e os resultados são separados de volta pelo campo 'id'. Casos
+    ausentes ou inválidos na resposta do lote são refeitos individualmente (mesmo prompt
+    do modo por par); se ainda assim falharem, o resultado da tarefa é None. Cota diária
+    esgotada (LimiteDiarioAtingido) interrompe a geração e é propagada.
+
+    Returns:
+        Lista alinhada com `tarefas`, com dicts no formato de
+        gerar_perguntas_clarificadoras_para_pares (origem 'gemini_lote' ou 'gemini').
+    """
+    casos = []
+    for tarefa in tarefas:
+        par = tarefa.get("par", {})
+        casos.append({
+            "conversa": tarefa.get("conversa", ""),
+            "caso1": _texto_do_resultado(par.get("documento_1", {})),
+            "caso2": _texto_do_resultado(par.get("documento_2", {})),
+        })
+
+    resultados: List[Optional[Dict]] = [None] * len(casos)
+    tamanho_lote = max(1, tamanho_lote)
+    for inicio in range(0, len(casos), tamanho_lote):
+        bloco = casos[inicio:inicio + tamanho_lote]
+        if len(bloco) > 1:
+            for i, item in _gerar_lote_via_gemini(bloco).items():
+                resultados[inicio + i] = item
+
+        # Fallback por par: casos que o lote não cobriu (ou bloco de um único caso)
+        for i, caso in enumerate(bloco):
+            if resultados[inicio + i] is not None:
+                continue
+            contar("perguntas.fallback_por_par")
+            try:
+                resultado = _gerar_via_gemini(_formatar_prompt(caso["conversa"], caso["caso1"], caso["caso2"]))
+            except LimiteDiarioAtingido:
+                raise
+            except RuntimeError as e:
+                logger.error("✗ Falha ao gerar pergunta do caso %d: %s", inicio + i, e, extra={"caso": inicio + i})
+                continue
+            resultados[inicio + i] = {
+                "par_index": 0,
+                "pergunta": resultado["question"],
+                "resposta_completa": resultado["full_text"],
+                "origem": "gemini",
+            }
+    return resultados
+
+
+@instrumentar("perguntas.lote")
+def _gerar_lote_via_gemini(casos: List[Dict[str, str]]) -> Dict[int, Dict]:
+    """Uma requisição para vários casos; retorna {índice no bloco: resultado} dos casos válidos."""
+    schema = {
+        "type": "array",
+        "items": {
+            "type": "object",
+            "properties": {
+                "id": {"type": "integer"},
+                "question": {"type": "string"},
+                "rationale": {"type": "string"},
+            },
+            "required": ["id", "question", "rationale"],
+        },
+    }
+    gen_config = {"response_mime_type": "application/json", "response_schema": schema, "temperature": 0}
+    try:
+        full_text = obter_cliente_gemini().gerar(_formatar_prompt_lote(casos), gen_config)
+        data = json.loads(strip_code_fences(full_text or ""))
+    except LimiteDiarioAtingido:
+        raise
+    except Exception as e:
+        logger.warning("⚠ Lote de %d perguntas falhou (%s); gerando por par.", len(casos), e, extra={"casos": len(casos)})
+        return {}
+    if not isinstance(data, list):
+        return {}
+
+    resultados: Dict[int, Dict] = {}
+    for item in data:
+        if not isinstance(item, dict):
+            continue
+        i = item.get("id")
+        q = item.get("question")
+        if not isinstance(i, int) or not 0 <= i < len(casos) or i in resultados:
+            continue
+        if not q or not isinstance(q, str):
+            continue
+        resultados[i] = {
+            "par_index": 0,
+            "pergunta": q.strip(),
+            "resposta_completa": json.dumps(item, ensure_ascii=False),
+            "origem": "gemini_lote",
+        }
+    return resultados
+
+
 def gerar_perguntas_clarificadoras_para_pares(
     pares_similares: List[Dict],
     conversa: str,
@@ -2,7 +2,8 @@
 Módulo para representação de documentos jurídicos do TCU
 """
 
-from typing import Dict, Any
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, List, Optional
 from dataclasses import dataclass
 
 
@@ -11,4 +12,112 @@ class DocumentoJuris:
     """Estrutura para representar um documento jurídico do TCU"""
     id: str
     enunciado: str
-    excerto: str
\ No newline at end of file
+    excerto: str
+
+class AcervoDocumentos:
+    """
+    Documentos indexados em colunas: a posição inteira (0..n-1) identifica o documento.
+
+    Cada coluna é uma lista com uma referência por documento; textos não são copiados
+    (os nós e os resultados de busca apontam para as mesmas strings). Substitui a lista
+    de `DocumentoJuris` mantida pelo buscador e serve de base para `ResultadoBusca`.
+    """
+
+    __slots__ = ("ids", "enunciados", "excertos", "textos", "_posicoes")
+
+    def __init__(self):
+        self.ids: List[Any] = []
+        self.enunciados: List[str] = []
+        self.excertos: List[str] = []
+        # Texto indexado (ENUNCIADO sem HTML, truncado para o modelo), igual ao `text` do nó
+        self.textos: List[str] = []
+        self._posicoes: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def adicionar(self, documentos: List[DocumentoJuris], textos: List[str]) -> None:
+        """Acrescenta documentos e seus textos indexados (mesma ordem dos nós criados)."""
+        for doc, texto in zip(documentos, textos):
+            # Ids repetidos: vale a primeira ocorrência
+            self._posicoes.setdefault(str(doc.id), len(self.ids))
+            self.ids.append(doc.id)
+            self.enunciados.append(doc.enunciado)
+            self.excertos.append(doc.excerto)
+            self.textos.append(texto)
+
+    def posicao(self, doc_id: Any) -> int:
+        """Posição do documento pelo id (o `node_id` dos nós); KeyError se ausente."""
+        return self._posicoes[str(doc_id)]
+
+    def titulo(self, i: int) -> str:
+        enunciado = self.enunciados[i]
+        return enunciado[:100] + "..." if len(enunciado) > 100 else enunciado
+
+    def documento(self, i: int) -> DocumentoJuris:
+        return DocumentoJuris(id=self.ids[i], enunciado=self.enunciados[i], excerto=self.excertos[i])
+
+    def documentos(self) -> List[DocumentoJuris]:
+        return [self.documento(i) for i in range(len(self))]
+
+
+class ResultadoBusca(Mapping):
+    """
+    Resultado de busca compacto: posição no acervo, score e método, sem cópia de textos.
+
+    Comporta-se como o dict (somente leitura) que as buscas retornavam, com as mesmas
+    chaves: `buscar_bm25`/`buscar_embeddings` (id, enunciado, excerto, score,
+    texto_completo, metodo) e `buscar_hibrido` (id, titulo, conteudo, score, metodo,
+    metadata). Os valores são lidos do acervo no acesso; `dict(resultado)` materializa.
+    """
+
+    __slots__ = ("acervo", "indice", "score", "metodo", "hibrido")
+
+    _CHAVES = ("id", "enunciado", "excerto", "score", "texto_completo", "metodo")
+    _CHAVES_HIBRIDO = ("id", "titulo", "conteudo", "score", "metodo", "metadata")
+
+    def __init__(self, acervo: AcervoDocumentos, indice: int, score: Optional[float], metodo: str, hibrido: bool = False):
+        self.acervo = acervo
+        self.indice = indice
+        self.score = score
+        self.metodo = metodo
+        self.hibrido = hibrido
+
+    def _chaves(self):
+        return self._CHAVES_HIBRIDO if self.hibrido else self._CHAVES
+
+    def __getitem__(self, chave: str) -> Any:
+        if chave not in self._chaves():
+            raise KeyError(chave)
+        i = self.indice
+        if chave == "id":
+            return self.acervo.ids[i]
+        if chave == "score":
+            return self.score
+        if chave == "metodo":
+            return self.metodo
+        if chave in ("texto_completo", "conteudo"):
+            return self.acervo.textos[i]
+        if chave == "enunciado":
+            return self.acervo.enunciados[i]
+        if chave == "excerto":
+            return self.acervo.excertos[i]
+        if chave == "titulo":
+            return self.acervo.titulo(i)
+        return {"enunciado": self.acervo.enunciados[i], "excerto": self.acervo.excertos[i]}
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._chaves())
+
+    def __len__(self) -> int:
+        return len(self._chaves())
+
+    def __repr__(self) -> str:
+        return f"ResultadoBusca({dict(self)!r})"
+
+    def __copy__(self) -> "ResultadoBusca":
+        return ResultadoBusca(self.acervo, self.indice, self.score, self.metodo, self.hibrido)
+
+    def __deepcopy__(self, memo) -> "ResultadoBusca":
+        # Somente leitura: a cópia compartilha o acervo
+        return self.__copy__()
@@ -4,17 +4,26 @@ usando o ENUNCIADO completo dos documentos com SCORE 3 (qrel.csv),
 removendo HTML via utilitário de preprocessamento, e salva um novo CSV
 em `dados/query_intencao.csv` com a nova coluna `INTENCAO`.
 
+As queries são processadas em paralelo por um pool de workers; o ritmo é dado pelo
+limite de taxa do cliente Gemini compartilhado (GEMINI_RPM/GEMINI_TPM). Cada intenção
+gerada é gravada imediatamente em `dados/query_intencao.parcial.jsonl`; uma execução
+interrompida (ou que atinja a cota diária) é retomada a partir dele e do CSV existente.
+
 Execução:
     python src/gerar_intencoes_dataset.py
+    python src/gerar_intencoes_dataset.py --workers 8
 
 Requisitos:
     - `.env` com `GOOGLE_API_KEY` configurado
     - Dependências em `requirements.txt` instaladas
 """
 
+import argparse
 import os
 import sys
-from typing import List
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional
 
 import pandas as pd
 from dotenv import load_dotenv
@@ -33,94 +42,122 @@ DOC_CSV = os.path.join(DATA_DIR, "doc.csv")
 
 OUTPUTS_DIR = os.path.join(BASE_DIR, "dados")
 OUTPUT_CSV = os.path.join(OUTPUTS_DIR, "query_intencao.csv")
+PARCIAL_JSONL = os.path.join(OUTPUTS_DIR, "query_intencao.parcial.jsonl")
 
-import time
 from src.intencao_busca import gerar_intencao_busca
+from src.utils.gemini import LimiteDiarioAtingido, obter_cliente_gemini
 from src.utils.dados import load_queries_df, load_qrels_df, load_docs_enunciado_map_clean
+from src.utils.checkpoint import CheckpointJsonl
 
 
-def gerar_para_todas_as_queries() -> None:
-    if not (os.path.exists(QUERY_CSV) and os.path.exists(QREL_CSV) and os.path.exists(DOC_CSV)):
-        print("❌ Arquivos necessários não encontrados em dados/juris_tcu")
-        print(f"   Esperados: {QUERY_CSV}, {QREL_CSV}, {DOC_CSV}")
-        return
+def _intencao_valida(valor) -> Optional[str]:
+    """Intenção já salva (texto não vazio) ou None."""
+    if valor is None or pd.isna(valor):
+        return None
+    texto = str(valor).strip()
+    return texto if texto and texto.lower() != "nan" else None
+
 
-    queries_df = load_queries_df(QUERY_CSV)
-    # Suporte a retomada: se já existir saída com INTENCAO preenchida, reaproveitar
+def _intencoes_existentes(parcial: CheckpointJsonl) -> Dict[int, str]:
+    """Intenções já geradas: CSV de uma execução anterior + saída parcial em JSONL."""
+    intencoes: Dict[int, str] = {}
     if os.path.exists(OUTPUT_CSV):
         try:
             existing_out = pd.read_csv(OUTPUT_CSV)
             if "INTENCAO" in existing_out.columns:
-                queries_df = queries_df.merge(existing_out[["ID", "INTENCAO"]], on="ID", how="left")
+                for qid, valor in zip(existing_out["ID"], existing_out["INTENCAO"]):
+                    texto = _intencao_valida(valor)
+                    if texto is not None and not pd.isna(qid):
+                        intencoes[int(qid)] = texto
         except Exception:
             pass
+    for qid, registro in parcial.carregar().items():
+        texto = _intencao_valida(registro.get("INTENCAO"))
+        if texto is not None:
+            intencoes[int(qid)] = texto
+    return intencoes
+
+
+def gerar_para_todas_as_queries(workers: Optional[int] = None) -> None:
+    if not (os.path.exists(QUERY_CSV) and os.path.exists(QREL_CSV) and os.path.exists(DOC_CSV)):
+        print("❌ Arquivos necessários não encontrados em dados/juris_tcu")
+        print(f"   Esperados: {QUERY_CSV}, {QREL_CSV}, {DOC_CSV}")
+        return
+
+    cliente = obter_cliente_gemini()
+    workers = workers or cliente.max_concorrencia
+
+    queries_df = load_queries_df(QUERY_CSV).drop(columns=["INTENCAO"], errors="ignore")
+    # Suporte a retomada: intenções do CSV anterior e da saída parcial são reaproveitadas
+    parcial = CheckpointJsonl(PARCIAL_JSONL, campo_chave="ID")
+    intencoes = _intencoes_existentes(parcial)
     qrels_df = load_qrels_df(QREL_CSV)
     docs_map = load_docs_enunciado_map_clean(DOC_CSV)
 
-    # Sempre usar TODOS os documentos com SCORE 3, ordenados por RANK
-    score3_df = qrels_df[qrels_df["SCORE"] == 3].sort_values("RANK")
-
-    intents: List[str] = []
-    print(f"--- Gerando intenções para {len(queries_df)} queries ---")
-    for _, qrow in queries_df.iterrows():
-        qid = int(qrow["ID"])
-        qtext = str(qrow.get("TEXT", ""))
-
-        # Documentos ideais para essa query (todos SCORE 3)
-        docs_rows = score3_df[score3_df["QUERY_ID"] == qid]
-        docs_ideais: List[str] = []
-        for _, drow in docs_rows.iterrows():
-            doc_id = int(drow["DOC_ID"])
-            enun = docs_map.get(doc_id)
-            if enun:
-                docs_ideais.append(enun)
-
-        # Pular se já há INTENCAO previamente salva (retomada) — apenas se não for vazio/NaN
-        if "INTENCAO" in queries_df.columns:
-            val = qrow.get("INTENCAO", None)
-            if val is not None and not pd.isna(val):
-                sval = str(val).strip()
-                if sval and sval.lower() != "nan":
-                    intents.append(sval)
-                    continue
-
-        # Tentar com backoff exponencial simples em caso de 429 (quota)
-        max_retries = 5
-        base_delay = 5.0  # segundos
-        for attempt in range(1, max_retries + 1):
-            try:
-                resultado = gerar_intencao_busca(qtext, docs_ideais)
-                intents.append(str(resultado.get("intent", "")))
-                break
-            except RuntimeError as e:
-                msg = str(e)
-                if "429" in msg:
-                    # Se for limite diário, não adianta continuar: salvar parcial e sair
-                    if "PerDay" in msg or "per day" in msg.lower():
-                        print("  ⚠ Limite diário atingido. Salvando progresso e encerrando.")
-                        intents.append("")
-                        queries_df["INTENCAO"] = intents
-                        os.makedirs(OUTPUTS_DIR, exist_ok=True)
-                        queries_df.to_csv(OUTPUT_CSV, index=False, encoding="utf-8")
-                        return
-                    if attempt < max_retries:
-                        delay = base_delay * (2 ** (attempt - 1))
-                        print(f"  ↻ Query ID {qid}: 429 (quota). Aguardando {delay:.0f}s e tentando novamente...")
-                        time.sleep(delay)
-                        continue
-                print(f"  ✗ Query ID {qid}: falha ao gerar intenção: {e}")
-                intents.append("")
-                break
-
-        # Ritmo constante para respeitar limite por minuto
-        time.sleep(5)
-
-    # Salvar CSV com coluna INTENCAO
-    queries_df["INTENCAO"] = intents
+    # Sempre usar TODOS os documentos com SCORE 3, ordenados por RANK (um único groupby)
+    score3_df = qrels_df[qrels_df["SCORE"] == 3].sort_values("RANK", kind="stable")
+    docs_por_query: Dict[int, List[str]] = {
+        int(qid): [docs_map[int(d)] for d in doc_ids if docs_map.get(int(d))]
+        for qid, doc_ids in score3_df.groupby("QUERY_ID", sort=False)["DOC_ID"]
+    }
+
+    pendentes = [
+        (int(qid), str(qtext))
+        for qid, qtext in zip(queries_df["ID"], queries_df["TEXT"])
+        if not pd.isna(qid) and int(qid) not in intencoes
+    ]
+    print(f"--- Gerando intenções para {len(queries_df)} queries "
+          f"({len(intencoes)} já geradas, {len(pendentes)} pendentes, {workers} workers) ---")
+
+    limite_atingido = threading.Event()
+
+    def gerar(qid: int, qtext: str) -> Optional[str]:
+        if limite_atingido.is_set():
+            return None
+        # Limite de taxa e retentativas com backoff em 429 ficam a cargo do cliente Gemini compartilhado
+        try:
+            resultado = gerar_intencao_busca(qtext, docs_por_query.get(qid, []))
+        except LimiteDiarioAtingido:
+            limite_atingido.set()
+            return None
+        except RuntimeError as e:
+            print(f"  ✗ Query ID {qid}: falha ao gerar intenção: {e}")
+            return None
+        intent = str(resultado.get("intent", ""))
+        # Cada intenção vai para o disco assim que fica pronta
+        parcial.registrar({"ID": qid, "INTENCAO": intent})
+        return intent
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futuros = {pool.submit(gerar, qid, qtext): qid for qid, qtext in pendentes}
+        for concluidas, futuro in enumerate(as_completed(futuros), start=1):
+            intent = futuro.result()
+            if intent is not None:
+                intencoes[futuros[futuro]] = intent
+            if concluidas % 50 == 0:
+                print(f"  {concluidas}/{len(pendentes)} queries processadas")
+            if limite_atingido.is_set():
+                # Limite diário: não adianta continuar; cancelar o que não começou e salvar parcial
+                for f in futuros:
+                    f.cancel()
+
+    # Salvar CSV com coluna INTENCAO (queries sem intenção ficam vazias e são refeitas na retomada)
+    queries_df["INTENCAO"] = [intencoes.get(int(qid), "") if not pd.isna(qid) else "" for qid in queries_df["ID"]]
     os.makedirs(OUTPUTS_DIR, exist_ok=True)
     queries_df.to_csv(OUTPUT_CSV, index=False, encoding="utf-8")
-    print(f"✓ CSV gerado em: {OUTPUT_CSV}")
+    if limite_atingido.is_set():
+        print("  ⚠ Limite diário atingido. Progresso salvo; execute novamente para continuar.")
+    else:
+        # Tudo consolidado no CSV: a saída parcial não é mais necessária
+        parcial.reiniciar()
+        print(f"✓ CSV gerado em: {OUTPUT_CSV}")
+    print(f"Cliente LLM: {cliente.estatisticas}")
+    if cliente.cache is not None:
+        print(f"Cache LLM: {cliente.cache.estatisticas()}")
 
 
 if __name__ == "__main__":
-    gerar_para_todas_as_queries()
\ No newline at end of file
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=None, help="Requisições em paralelo (padrão: GEMINI_MAX_CONCORRENCIA)")
+    args = parser.parse_args()
+    gerar_para_todas_as_queries(workers=args.workers)
\ No newline at end of file
@@ -10,18 +10,11 @@ Retorna dicionário com:
 """
 
 from typing import List, Dict
-import os
 import json
 
-# Tentativa de importar o SDK do Gemini; mantém flag de disponibilidade
-try:
-    import google.generativeai as genai  # type: ignore
-    _HAS_GEMINI = True
-except Exception:
-    _HAS_GEMINI = False
-
 from dotenv import load_dotenv
-from src.utils.gemini import configurar_gemini, strip_code_fences, extrair_texto_resposta
+from src.utils.gemini import estimar_tokens, obter_cliente_gemini, strip_code_fences
+from src.utils.orcamento_prompt import TrechoPrompt, ajustar_ao_orcamento
 
 # Carregar variáveis de ambiente do arquivo .env
 load_dotenv()
@@ -31,6 +24,20 @@ load_dotenv()
 
 
 def _formatar_prompt_intencao(query_text: str, docs_ideais: List[str]) -> str:
+    # Orçamento de tokens: os documentos de pior RANK são encurtados (e, se preciso, removidos) primeiro;
+    # o primeiro documento mantém ao menos 128 tokens e a pergunta nunca é cortada
+    tokens_fixos = estimar_tokens(_montar_prompt_intencao(query_text, []))
+    docs_ideais, _ = ajustar_ao_orcamento(
+        [
+            TrechoPrompt(f"documento {i + 1}", d, prioridade=-i, minimo=128 if i == 0 else 0)
+            for i, d in enumerate(docs_ideais)
+        ],
+        tokens_fixos=tokens_fixos,
+    )
+    return _montar_prompt_intencao(query_text, [d for d in docs_ideais if d])
+
+
+def _montar_prompt_intencao(query_text: str, docs_ideais: List[str]) -> str:
     bullets = "\n".join([f"- {d}" for d in docs_ideais])
     return (
         "Você é um assistente jurídico em PT-BR.\n"
@@ -52,10 +59,6 @@ def gerar_intencao_busca(query_text: str, docs_ideais: List[str]) -> Dict[str, s
 
     Retorna dict com 'full_text', 'intent' e (se presente) 'rationale'.
     """
-    configurar_gemini()
-
-    model_name = os.getenv("GEMINI_MODEL_NAME", "gemini-2.5-flash-lite")
-
     # Schema de saída JSON estruturado
     schema = {
         "type": "object",
@@ -66,16 +69,10 @@ def gerar_intencao_busca(query_text: str, docs_ideais: List[str]) -> Dict[str, s
     }
 
     gen_config = {"response_mime_type": "application/json", "response_schema": schema, "temperature": 0}
-    model = genai.GenerativeModel(model_name, generation_config=gen_config)
 
     prompt = _formatar_prompt_intencao(query_text, docs_ideais)
-    try:
-        resp = model.generate_content(prompt, generation_config=gen_config)
-    except Exception as e:
-        raise RuntimeError(f"Falha ao gerar conteúdo com Gemini: {e}")
-
-    # Extrair texto da resposta com utilitário
-    full_text = extrair_texto_resposta(resp)
+    # Cliente compartilhado: limite de taxa, concorrência e retentativas em 429
+    full_text = obter_cliente_gemini().gerar(prompt, gen_config)
     if full_text is None:
         raise RuntimeError("Resposta do Gemini não contém texto gerado.")
 
@@ -1,20 +1,160 @@
-from typing import List, Any
-import torch
-from llama_index.core.schema import NodeWithScore
+import logging
+import os
+from typing import List, Any, Optional, Sequence, Tuple
+
+from dotenv import load_dotenv
+
+from src.utils.instrumentacao import registrar, span
+from src.utils.modelos import HandleModelo, lock_inferencia, obter_registro
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# RERANKER_MODEL_NAME permite trocar por um cross-encoder menor (ex.: benchmarks em CPU)
+MODELO_RERANKER = os.getenv("RERANKER_MODEL_NAME", "jinaai/jina-reranker-v2-base-multilingual")
+
+
+class AdaptadorCrossEncoder:
+    """Expõe `compute_score` (interface do Jina Reranker) para cross-encoders comuns do HF.
+
+    Modelos como `cross-encoder/ms-marco-MiniLM-L-6-v2` não trazem `compute_score`;
+    o score é o logit do modelo (coluna positiva, se houver duas classes).
+    """
+
+    def __init__(self, modelo, tokenizer, device: str, max_length: int = 512):
+        self.modelo = modelo
+        self.tokenizer = tokenizer
+        self.device = device
+        self.max_length = max_length
+
+    def compute_score(self, pairs: List[List[str]], batch_size: int = 4):
+        import torch
+
+        scores: List[float] = []
+        with torch.no_grad():
+            for inicio in range(0, len(pairs), batch_size):
+                lote = pairs[inicio:inicio + batch_size]
+                entradas = self.tokenizer(
+                    [p[0] for p in lote], [p[1] for p in lote],
+                    padding=True, truncation=True, max_length=self.max_length, return_tensors="pt",
+                ).to(self.device)
+                logits = self.modelo(**entradas).logits
+                logits = logits[:, -1] if logits.shape[-1] > 1 else logits.squeeze(-1)
+                scores.extend(float(x) for x in logits.float().cpu())
+        # Como o compute_score do Jina: um único par retorna um escalar
+        return scores[0] if len(pairs) == 1 else scores
+
+
+def carregar_reranker(
+    nome: str = MODELO_RERANKER,
+    device: Optional[str] = None,
+    dtype: str = "auto",
+) -> HandleModelo:
+    """
+    Obtém o reranker pelo registro de modelos do processo (uma cópia por nome/device/dtype).
+
+    O chamador deve chamar `handle.liberar()` quando não precisar mais do modelo.
+    """
+    import torch
+
+    device = device or ('cuda' if torch.cuda.is_available() else 'cpu')
+
+    def _carregar():
+        from transformers import AutoModelForSequenceClassification
+        modelo = AutoModelForSequenceClassification.from_pretrained(
+            nome,
+            torch_dtype=dtype,
+            trust_remote_code=True,
+        )
+        modelo.to(device)
+        modelo.eval()
+        if not hasattr(modelo, "compute_score"):
+            from transformers import AutoTokenizer
+            return AdaptadorCrossEncoder(modelo, AutoTokenizer.from_pretrained(nome), device)
+        return modelo
+
+    return obter_registro().obter(nome, _carregar, device=device, dtype=dtype)
 
 
 def rerank_nodes(reranker_model, query: str, nodes: List[Any], top_n: int = 5) -> List[Any]:
     """
     Aplica o reranking nos nós usando o modelo Jina Reranker (ou compatível).
 
-    Mantém o padrão de logs para não quebrar a expectativa dos testes existentes.
+    Os logs de progresso saem em nível INFO (visíveis com `configurar_logs(verboso=True)`).
     """
     if not reranker_model or not nodes:
         return nodes
 
-    print(f"--- Aplicando Reranking em {len(nodes)} nós ---")
+    import torch
+    from llama_index.core.schema import NodeWithScore
+
+    logger.info("--- Aplicando Reranking em %d nós ---", len(nodes), extra={"nos": len(nodes)})
 
     # Criar pares de [query, texto_do_nó] suportando NodeWithScore de entrada
+    pairs, base_nodes = _pares(query, nodes)
+
+    registrar("reranking.pares", len(pairs))
+    with span("reranking.cross_encoder", pares=len(pairs)), lock_inferencia(reranker_model), torch.no_grad():
+        scores = reranker_model.compute_score(pairs, batch_size=4)
+
+    # Atribuir novos scores ao nó base (não embrulhar NodeWithScore dentro de outro)
+    scored = [NodeWithScore(node=base, score=float(score)) for base, score in zip(base_nodes, scores)]
+
+    # Ordenar por score desc
+    reranked_nodes = sorted(scored, key=lambda x: x.score, reverse=True)
+
+    logger.info("✓ Reranking concluído. Retornando os %d melhores resultados.", top_n)
+    return reranked_nodes[:top_n]
+
+
+def rerank_lote(
+    reranker_model,
+    consultas: Sequence[Tuple[str, List[Any]]],
+    top_n: int = 5,
+    batch_size: int = 4,
+) -> List[List[Any]]:
+    """
+    Reranking de várias consultas sob uma única aquisição do modelo.
+
+    Os pares de cada consulta são pontuados nos mesmos lotes de `rerank_nodes`
+    (`batch_size` 4, sem misturar consultas): o padding de cada lote não muda e os
+    scores são os da execução sequencial. Retorna, para cada (query, nodes) de
+    `consultas`, a mesma lista que `rerank_nodes` retornaria.
+    """
+    if not reranker_model:
+        return [list(nodes) for _, nodes in consultas]
+
+    import torch
+    from llama_index.core.schema import NodeWithScore
+
+    por_consulta = [_pares(query, nodes) for query, nodes in consultas]
+    total = sum(len(pairs) for pairs, _ in por_consulta)
+    logger.info(
+        "--- Aplicando Reranking em lote: %d pares de %d consultas ---", total, len(consultas),
+        extra={"pares": total, "consultas": len(consultas)},
+    )
+    scores_por_consulta: List[List[float]] = [[] for _ in por_consulta]
+    if total:
+        registrar("reranking.pares", total)
+        with span("reranking.cross_encoder", pares=total, consultas=len(consultas)), \
+                lock_inferencia(reranker_model), torch.no_grad():
+            for i, (pairs, _) in enumerate(por_consulta):
+                if not pairs:
+                    continue
+                scores = reranker_model.compute_score(pairs, batch_size=batch_size)
+                scores_por_consulta[i] = [scores] if len(pairs) == 1 else list(scores)
+
+    resultados = []
+    for (_, base_nodes), scores in zip(por_consulta, scores_por_consulta):
+        scored = [NodeWithScore(node=base, score=float(score)) for base, score in zip(base_nodes, scores)]
+        resultados.append(sorted(scored, key=lambda x: x.score, reverse=True)[:top_n])
+    logger.info("✓ Reranking em lote concluído.")
+    return resultados
+
+
+def _pares(query: str, nodes: List[Any]) -> Tuple[List[List[str]], List[Any]]:
+    """Pares [query, conteúdo] e os nós base (desembrulha NodeWithScore)."""
     pairs = []
     base_nodes = []
     for node in nodes:
@@ -25,15 +165,4 @@ def rerank_nodes(reranker_model, query: str, nodes: List[Any], top_n: int = 5) -
             content = getattr(base, 'text', '')
         pairs.append([query, content])
         base_nodes.append(base)
-
-    with torch.no_grad():
-        scores = reranker_model.compute_score(pairs, batch_size=4)
-
-    # Atribuir novos scores ao nó base (não embrulhar NodeWithScore dentro de outro)
-    scored = [NodeWithScore(node=base, score=float(score)) for base, score in zip(base_nodes, scores)]
-
-    # Ordenar por score desc
-    reranked_nodes = sorted(scored, key=lambda x: x.score, reverse=True)
-
-    print(f"✓ Reranking concluído. Retornando os {top_n} melhores resultados.")
-    return reranked_nodes[:top_n]
\ No newline at end of file
+    return pairs, base_nodes
@@ -8,32 +8,45 @@ Função principal:
 Retorno:
     { "answer": <texto da resposta> }
 
+Também expõe `resposta_confirma_interesse(resposta)`, a polaridade da resposta simulada,
+usada pela pré-geração especulativa de perguntas (RESPOSTA_PREVISTA).
+
 Uso de prompt solicitado:
     "Please read the following background information: [the query intention].
      And answer the following question: [clarifying question]."
 """
 
 from typing import Dict
-import os
-import time
 import json
+import re
+
+from src.utils.gemini import obter_cliente_gemini, strip_code_fences
+
+# Resposta assumida ao prever a conversa do próximo passo: o usuário confirma o interesse
+RESPOSTA_PREVISTA = "Sim, gostaria de saber sobre esse ponto."
+
+_NEGACAO = re.compile(
+    r"^\W*(não|nao|nenhum|nem)\b|\b(não|nao)\s+(gostaria|procuro|busco|quero|tenho interesse|me interessa)",
+    re.IGNORECASE,
+)
 
-# Tentativa de importar o SDK do Gemini
-try:
-    import google.generativeai as genai  # type: ignore
-    _HAS_GEMINI = True
-except Exception:
-    _HAS_GEMINI = False
 
-from src.utils.gemini import configurar_gemini, extrair_texto_resposta, strip_code_fences
+def resposta_confirma_interesse(resposta: str) -> bool:
+    """Polaridade da resposta simulada: True se o usuário confirma o interesse no ponto perguntado.
+
+    As regras do prompt levam o usuário simulado a confirmar ("Gostaria de saber sobre...")
+    ou negar ("Não procuro informações sobre..."); respostas de falha contam como não confirmadas.
+    """
+    texto = (resposta or "").strip()
+    if not texto or texto.startswith("(Falha"):
+        return False
+    return _NEGACAO.search(texto) is None
 
 
 def responder_pergunta_clarificadora(query_intencao: str, pergunta: str) -> str:
     if not query_intencao or not pergunta:
         raise ValueError("query_intencao e pergunta são obrigatórias")
 
-    configurar_gemini()
-
     prompt = (
         "Você atua como um USUÁRIO realizando uma busca. Você receberá:\n"
         "1. INTENÇÃO DE BUSCA (o que você quer descobrir/pesquisar).\n"
@@ -55,7 +68,6 @@ def responder_pergunta_clarificadora(query_intencao: str, pergunta: str) -> str:
         "Não inclua nada além do JSON."
     )
 
-    model_name = os.getenv("GEMINI_MODEL_NAME", "gemini-2.5-flash-lite")
     schema = {
         "type": "object",
         "properties": {
@@ -70,11 +82,7 @@ def responder_pergunta_clarificadora(query_intencao: str, pergunta: str) -> str:
         "temperature": 0,
         "max_output_tokens": 1024,
     }
-    model = genai.GenerativeModel(model_name, generation_config=gen_config)
-
-    response = model.generate_content(prompt, generation_config=gen_config)
-    time.sleep(1)
-    texto = extrair_texto_resposta(response)
+    texto = obter_cliente_gemini().gerar(prompt, gen_config)
     texto = strip_code_fences(texto)
 
     # Parsear JSON e extrair somente o campo 'answer'
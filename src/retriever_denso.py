@@ -0,0 +1,52 @@
+from typing import Any, Callable, List, Optional
+
+from llama_index.core.retrievers import BaseRetriever
+from llama_index.core.schema import NodeWithScore, QueryBundle
+from llama_index.core.vector_stores.types import VectorStoreQuery
+
+from src.utils.modelos import lock_inferencia
+
+
+class RetrieverDensoAcervo(BaseRetriever):
+    """Retriever vetorial que resolve os ids do vector store para os nós em memória.
+
+    Faz a mesma consulta ao vector store que `VectorStoreIndex.as_retriever()` (mesmos
+    ids e scores), mas não reconstrói os nós a partir do docstore a cada consulta:
+    `obter_node(node_id)` devolve o nó já criado pelo buscador.
+    """
+
+    def __init__(
+        self,
+        vector_index: Any,
+        obter_node: Callable[[str], Any],
+        similarity_top_k: int = 10,
+        embed_model: Optional[Any] = None,
+        **kwargs
+    ):
+        self._vector_index = vector_index
+        self._obter_node = obter_node
+        self._similarity_top_k = similarity_top_k
+        self._embed_model = embed_model
+        super().__init__(**kwargs)
+
+    def _retrieve(self, query_bundle: QueryBundle) -> List[NodeWithScore]:
+        embedding = query_bundle.embedding
+        if embedding is None:
+            with lock_inferencia(self._embed_model):
+                embedding = self._embed_model.get_query_embedding(query_bundle.query_str)
+
+        resultado = self._vector_index.vector_store.query(VectorStoreQuery(
+            query_embedding=embedding,
+            similarity_top_k=self._similarity_top_k,
+            query_str=query_bundle.query_str,
+        ))
+        ids = resultado.ids or []
+        similaridades = resultado.similarities or [None] * len(ids)
+        nodes_dict = self._vector_index.index_struct.nodes_dict
+        return [
+            NodeWithScore(node=self._obter_node(nodes_dict[i]), score=score)
+            for i, score in zip(ids, similaridades)
+        ]
+
+    def set_top_k(self, top_k: int):
+        self._similarity_top_k = top_k
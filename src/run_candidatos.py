@@ -1,4 +1,7 @@
+import argparse
 import os
+from src.utils import instrumentacao
+from src.utils.logs import configurar_logs
 from src.utils.dados import carregar_dados_juris_tcu, load_queries_df
 from src.candidatos import executar_busca_candidatos
 
@@ -8,8 +11,17 @@ DOC_CSV = os.path.join(DATA_DIR, "doc.csv")
 QUERY_CSV = os.path.join(DATA_DIR, "query.csv")
 OUT_CSV = os.path.join(BASE_DIR, "dados", "candidatos_top20_full.csv")
 PERSIST_DIR = os.path.join(BASE_DIR, "storage", "vector_index")
+CACHE_EMBEDDINGS_JSON = os.path.join(BASE_DIR, "storage", "cache_embeddings_consulta.json")
 
 def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--trace", default=None, help="Grava o trace (Chrome trace JSON) das etapas e imprime o resumo de tempos")
+    parser.add_argument("-v", "--verbose", action="store_true", default=None, help="Mostra os logs de cada busca (nível INFO)")
+    parser.add_argument("--log-json", action="store_true", help="Logs estruturados, uma linha JSON por registro")
+    args = parser.parse_args()
+    configurar_logs(verboso=args.verbose, formato="json" if args.log_json else None)
+    instrumentacao.configurar(args.trace)
+
     if not (os.path.exists(DOC_CSV) and os.path.exists(QUERY_CSV)):
         print("Arquivos necessários não encontrados.")
         return
@@ -31,6 +43,7 @@ def main():
         embeddings_top_k=50,
         hybrid_top_k=50,
         rerank_top_n=20,
+        cache_embeddings_caminho=CACHE_EMBEDDINGS_JSON,
     )
 
     print(f"Total linhas salvas: {len(rows)}")
@@ -1,18 +1,29 @@
 import os
 import sys
 import argparse
+import logging
+import time
 import pandas as pd
-from typing import List, Dict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Dict, Optional, Tuple
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
-from src.utils.dados import load_queries_df, load_docs_enunciado_map_clean, load_qrels_df
+from src.utils.dados import load_queries_df, load_docs_enunciado_map_clean
 from src.buscador_hibrido import BuscadorHibridoLlamaIndex
-from src.reranking import rerank_nodes
-from src.clarifying_questions import gerar_perguntas_clarificadoras_para_pares, gerar_perguntas_sem_pares
-from src.resposta_clarificadora import responder_pergunta_clarificadora
-from llama_index.core.schema import TextNode
+from src.reranking import rerank_lote, rerank_nodes
+from src.clarifying_questions import (
+    gerar_perguntas_clarificadoras_em_lote,
+    gerar_perguntas_clarificadoras_para_pares,
+    gerar_perguntas_sem_pares,
+)
+from src.resposta_clarificadora import RESPOSTA_PREVISTA, responder_pergunta_clarificadora, resposta_confirma_interesse
 from src.utils.metricas import metricas
+from src.utils.gemini import obter_cliente_gemini
+from src.utils.checkpoint import CheckpointJsonl
+from src.utils.execucoes import ler_execucao, ler_qrels
+from src.utils import instrumentacao
+from src.utils.logs import configurar_logs
 
 DATA_DIR = os.path.join(BASE_DIR, "dados", "juris_tcu")
 DOC_CSV = os.path.join(DATA_DIR, "doc.csv")
@@ -23,35 +34,53 @@ OUT_METRICAS_PAIRS = os.path.join(BASE_DIR, "dados", "metricas_candidatos_chat_t
 OUT_CSV_NO_PAIRS = os.path.join(BASE_DIR, "dados", "candidatos_chat_nodocs_top20.csv")
 OUT_METRICAS_NO_PAIRS = os.path.join(BASE_DIR, "dados", "metricas_candidatos_chat_nodocs_top10.csv")
 QUERY_INTENCAO_CSV = os.path.join(BASE_DIR, "dados", "query_intencao.csv")
+CHECKPOINT_PAIRS = os.path.join(BASE_DIR, "dados", "checkpoint_chat.jsonl")
+CHECKPOINT_NO_PAIRS = os.path.join(BASE_DIR, "dados", "checkpoint_chat_nodocs.jsonl")
 
-
-def _extract_numeric_doc_id(value: str):
-    import re
-    if pd.isna(value):
-        return None
-    m = re.search(r"(\d+)$", str(value))
-    return int(m.group(1)) if m else None
+logger = logging.getLogger("src.run_chat_rerank_candidatos")
 
 
 def main():
+    from llama_index.core.schema import TextNode
+
     parser = argparse.ArgumentParser()
     parser.add_argument("--modo", choices=["pares", "sem_pares"], default="pares")
     parser.add_argument("--n", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=1, help="Queries conversando em paralelo (1 = sequencial)")
+    parser.add_argument("--lote", type=int, default=1, help="Modo pares: queries por requisição de perguntas em lote (1 = uma requisição por par)")
+    parser.add_argument("--especulativo", action="store_true", help="Modo pares: pré-gera a próxima pergunta enquanto a resposta é gerada")
+    parser.add_argument("--resume", action="store_true", help="Retoma do checkpoint JSONL, pulando queries já concluídas")
+    parser.add_argument("--replay", action="store_true", help="Usa apenas respostas do cache LLM (sem chamadas à API)")
+    parser.add_argument("--trace", default=None, help="Grava o trace (Chrome trace JSON) das etapas e imprime o resumo de tempos")
+    parser.add_argument("-v", "--verbose", action="store_true", default=None, help="Mostra a conversa de cada query (logs INFO)")
+    parser.add_argument("--log-json", action="store_true", help="Logs estruturados, uma linha JSON por registro")
     args = parser.parse_args()
+    if args.especulativo and args.lote > 1:
+        # Em lote, as perguntas de cada passo saem de uma requisição só: não há o que pré-gerar
+        parser.error("--especulativo não pode ser combinado com --lote > 1")
+    configurar_logs(verboso=args.verbose, formato="json" if args.log_json else None)
+    instrumentacao.configurar(args.trace)
+    if args.replay:
+        os.environ["GEMINI_CACHE_MODO"] = "replay"
     if not (os.path.exists(DOC_CSV) and os.path.exists(QUERY_CSV) and os.path.exists(CANDIDATOS_CSV) and os.path.exists(QUERY_INTENCAO_CSV)):
         print("Arquivos necessários não encontrados.")
         return
 
+    # Modelos (embeddings + reranker) carregam em background enquanto os CSVs são lidos
+    buscador = BuscadorHibridoLlamaIndex(aquecer_modelos=True)
+
     queries_df = load_queries_df(QUERY_CSV)
     inten_df = pd.read_csv(QUERY_INTENCAO_CSV, encoding="utf-8")
     inten_df["INTENCAO"] = inten_df["INTENCAO"].astype(str).fillna("").str.strip()
     inten_df = inten_df[(inten_df["INTENCAO"] != "") & (inten_df["INTENCAO"].str.lower() != "nan")]
     docs_map = load_docs_enunciado_map_clean(DOC_CSV)
-    candidatos_df = pd.read_csv(CANDIDATOS_CSV, dtype={"QUERY_ID": int, "DOC_ID": str, "RERANK_SCORE": float, "RANK": int})
-    candidatos_df["DOC_ID_NUM"] = candidatos_df["DOC_ID"].apply(_extract_numeric_doc_id)
-    candidatos_df = candidatos_df.dropna(subset=["DOC_ID_NUM"]).astype({"DOC_ID_NUM": int})
+    candidatos_df = ler_execucao(CANDIDATOS_CSV)
+    # Top 20 candidatos por query, já ordenados por RANK
+    candidatos_por_query = {
+        qid: grupo.head(20)
+        for qid, grupo in candidatos_df.sort_values(["QUERY_ID", "RANK"], kind="stable").groupby("QUERY_ID", sort=False)
+    }
 
-    buscador = BuscadorHibridoLlamaIndex()
     if not buscador.embeddings_model:
         print("✗ Modelo de embeddings não carregado.")
         return
@@ -63,82 +92,205 @@ def main():
     else:
         query_ids = all_ids
 
-    all_rows: List[Dict] = []
-
-    for idx, qid in enumerate(query_ids, start=1):
+    def preparar(idx: int, qid: int, log: Callable[[str], None]) -> Optional[Dict]:
+        """Estado inicial da conversa de uma query (texto, intenção, candidatos e pares similares)."""
         qrow = queries_df[queries_df["ID"] == qid]
         if qrow.empty:
-            continue
+            return None
         qtext = str(qrow.iloc[0]["TEXT"])
         irow = inten_df[inten_df["ID"] == qid]
         intent_text = str(irow.iloc[0]["INTENCAO"]) if not irow.empty else ""
 
-        print(f"\n=== Query #{idx} (ID: {qid}) ===")
-        print(f"Texto: {qtext}")
+        log(f"\n=== Query #{idx} (ID: {qid}) ===")
+        log(f"Texto: {qtext}")
 
         # Top 20 candidatos para a query
-        cand_rows = candidatos_df[candidatos_df["QUERY_ID"] == qid].sort_values("RANK").head(20)
-        if cand_rows.empty:
-            print("(Sem candidatos)")
-            continue
+        cand_rows = candidatos_por_query.get(qid)
+        if cand_rows is None or cand_rows.empty:
+            log("(Sem candidatos)")
+            return None
 
-        # Monta resultados_busca para similaridade
-        resultados_busca = []
-        for drow in cand_rows.itertuples(index=False):
-            doc_id = int(drow.DOC_ID_NUM)
-            enun = docs_map.get(doc_id, "")
-            resultados_busca.append({"id": str(doc_id), "conteudo": enun, "score": 1.0, "metodo": "Candidato"})
-
-        conversa = qtext
+        estado = {
+            "QUERY_ID": qid,
+            "qtext": qtext,
+            "intent_text": intent_text,
+            "cand_rows": cand_rows,
+            "conversa": qtext,
+            "passos": [],
+            "falhas": 0,
+            "pares": [],
+            "especulacao": {"mantidas": 0, "descartadas": 0, "economia_s": 0.0},
+            "log": log,
+        }
         if args.modo == "pares":
-            print("Gerando pares similares (top 3, min sim 0.8)...")
+            # Monta resultados_busca para similaridade
+            resultados_busca = []
+            for drow in cand_rows.itertuples(index=False):
+                doc_id = int(drow.DOC_ID_NUM)
+                enun = docs_map.get(doc_id, "")
+                resultados_busca.append({"id": str(doc_id), "conteudo": enun, "score": 1.0, "metodo": "Candidato"})
+            log("Gerando pares similares (top 3, min sim 0.8)...")
             try:
-                pares_similares = buscador.calcular_similaridade_entre_pares(
+                estado["pares"] = buscador.calcular_similaridade_entre_pares(
                     resultados_busca=resultados_busca,
                     limite_similaridade=0.8,
                     top_k=3,
-                )
+                )[:3]
             except Exception as e:
-                print(f"✗ Falha ao calcular similaridade entre pares: {e}")
-                pares_similares = []
-            if pares_similares:
-                for pidx, par in enumerate(pares_similares[:3], start=1):
-                    try:
-                        perguntas = gerar_perguntas_clarificadoras_para_pares(
-                            pares_similares=[par],
-                            conversa=conversa,
-                            max_perguntas=1,
-                        )
-                    except Exception as e:
-                        print(f"✗ Erro ao gerar perguntas (passo {pidx}): {e}")
-                        continue
-                    pergunta = (perguntas[0].get("pergunta") if perguntas else "")
-                    print(f"\n[Passo {pidx}] Pergunta clarificadora: {pergunta}")
-                    try:
-                        resposta = responder_pergunta_clarificadora(intent_text, pergunta)
-                    except Exception as e:
-                        resposta = f"(Falha ao responder: {e})"
-                    print(f"Resposta: {resposta}")
-                    conversa = conversa + "\n\nPergunta clarificadora: " + pergunta + "\nResposta: " + resposta
-            else:
-                print("(Nenhum par com similaridade suficiente)")
+                log(f"✗ Falha ao calcular similaridade entre pares: {e}")
+                estado["falhas"] += 1
+            if not estado["pares"]:
+                log("(Nenhum par com similaridade suficiente)")
+        return estado
+
+    def responder(estado: Dict, pidx: int, pergunta: str) -> None:
+        """Responde a pergunta com a intenção da query e acrescenta o turno à conversa."""
+        log = estado["log"]
+        log(f"\n[Passo {pidx}] Pergunta clarificadora: {pergunta}")
+        try:
+            resposta = responder_pergunta_clarificadora(estado["intent_text"], pergunta)
+        except Exception as e:
+            resposta = f"(Falha ao responder: {e})"
+            estado["falhas"] += 1
+        log(f"Resposta: {resposta}")
+        estado["conversa"] = estado["conversa"] + "\n\nPergunta clarificadora: " + pergunta + "\nResposta: " + resposta
+        estado["passos"].append({"pergunta": pergunta, "resposta": resposta})
+
+    def finalizar(estado: Dict) -> Dict:
+        return {
+            "QUERY_ID": estado["QUERY_ID"],
+            "conversa": estado["conversa"],
+            "passos": estado["passos"],
+            "nodes": montar_nodes(estado["cand_rows"]),
+            # Conversas com falha (ex.: cota do Gemini) não entram no checkpoint e são refeitas no --resume
+            "completa": estado["falhas"] == 0,
+            "especulacao": estado["especulacao"],
+        }
+
+    def gerar_pergunta(conversa: str, par: Dict) -> str:
+        perguntas = gerar_perguntas_clarificadoras_para_pares(pares_similares=[par], conversa=conversa, max_perguntas=1)
+        return perguntas[0].get("pergunta") if perguntas else ""
+
+    def cronometrar(funcao: Callable, *a) -> Tuple[object, float]:
+        inicio = time.perf_counter()
+        return funcao(*a), time.perf_counter() - inicio
+
+    def turnos_especulativos(estado: Dict) -> None:
+        """Modo pares com pré-geração da próxima pergunta.
+
+        Enquanto o usuário responde ao passo i, a pergunta do passo i+1 é gerada com a
+        conversa prevista (RESPOSTA_PREVISTA, que confirma o interesse). Se a resposta real
+        também confirmar, a pergunta especulada é mantida e a economia é o tempo de geração
+        que deixou de ser esperado; caso contrário, é descartada e gerada de novo.
+        """
+        log = estado["log"]
+        esp = estado["especulacao"]
+        pares = estado["pares"]
+        proxima: Optional[str] = None
+        for pidx, par in enumerate(pares, start=1):
+            pergunta, proxima = proxima, None
+            if pergunta is None:
+                try:
+                    pergunta = gerar_pergunta(estado["conversa"], par)
+                except Exception as e:
+                    log(f"✗ Erro ao gerar perguntas (passo {pidx}): {e}")
+                    estado["falhas"] += 1
+                    continue
+
+            futuro = None
+            if pidx < len(pares):
+                prevista = estado["conversa"] + "\n\nPergunta clarificadora: " + pergunta + "\nResposta: " + RESPOSTA_PREVISTA
+                futuro = pool_especulativo.submit(cronometrar, gerar_pergunta, prevista, pares[pidx])
+
+            responder(estado, pidx, pergunta)
+            if futuro is None:
+                continue
+            fim_resposta = time.perf_counter()
+            if not resposta_confirma_interesse(estado["passos"][-1]["resposta"]):
+                # Previsão errada: se a geração ainda não começou, não gasta a chamada
+                futuro.cancel()
+                esp["descartadas"] += 1
+                log("(Pergunta especulada descartada: resposta não confirmou o interesse)")
+                continue
+            try:
+                proxima, duracao = futuro.result()
+            except Exception:
+                proxima = None
+                esp["descartadas"] += 1
+                continue
+            esp["mantidas"] += 1
+            esp["economia_s"] += max(0.0, duracao - (time.perf_counter() - fim_resposta))
+
+    @instrumentacao.instrumentar("chat.conversa")
+    def conversar(idx: int, qid: int, log: Callable[[str], None]) -> Optional[Dict]:
+        """Conversa clarificadora de uma query (chamadas ao LLM); o rerank fica para depois."""
+        estado = preparar(idx, qid, log)
+        if estado is None:
+            return None
+        if args.modo == "pares" and args.especulativo:
+            turnos_especulativos(estado)
+        elif args.modo == "pares":
+            for pidx, par in enumerate(estado["pares"], start=1):
+                try:
+                    perguntas = gerar_perguntas_clarificadoras_para_pares(
+                        pares_similares=[par],
+                        conversa=estado["conversa"],
+                        max_perguntas=1,
+                    )
+                except Exception as e:
+                    log(f"✗ Erro ao gerar perguntas (passo {pidx}): {e}")
+                    estado["falhas"] += 1
+                    continue
+                responder(estado, pidx, perguntas[0].get("pergunta") if perguntas else "")
         else:
             try:
-                perguntas = gerar_perguntas_sem_pares(pergunta=qtext, max_perguntas=3)
+                perguntas = gerar_perguntas_sem_pares(pergunta=estado["qtext"], max_perguntas=3)
             except Exception as e:
-                print(f"✗ Erro ao gerar perguntas sem pares: {e}")
+                log(f"✗ Erro ao gerar perguntas sem pares: {e}")
+                estado["falhas"] += 1
                 perguntas = []
             for pidx, item in enumerate(perguntas[:3], start=1):
-                pergunta = item.get("pergunta") or ""
-                print(f"\n[Passo {pidx}] Pergunta clarificadora: {pergunta}")
-                try:
-                    resposta = responder_pergunta_clarificadora(intent_text, pergunta)
-                except Exception as e:
-                    resposta = f"(Falha ao responder: {e})"
-                print(f"Resposta: {resposta}")
-                conversa = conversa + "\n\nPergunta clarificadora: " + pergunta + "\nResposta: " + resposta
+                responder(estado, pidx, item.get("pergunta") or "")
+        return finalizar(estado)
+
+    def conversar_em_lote(itens: List[Tuple[int, int]]) -> List[Tuple[Optional[Dict], List[str]]]:
+        """Conversas de várias queries em passos sincronizados (modo pares).
+
+        Em cada passo, as perguntas de todas as queries ainda ativas saem de uma única
+        requisição em lote; os turnos de cada query continuam em ordem.
+        """
+        logs_por_item = [[] for _ in itens]
+        estados = [preparar(idx, qid, logs.append) for (idx, qid), logs in zip(itens, logs_por_item)]
+        for pidx in range(1, 4):
+            ativos = [e for e in estados if e is not None and len(e["pares"]) >= pidx]
+            if not ativos:
+                break
+            perguntas = gerar_perguntas_clarificadoras_em_lote(
+                [{"conversa": e["conversa"], "par": e["pares"][pidx - 1]} for e in ativos],
+                tamanho_lote=args.lote,
+            )
+            for estado, pergunta in zip(ativos, perguntas):
+                if pergunta is None:
+                    estado["log"](f"✗ Erro ao gerar perguntas (passo {pidx})")
+                    estado["falhas"] += 1
+                    continue
+                responder(estado, pidx, pergunta.get("pergunta") or "")
+        return [
+            (finalizar(estado) if estado is not None else None, logs)
+            for estado, logs in zip(estados, logs_por_item)
+        ]
 
-        # Rerank dos 20 candidatos usando a conversa completa
+    def conversar_unidade(itens: List[Tuple[int, int]]) -> List[Tuple[Optional[Dict], List[str]]]:
+        if args.lote > 1 and args.modo == "pares":
+            return conversar_em_lote(itens)
+        resultados = []
+        for idx, qid in itens:
+            logs: List[str] = []
+            resultados.append((conversar(idx, qid, logs.append), logs))
+        return resultados
+
+    def montar_nodes(cand_rows: pd.DataFrame) -> List[TextNode]:
+        # Nós dos 20 candidatos para o rerank com a conversa completa
         nodes = []
         for drow in cand_rows.itertuples(index=False):
             doc_id = int(drow.DOC_ID_NUM)
@@ -149,21 +301,109 @@ def main():
                 metadata={"id": doc_id, "enunciado": enun, "titulo": enun[:100]},
             )
             nodes.append(node)
+        return nodes
 
-        try:
-            reranked = rerank_nodes(buscador.reranker_model, conversa, nodes, top_n=20)
-        except Exception as e:
-            print(f"✗ Erro no rerank: {e}")
-            reranked = []
-
+    def linhas_ranking(qid: int, reranked: List) -> List[Dict]:
+        rows = []
         for rank, item in enumerate(reranked, start=1):
             did = getattr(getattr(item, 'node', item), 'metadata', {}).get('id')
-            all_rows.append({
+            rows.append({
                 "QUERY_ID": qid,
                 "DOC_ID": did,
                 "RERANK_SCORE": getattr(item, 'score', None),
                 "RANK": rank,
             })
+        return rows
+
+    # Checkpoint por query concluída: conversa + ranking final
+    checkpoint = CheckpointJsonl(CHECKPOINT_PAIRS if args.modo == "pares" else CHECKPOINT_NO_PAIRS)
+    rows_por_query: Dict[int, List[Dict]] = {}
+    if args.resume:
+        concluidas = checkpoint.carregar()
+        for qid in query_ids:
+            registro = concluidas.get(int(qid))
+            if registro is not None:
+                rows_por_query[qid] = registro["ranking"]
+        print(f"Retomando: {len(rows_por_query)} queries já concluídas em {checkpoint.caminho}")
+    elif checkpoint.existe():
+        print(f"⚠ Checkpoint anterior descartado (use --resume para continuar): {checkpoint.caminho}")
+        checkpoint.reiniciar()
+
+    especulacao_total = {"conversas": 0, "mantidas": 0, "descartadas": 0, "economia_s": 0.0}
+
+    def concluir(conv: Dict, reranked: List) -> None:
+        for chave, valor in conv["especulacao"].items():
+            especulacao_total[chave] += valor
+        especulacao_total["conversas"] += 1
+        rows = linhas_ranking(conv["QUERY_ID"], reranked)
+        rows_por_query[conv["QUERY_ID"]] = rows
+        if rows and conv["completa"]:
+            checkpoint.registrar({
+                "QUERY_ID": int(conv["QUERY_ID"]),
+                "conversa": conv["conversa"],
+                "passos": conv["passos"],
+                "ranking": rows,
+            })
+
+    # Pré-geração especulativa (--especulativo) roda fora da thread da conversa
+    pool_especulativo = ThreadPoolExecutor(max_workers=max(1, args.workers))
+
+    pendentes = [(idx, qid) for idx, qid in enumerate(query_ids, start=1) if qid not in rows_por_query]
+
+    if args.workers <= 1 and args.lote <= 1:
+        for idx, qid in pendentes:
+            conv = conversar(idx, qid, logger.info)
+            if conv is None:
+                continue
+            try:
+                reranked = rerank_nodes(buscador.reranker_model, conv["conversa"], conv["nodes"], top_n=20)
+            except Exception as e:
+                logger.error("✗ Erro no rerank: %s", e, extra={"query_id": int(qid)})
+                reranked = []
+            concluir(conv, reranked)
+    else:
+        # Unidades de trabalho: uma query, ou `--lote` queries com perguntas geradas em lote.
+        # Unidades diferentes rodam em paralelo (o cliente Gemini compartilhado limita taxa e
+        # concorrência); os logs de cada query são impressos em bloco, na ordem original.
+        # O rerank é feito em lote a cada bloco de unidades, que então entra no checkpoint.
+        tamanho_unidade = args.lote if args.modo == "pares" else 1
+        unidades = [pendentes[i:i + max(1, tamanho_unidade)] for i in range(0, len(pendentes), max(1, tamanho_unidade))]
+        workers = max(1, args.workers)
+        tamanho_bloco = workers * 4
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for inicio in range(0, len(unidades), tamanho_bloco):
+                futuros = [pool.submit(conversar_unidade, u) for u in unidades[inicio:inicio + tamanho_bloco]]
+                conversas: List[Dict] = []
+                for futuro in futuros:
+                    for conv, logs in futuro.result():
+                        if logs:
+                            logger.info("\n".join(logs))
+                        if conv is not None:
+                            conversas.append(conv)
+
+                try:
+                    reranked_por_query = rerank_lote(
+                        buscador.reranker_model,
+                        [(conv["conversa"], conv["nodes"]) for conv in conversas],
+                        top_n=20,
+                    )
+                except Exception as e:
+                    logger.error("✗ Erro no rerank: %s", e, extra={"queries": len(conversas)})
+                    reranked_por_query = [[] for _ in conversas]
+                for conv, reranked in zip(conversas, reranked_por_query):
+                    concluir(conv, reranked)
+
+    pool_especulativo.shutdown(cancel_futures=True)
+    if args.especulativo and especulacao_total["conversas"]:
+        print(
+            f"\nEspeculação: {especulacao_total['mantidas']} perguntas mantidas, "
+            f"{especulacao_total['descartadas']} descartadas; economia de "
+            f"{especulacao_total['economia_s']:.1f}s "
+            f"({especulacao_total['economia_s'] / especulacao_total['conversas']:.2f}s por conversa)"
+        )
+
+    # Resultados retomados + novos, na ordem das queries
+    all_rows: List[Dict] = [row for qid in query_ids for row in rows_por_query.get(qid, [])]
 
     # Salva CSV consolidado
     os.makedirs(os.path.join(BASE_DIR, "dados"), exist_ok=True)
@@ -175,11 +415,15 @@ def main():
         out_df.to_csv(OUT_CSV_NO_PAIRS, index=False, encoding="utf-8")
         print(f"\nArquivo salvo: {OUT_CSV_NO_PAIRS} (linhas: {len(out_df)})")
 
+    cache_llm = obter_cliente_gemini().cache
+    if cache_llm is not None:
+        print(f"Cache LLM: {cache_llm.estatisticas()}")
+
     # Calcula métricas top-10
     if out_df.empty:
         print("\n(⚠ Sem linhas para métricas; rerank retornou vazio)")
     else:
-        qrels_df = load_qrels_df(os.path.join(DATA_DIR, "qrel.csv"))
+        qrels_df = ler_qrels(os.path.join(DATA_DIR, "qrel.csv"))
         pd_metricas = metricas(
             resultado_pesquisa=out_df,
             qrels=qrels_df,
@@ -0,0 +1,195 @@
+"""
+Compara várias execuções (CSVs de candidatos, runs TREC, .npy ou .parquet) contra o mesmo qrels.
+
+O qrels é carregado uma única vez e enviado a cada processo do pool; as execuções
+são avaliadas em paralelo com `metricas`. Para cada execução e métrica, a tabela
+traz a média, a diferença para a execução de referência (a primeira, ou --baseline)
+e os p-valores do teste t pareado e do teste de aleatorização, query a query.
+Só entram na comparação as queries presentes em todas as execuções; as demais são
+descartadas (com aviso) antes das médias, diferenças e p-valores.
+
+Saídas:
+- dados/comparacao_execucoes.csv: EXECUCAO, METRICA, MEDIA, DELTA, T, P_T, P_ALEATORIZACAO
+- dados/comparacao_execucoes_deltas.csv: diferença por query para a referência
+
+Execução:
+    python -m src.run_comparar_execucoes
+    python -m src.run_comparar_execucoes dados/candidatos_top20_full.csv dados/sweep/*.csv --k 5 10 --workers 4
+"""
+
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.append(BASE_DIR)
+
+from src.utils import instrumentacao
+from src.utils.execucoes import ler_execucao, ler_qrels
+from src.utils.metricas import metricas
+from src.utils.significancia import aleatorizacao_pareada, t_pareado
+
+DATA_DIR = os.path.join(BASE_DIR, "dados", "juris_tcu")
+QRELS_CSV = os.path.join(DATA_DIR, "qrel.csv")
+EXECUCOES_PADRAO = [
+    os.path.join(BASE_DIR, "dados", "candidatos_top20_full.csv"),
+    os.path.join(BASE_DIR, "dados", "candidatos_chat_top20.csv"),
+    os.path.join(BASE_DIR, "dados", "candidatos_chat_nodocs_top20.csv"),
+]
+OUT_CSV = os.path.join(BASE_DIR, "dados", "comparacao_execucoes.csv")
+OUT_DELTAS_CSV = os.path.join(BASE_DIR, "dados", "comparacao_execucoes_deltas.csv")
+
+# qrels do processo de avaliação (definido pelo initializer do pool)
+_QRELS: Optional[pd.DataFrame] = None
+
+
+def nome_execucao(caminho: str) -> str:
+    return os.path.splitext(os.path.basename(caminho))[0]
+
+
+def _iniciar_processo(qrels: pd.DataFrame) -> None:
+    global _QRELS
+    _QRELS = qrels
+
+
+def avaliar_execucao(caminho: str, k: List[int]) -> pd.DataFrame:
+    """Métricas por query de uma execução, contra o qrels do processo.
+
+    Só as queries que aparecem na execução: uma query ausente não vira métricas zeradas.
+    """
+    execucao = ler_execucao(caminho)
+    por_query = metricas(
+        resultado_pesquisa=execucao,
+        qrels=_QRELS,
+        col_resultado_query_key="QUERY_ID",
+        col_resultado_doc_key="DOC_ID_NUM",
+        col_resultado_rank="RANK",
+        col_qrels_query_key="QUERY_ID",
+        col_qrels_doc_key="DOC_ID",
+        col_qrels_score="SCORE",
+        k=k,
+        debug=False,
+        aproximacao_trec_eval=False,
+    )
+    presentes = por_query["QUERY_KEY"].isin(execucao["QUERY_ID"].unique())
+    return por_query[presentes].reset_index(drop=True)
+
+
+def avaliar_execucoes(
+    caminhos: List[str],
+    qrels: pd.DataFrame,
+    k: List[int],
+    workers: Optional[int] = None,
+) -> Dict[str, pd.DataFrame]:
+    """Avalia as execuções em processos paralelos; retorna {nome: métricas por query}."""
+    workers = max(1, min(workers or os.cpu_count() or 1, len(caminhos)))
+    if workers == 1:
+        _iniciar_processo(qrels)
+        return {nome_execucao(c): avaliar_execucao(c, k) for c in caminhos}
+    with ProcessPoolExecutor(max_workers=workers, initializer=_iniciar_processo, initargs=(qrels,)) as pool:
+        futuros = {nome_execucao(c): pool.submit(avaliar_execucao, c, k) for c in caminhos}
+        return {nome: f.result() for nome, f in futuros.items()}
+
+
+def restringir_queries_comuns(por_execucao: Dict[str, pd.DataFrame], referencia: str) -> Dict[str, pd.DataFrame]:
+    """Restringe cada execução às queries presentes em todas, na ordem da `referencia`.
+
+    Informa quantas queries foram descartadas de cada execução.
+    """
+    comuns = set.intersection(*(set(df["QUERY_KEY"]) for df in por_execucao.values()))
+    for nome, df in por_execucao.items():
+        descartadas = len(df) - int(df["QUERY_KEY"].isin(comuns).sum())
+        if descartadas:
+            print(f"⚠ {nome}: {descartadas} queries descartadas (ausentes em outras execuções)")
+    ordem = por_execucao[referencia]["QUERY_KEY"]
+    ordem = ordem[ordem.isin(comuns)]
+    return {nome: df.set_index("QUERY_KEY").loc[ordem].reset_index() for nome, df in por_execucao.items()}
+
+
+def comparar(
+    por_execucao: Dict[str, pd.DataFrame],
+    referencia: str,
+    n_permutacoes: int = 10000,
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Tabela comparativa e diferenças por query de cada execução para a `referencia`.
+
+    As execuções são antes restritas às queries presentes em todas elas
+    (`restringir_queries_comuns`).
+    """
+    por_execucao = restringir_queries_comuns(por_execucao, referencia)
+    base = por_execucao[referencia]
+    colunas = [c for c in base.columns if c != "QUERY_KEY"]
+    linhas, deltas = [], []
+    for nome, df in por_execucao.items():
+        if nome != referencia:
+            delta = df[colunas] - base[colunas]
+            delta.insert(0, "EXECUCAO", nome)
+            delta.insert(0, "QUERY_KEY", df["QUERY_KEY"])
+            deltas.append(delta)
+        for coluna in colunas:
+            linha = {"EXECUCAO": nome, "METRICA": coluna, "MEDIA": df[coluna].mean()}
+            if nome != referencia:
+                t, p_t = t_pareado(df[coluna], base[coluna])
+                linha.update({
+                    "DELTA": df[coluna].mean() - base[coluna].mean(),
+                    "T": t,
+                    "P_T": p_t,
+                    "P_ALEATORIZACAO": aleatorizacao_pareada(df[coluna], base[coluna], n_permutacoes),
+                })
+            linhas.append(linha)
+    tabela = pd.DataFrame(linhas, columns=["EXECUCAO", "METRICA", "MEDIA", "DELTA", "T", "P_T", "P_ALEATORIZACAO"])
+    deltas_df = pd.concat(deltas, ignore_index=True) if deltas else pd.DataFrame(columns=["QUERY_KEY", "EXECUCAO", *colunas])
+    return tabela, deltas_df
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara execuções com testes de significância pareados")
+    parser.add_argument("execucoes", nargs="*", default=EXECUCOES_PADRAO, help="Execuções (CSV de candidatos, TREC, .npy ou .parquet)")
+    parser.add_argument("--qrels", default=QRELS_CSV)
+    parser.add_argument("--k", type=int, nargs="+", default=[10])
+    parser.add_argument("--baseline", default=None, help="Execução de referência (padrão: a primeira)")
+    parser.add_argument("--workers", type=int, default=None, help="Processos de avaliação (padrão: núcleos)")
+    parser.add_argument("--permutacoes", type=int, default=10000, help="Permutações do teste de aleatorização")
+    parser.add_argument("--saida", default=OUT_CSV)
+    parser.add_argument("--saida-deltas", default=OUT_DELTAS_CSV)
+    parser.add_argument("--trace", default=None, help="Grava o trace (Chrome trace JSON) das etapas e imprime o resumo de tempos")
+    args = parser.parse_args()
+    instrumentacao.configurar(args.trace)
+
+    faltando = [c for c in [args.qrels, *args.execucoes] if not os.path.exists(c)]
+    if faltando:
+        print("Arquivos necessários não encontrados.")
+        for caminho in faltando:
+            print(f"  {caminho}")
+        return
+
+    nomes = [nome_execucao(c) for c in args.execucoes]
+    if len(set(nomes)) != len(nomes):
+        print("✗ Execuções com o mesmo nome de arquivo; renomeie para distinguir na tabela.")
+        return
+    referencia = nome_execucao(args.baseline) if args.baseline else nomes[0]
+    if referencia not in nomes:
+        print(f"✗ Referência {referencia} não está entre as execuções.")
+        return
+
+    qrels_df = ler_qrels(args.qrels)
+    por_execucao = restringir_queries_comuns(avaliar_execucoes(args.execucoes, qrels_df, args.k, args.workers), referencia)
+    tabela, deltas = comparar(por_execucao, referencia, args.permutacoes)
+
+    for caminho, df in ((args.saida, tabela), (args.saida_deltas, deltas)):
+        os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+        df.to_csv(caminho, index=False, encoding="utf-8")
+
+    print(f"\n=== Comparação com {referencia} ({len(por_execucao[referencia])} queries) ===\n")
+    print(tabela.to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+    print(f"\nTabela salva em: {args.saida}")
+    print(f"Diferenças por query salvas em: {args.saida_deltas}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Varredura de k1/b do BM25 e da fusão híbrida, com leaderboard de nDCG@10 no qrels.
+
+O corpus é tokenizado uma vez (IndiceBM25) e os scores densos consulta x documento são
+calculados uma vez e guardados em storage/varredura_scores_densos.npz; depois disso,
+cada configuração custa apenas a pontuação BM25 e a fusão. Ver src/varredura.py.
+
+Execução:
+    python -m src.run_varredura
+    python -m src.run_varredura --k1 0.9 1.2 1.5 --b 0.5 0.75 --pesos 0.3 0.5 0.7 --rrf-k 20 60 --workers 4
+    python -m src.run_varredura --sem-densos   # apenas BM25 (sem carregar o modelo de embeddings)
+
+Saída: dados/varredura_bm25_fusao.csv (uma linha por configuração, ordenada por nDCG@10).
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.append(BASE_DIR)
+
+from src.utils.corpus import carregar_corpus
+from src.utils.dados import load_queries_df
+from src.utils import instrumentacao
+from src.utils.execucoes import ler_qrels
+from src.utils.preprocessamento import PreprocessadorTexto
+from src.varredura import (
+    IndiceBM25,
+    assinatura_scores_densos,
+    calcular_scores_densos,
+    carregar_scores_densos,
+    executar_varredura,
+    grade_configuracoes,
+)
+
+DATA_DIR = os.path.join(BASE_DIR, "dados", "juris_tcu")
+DOC_CSV = os.path.join(DATA_DIR, "doc.csv")
+QUERY_CSV = os.path.join(DATA_DIR, "query.csv")
+QRELS_CSV = os.path.join(DATA_DIR, "qrel.csv")
+SCORES_DENSOS_NPZ = os.path.join(BASE_DIR, "storage", "varredura_scores_densos.npz")
+OUT_CSV = os.path.join(BASE_DIR, "dados", "varredura_bm25_fusao.csv")
+
+
+def _scores_densos(textos_docs, textos_consultas, nome_modelo):
+    from src.similaridade import carregar_modelo_embeddings
+
+    handle = carregar_modelo_embeddings(nome_modelo)
+    try:
+        modelo = handle.modelo
+        with handle.lock_inferencia:
+            embeddings_docs = modelo.get_text_embedding_batch(textos_docs, show_progress=True)
+            embeddings_consultas = [modelo.get_query_embedding(t) for t in textos_consultas]
+    finally:
+        handle.liberar()
+    return calcular_scores_densos(np.asarray(embeddings_docs), np.asarray(embeddings_consultas))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Varredura de BM25 (k1, b) e fusão híbrida")
+    parser.add_argument("--k1", type=float, nargs="+", default=[0.6, 0.9, 1.2, 1.5, 1.8, 2.1])
+    parser.add_argument("--b", type=float, nargs="+", default=[0.3, 0.5, 0.75, 0.9])
+    parser.add_argument("--fusoes", nargs="+", default=["rrf", "combinacao"], choices=["rrf", "combinacao", "bm25"])
+    parser.add_argument("--pesos", type=float, nargs="+", default=[0.3, 0.5, 0.7], help="Peso do BM25 na fusão")
+    parser.add_argument("--rrf-k", type=float, nargs="+", default=[20.0, 60.0])
+    parser.add_argument("--top-k", type=int, nargs="+", default=[20, 50, 100], help="Top-k de cada retriever no RRF")
+    parser.add_argument("--sem-densos", action="store_true", help="Avalia apenas BM25")
+    parser.add_argument("--workers", type=int, default=None, help="Processos de avaliação (padrão: núcleos)")
+    parser.add_argument("--saida", default=OUT_CSV)
+    parser.add_argument("--trace", default=None, help="Grava o trace (Chrome trace JSON) das etapas e imprime o resumo de tempos")
+    args = parser.parse_args()
+    instrumentacao.configurar(args.trace)
+
+    if not all(os.path.exists(c) for c in (DOC_CSV, QUERY_CSV, QRELS_CSV)):
+        print("Arquivos necessários não encontrados.")
+        return
+
+    preproc = PreprocessadorTexto()
+    inicio = time.perf_counter()
+    with instrumentacao.span("io.carregar_documentos"):
+        # Ids e enunciados já limpos saem do corpus em colunas; linhas sem id numérico ficam de fora
+        corpus = carregar_corpus(DOC_CSV)
+        validos = np.flatnonzero(corpus.ids >= 0)
+        doc_ids = np.asarray(corpus.ids[validos])
+        enunciados_limpos = list(corpus.coluna("enunciado_limpo"))
+        textos_docs = [enunciados_limpos[i] for i in validos.tolist()]
+    with instrumentacao.span("varredura.tokenizacao", documentos=len(doc_ids)):
+        corpus_tokenizado = [preproc.tokenizador_pt(t) for t in textos_docs]
+    with instrumentacao.span("varredura.indice_bm25"):
+        indice = IndiceBM25(corpus_tokenizado)
+
+    qrels_df = ler_qrels(QRELS_CSV)
+    queries_df = load_queries_df(QUERY_CSV)
+    queries_df = queries_df[queries_df["ID"].isin(qrels_df["QUERY_ID"])]
+    textos_consultas = queries_df["TEXT"].astype(str).tolist()
+    consultas_tokenizadas = [preproc.tokenizador_pt(t) for t in textos_consultas]
+    print(f"✓ Índice BM25: {indice.n_docs} documentos, {len(indice.vocabulario)} termos, "
+          f"{len(textos_consultas)} consultas ({time.perf_counter() - inicio:.1f}s)")
+
+    scores_densos = None
+    if not args.sem_densos:
+        from src.similaridade import MODELO_EMBEDDINGS
+
+        scores_densos = carregar_scores_densos(
+            SCORES_DENSOS_NPZ, queries_df["ID"].to_numpy(), doc_ids,
+            lambda: _scores_densos(textos_docs, textos_consultas, MODELO_EMBEDDINGS),
+            assinatura=assinatura_scores_densos(MODELO_EMBEDDINGS, textos_docs, textos_consultas),
+        )
+
+    configuracoes = grade_configuracoes(
+        args.k1, args.b, args.fusoes, args.pesos, args.rrf_k, args.top_k, com_densos=scores_densos is not None,
+    )
+    print(f"Avaliando {len(configuracoes)} configurações...")
+    inicio = time.perf_counter()
+    leaderboard = executar_varredura(
+        indice, consultas_tokenizadas, queries_df["ID"].to_numpy(), doc_ids,
+        qrels_df, configuracoes, scores_densos=scores_densos, k=[10], workers=args.workers,
+    )
+    print(f"✓ Varredura concluída em {time.perf_counter() - inicio:.1f}s")
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.saida)), exist_ok=True)
+    leaderboard.to_csv(args.saida, index=False, encoding="utf-8")
+    print(leaderboard.head(15).to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+    print(f"\nLeaderboard salvo em: {args.saida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,42 @@
+import os
 from typing import List, Dict, Optional
 import itertools
 import numpy as np
 
+from dotenv import load_dotenv
+
+from src.utils.instrumentacao import span
+from src.utils.modelos import HandleModelo, lock_inferencia, obter_registro
+
+load_dotenv()
+
+# EMBEDDINGS_MODEL_NAME permite trocar por um modelo menor (ex.: benchmarks em CPU)
+MODELO_EMBEDDINGS = os.getenv("EMBEDDINGS_MODEL_NAME", "stjiris/bert-large-portuguese-cased-legal-mlm-sts-v1.0")
+
+
+def carregar_modelo_embeddings(
+    nome: str = MODELO_EMBEDDINGS,
+    device: Optional[str] = None,
+    dtype: Optional[str] = None,
+) -> HandleModelo:
+    """
+    Obtém o modelo de embeddings pelo registro de modelos do processo
+    (uma cópia por nome/device/dtype).
+
+    O chamador deve chamar `handle.liberar()` quando não precisar mais do modelo.
+    """
+    def _carregar():
+        from llama_index.embeddings.huggingface import HuggingFaceEmbedding
+        kwargs = {"model_kwargs": {"torch_dtype": dtype}} if dtype else {}
+        return HuggingFaceEmbedding(
+            model_name=nome,
+            trust_remote_code=True,
+            device=device,
+            **kwargs,
+        )
+
+    return obter_registro().obter(nome, _carregar, device=device, dtype=dtype)
+
 
 def _texto_do_resultado(item: Dict) -> str:
     """
@@ -39,7 +74,8 @@ def calcular_similaridade_entre_pares(
     # 1. Gerar embeddings para todos os documentos nos resultados
     textos = [_texto_do_resultado(resultado) for resultado in resultados_busca]
     try:
-        embeddings = embeddings_model.get_text_embedding_batch(textos, show_progress=False)
+        with span("similaridade.embeddings", textos=len(textos)), lock_inferencia(embeddings_model):
+            embeddings = embeddings_model.get_text_embedding_batch(textos, show_progress=False)
     except Exception as e:
         print(f"Erro ao gerar embeddings em lote: {e}")
         return None
@@ -50,23 +86,24 @@ def calcular_similaridade_entre_pares(
     pares_similares = []
 
     # 3. Calcular a similaridade de cosseno para cada par
-    for i, j in pares_indices:
-        embedding_i = np.array(embeddings[i]).reshape(1, -1)
-        embedding_j = np.array(embeddings[j]).reshape(1, -1)
-
-        # Normalizar os vetores para cálculo de similaridade de cosseno
-        embedding_i_norm = embedding_i / np.linalg.norm(embedding_i)
-        embedding_j_norm = embedding_j / np.linalg.norm(embedding_j)
-
-        similaridade = np.dot(embedding_i_norm, embedding_j_norm.T).item()
-
-        if similaridade > limite_similaridade:
-            par = {
-                "documento_1": resultados_busca[i],
-                "documento_2": resultados_busca[j],
-                "similaridade": similaridade
-            }
-            pares_similares.append(par)
+    with span("similaridade.pares", pares=len(pares_indices)):
+        for i, j in pares_indices:
+            embedding_i = np.array(embeddings[i]).reshape(1, -1)
+            embedding_j = np.array(embeddings[j]).reshape(1, -1)
+
+            # Normalizar os vetores para cálculo de similaridade de cosseno
+            embedding_i_norm = embedding_i / np.linalg.norm(embedding_i)
+            embedding_j_norm = embedding_j / np.linalg.norm(embedding_j)
+
+            similaridade = np.dot(embedding_i_norm, embedding_j_norm.T).item()
+
+            if similaridade > limite_similaridade:
+                par = {
+                    "documento_1": resultados_busca[i],
+                    "documento_2": resultados_busca[j],
+                    "similaridade": similaridade
+                }
+                pares_similares.append(par)
 
     # 4. Se nenhum par atendeu ao limite, retornar None
     if not pares_similares:
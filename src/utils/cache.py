@@ -0,0 +1,251 @@
+"""
+Caches em memória usados pelo buscador híbrido.
+
+Inclui:
+- normalizar_consulta(texto): normalização usada como chave das consultas
+- CacheEmbeddingsConsulta: LRU limitado de embeddings de consulta, com persistência opcional em disco
+- CacheResultados: cache LRU com TTL para resultados completos, com single-flight por chave
+"""
+
+import json
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+
+def normalizar_consulta(texto: str) -> str:
+    """Normaliza a consulta para uso como chave: NFC, espaços colapsados e bordas removidas.
+
+    Não altera caixa nem acentuação, pois o modelo de embeddings é sensível a ambos.
+    """
+    if not texto:
+        return ""
+    texto = unicodedata.normalize("NFC", str(texto))
+    return re.sub(r"\s+", " ", texto).strip()
+
+
+class CacheEmbeddingsConsulta:
+    """LRU limitado de embeddings de consulta, seguro para uso entre threads.
+
+    Args:
+        capacidade: Número máximo de consultas mantidas em memória.
+        caminho: Arquivo JSON opcional para persistir o cache entre execuções.
+        modelo: Nome do modelo de embeddings; gravado no arquivo, que é descartado
+            ao ser carregado com outro modelo (vetores de outro espaço/dimensão).
+    """
+
+    def __init__(self, capacidade: int = 1024, caminho: Optional[str] = None, modelo: Optional[str] = None):
+        self.capacidade = max(1, int(capacidade))
+        self.caminho = caminho
+        self.modelo = modelo
+        self.hits = 0
+        self.misses = 0
+        self._dados: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        if caminho and os.path.exists(caminho):
+            self.carregar(caminho)
+
+    def __len__(self) -> int:
+        return len(self._dados)
+
+    def obter(self, consulta: str, gerar: Callable[[str], List[float]]) -> List[float]:
+        """Retorna o embedding da consulta, gerando-o com `gerar` em caso de miss.
+
+        `gerar` recebe a consulta normalizada.
+        """
+        chave = normalizar_consulta(consulta)
+        with self._lock:
+            embedding = self._dados.get(chave)
+            if embedding is not None:
+                self._dados.move_to_end(chave)
+                self.hits += 1
+                return embedding
+            self.misses += 1
+
+        embedding = list(gerar(chave))
+
+        with self._lock:
+            self._dados[chave] = embedding
+            self._dados.move_to_end(chave)
+            while len(self._dados) > self.capacidade:
+                self._dados.popitem(last=False)
+        return embedding
+
+    def limpar(self) -> None:
+        """Esvazia o cache e zera os contadores."""
+        with self._lock:
+            self._dados.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def estatisticas(self) -> Dict[str, float]:
+        """Retorna tamanho, capacidade, hits, misses e taxa de acerto."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "tamanho": len(self._dados),
+                "capacidade": self.capacidade,
+                "hits": self.hits,
+                "misses": self.misses,
+                "taxa_acerto": (self.hits / total) if total else 0.0,
+            }
+
+    def salvar(self, caminho: Optional[str] = None) -> None:
+        """Persiste o cache em JSON (modelo + entradas, ordem LRU preservada)."""
+        caminho = caminho or self.caminho
+        if not caminho:
+            return
+        with self._lock:
+            itens = list(self._dados.items())
+        diretorio = os.path.dirname(caminho)
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+        tmp = caminho + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"modelo": self.modelo, "itens": itens}, f)
+        os.replace(tmp, caminho)
+
+    def carregar(self, caminho: Optional[str] = None) -> None:
+        """Carrega entradas de um JSON salvo por `salvar`, respeitando a capacidade.
+
+        Arquivos de outro modelo (ou do formato antigo, sem modelo) são ignorados.
+        """
+        caminho = caminho or self.caminho
+        if not caminho or not os.path.exists(caminho):
+            return
+        try:
+            with open(caminho, "r", encoding="utf-8") as f:
+                dados = json.load(f)
+        except Exception as e:
+            print(f"⚠ Cache de embeddings ignorado ({caminho}): {e}")
+            return
+        modelo = dados.get("modelo") if isinstance(dados, dict) else "(desconhecido)"
+        if modelo != self.modelo:
+            print(f"⚠ Cache de embeddings ignorado ({caminho}): gerado com o modelo {modelo}, atual {self.modelo}")
+            return
+        itens = dados["itens"]
+        with self._lock:
+            for chave, embedding in itens:
+                self._dados[chave] = embedding
+                self._dados.move_to_end(chave)
+            while len(self._dados) > self.capacidade:
+                self._dados.popitem(last=False)
+
+
+class _Voo:
+    """Cálculo em andamento para uma chave; os demais chamadores aguardam o evento."""
+
+    __slots__ = ("evento", "resultado", "erro")
+
+    def __init__(self):
+        self.evento = threading.Event()
+        self.resultado = None
+        self.erro: Optional[BaseException] = None
+
+
+class CacheResultados:
+    """Cache LRU com expiração por TTL e colapso de requisições concorrentes (single-flight).
+
+    Chamadas simultâneas com a mesma chave executam `calcular` uma única vez;
+    as demais aguardam e recebem o mesmo resultado (ou a mesma exceção).
+    Resultados `None` não são armazenados.
+
+    Args:
+        capacidade: Número máximo de entradas mantidas.
+        ttl_segundos: Tempo de vida de cada entrada; None desativa a expiração.
+        relogio: Função de tempo monotônico (injetável para testes).
+    """
+
+    def __init__(
+        self,
+        capacidade: int = 256,
+        ttl_segundos: Optional[float] = 600.0,
+        relogio: Callable[[], float] = time.monotonic,
+    ):
+        self.capacidade = max(1, int(capacidade))
+        self.ttl_segundos = ttl_segundos
+        self._relogio = relogio
+        self._dados: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._em_andamento: Dict[Hashable, _Voo] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.colapsadas = 0
+        self.expiradas = 0
+
+    def __len__(self) -> int:
+        return len(self._dados)
+
+    def _buscar(self, chave: Hashable) -> Tuple[bool, Any]:
+        """Busca sem travar; deve ser chamada com o lock adquirido."""
+        item = self._dados.get(chave)
+        if item is None:
+            return False, None
+        criado_em, valor = item
+        if self.ttl_segundos is not None and self._relogio() - criado_em > self.ttl_segundos:
+            del self._dados[chave]
+            self.expiradas += 1
+            return False, None
+        self._dados.move_to_end(chave)
+        return True, valor
+
+    def obter_ou_calcular(self, chave: Hashable, calcular: Callable[[], Any]) -> Any:
+        """Retorna o valor em cache para `chave` ou o calcula uma única vez entre threads."""
+        with self._lock:
+            encontrado, valor = self._buscar(chave)
+            if encontrado:
+                self.hits += 1
+                return valor
+            voo = self._em_andamento.get(chave)
+            lider = voo is None
+            if lider:
+                voo = _Voo()
+                self._em_andamento[chave] = voo
+                self.misses += 1
+            else:
+                self.colapsadas += 1
+
+        if not lider:
+            voo.evento.wait()
+            if voo.erro is not None:
+                raise voo.erro
+            return voo.resultado
+
+        try:
+            voo.resultado = calcular()
+        except BaseException as e:
+            voo.erro = e
+            raise
+        finally:
+            with self._lock:
+                if voo.erro is None and voo.resultado is not None:
+                    self._dados[chave] = (self._relogio(), voo.resultado)
+                    self._dados.move_to_end(chave)
+                    while len(self._dados) > self.capacidade:
+                        self._dados.popitem(last=False)
+                del self._em_andamento[chave]
+            voo.evento.set()
+        return voo.resultado
+
+    def limpar(self) -> None:
+        """Remove todas as entradas (cálculos em andamento não são afetados)."""
+        with self._lock:
+            self._dados.clear()
+
+    def estatisticas(self) -> Dict[str, float]:
+        """Retorna tamanho, hits, misses, requisições colapsadas e entradas expiradas."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "tamanho": len(self._dados),
+                "capacidade": self.capacidade,
+                "hits": self.hits,
+                "misses": self.misses,
+                "colapsadas": self.colapsadas,
+                "expiradas": self.expiradas,
+                "taxa_acerto": (self.hits / total) if total else 0.0,
+            }
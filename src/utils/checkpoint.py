@@ -0,0 +1,86 @@
+"""
+Checkpoint incremental em JSONL (append-only) para pipelines longos por query.
+
+Cada registro concluído vira uma linha JSON gravada e sincronizada em disco
+imediatamente; uma execução interrompida perde no máximo o registro em andamento.
+
+Inclui:
+- CheckpointJsonl: registrar(registro) thread-safe e carregar() -> {chave: registro}
+"""
+
+import json
+import os
+import threading
+from typing import Any, Dict
+
+
+class CheckpointJsonl:
+    """Arquivo JSONL de registros concluídos, indexados pelo campo `campo_chave`.
+
+    Args:
+        caminho: Arquivo JSONL do checkpoint.
+        campo_chave: Campo que identifica o registro (ex.: "QUERY_ID").
+    """
+
+    def __init__(self, caminho: str, campo_chave: str = "QUERY_ID"):
+        self.caminho = caminho
+        self.campo_chave = campo_chave
+        self._lock = threading.Lock()
+
+    def existe(self) -> bool:
+        return os.path.exists(self.caminho) and os.path.getsize(self.caminho) > 0
+
+    def carregar(self) -> Dict[Any, Dict[str, Any]]:
+        """Registros já concluídos; em chaves repetidas vale o último.
+
+        Uma última linha truncada (interrupção no meio da escrita) é ignorada.
+        """
+        registros: Dict[Any, Dict[str, Any]] = {}
+        if not os.path.exists(self.caminho):
+            return registros
+        with open(self.caminho, "r", encoding="utf-8") as f:
+            for num, linha in enumerate(f, start=1):
+                linha = linha.strip()
+                if not linha:
+                    continue
+                try:
+                    registro = json.loads(linha)
+                except json.JSONDecodeError:
+                    print(f"⚠ Checkpoint: linha {num} inválida ignorada ({self.caminho})")
+                    continue
+                registros[registro.get(self.campo_chave)] = registro
+        return registros
+
+    def registrar(self, registro: Dict[str, Any]) -> None:
+        """Acrescenta um registro concluído e força a gravação em disco."""
+        linha = json.dumps(registro, ensure_ascii=False, default=_json_padrao)
+        with self._lock:
+            diretorio = os.path.dirname(self.caminho)
+            if diretorio:
+                os.makedirs(diretorio, exist_ok=True)
+            with open(self.caminho, "a", encoding="utf-8") as f:
+                if f.tell() > 0 and not _termina_com_quebra(self.caminho):
+                    # Linha truncada por uma interrupção anterior: não colar o novo registro nela
+                    f.write("\n")
+                f.write(linha + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    def reiniciar(self) -> None:
+        """Descarta os registros existentes."""
+        with self._lock:
+            if os.path.exists(self.caminho):
+                os.remove(self.caminho)
+
+
+def _termina_com_quebra(caminho: str) -> bool:
+    with open(caminho, "rb") as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b"\n"
+
+
+def _json_padrao(valor: Any) -> Any:
+    """Converte escalares numpy (int64, float32...) para tipos nativos."""
+    if hasattr(valor, "item"):
+        return valor.item()
+    raise TypeError(f"Tipo não serializável em JSON: {type(valor).__name__}")
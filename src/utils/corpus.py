@@ -0,0 +1,218 @@
+"""
+Corpus do jurisTCU (doc.csv) pré-processado em colunas NumPy e lido por mmap.
+
+O CSV é lido e limpo uma única vez: ids numéricos extraídos de KEY e ENUNCIADO
+normalizado (`PreprocessadorTexto.normalizar_textos`: sem HTML, entidades decodificadas,
+espaços colapsados) ficam gravados em um diretório ao lado dele (`doc.colunas/`, ou dentro de
+CORPUS_CACHE_DIR). Os pontos de entrada (`carregar_dados_juris_tcu`,
+`load_docs_enunciado_map_clean`, `run_varredura`, `utils/preview_random_queries.py`) reabrem esse
+diretório por mmap: carregar o corpus passa a ser abrir alguns arquivos .npy, e
+processos diferentes compartilham as mesmas páginas em memória (cache de páginas do SO).
+
+Formato do diretório:
+- ids.npy: int64, número ao final de KEY (-1 se não houver)
+- <coluna>.npy + <coluna>.offsets.npy: textos UTF-8 concatenados (uint8) e offsets
+  int64 (n + 1), para as colunas chave, enunciado, enunciado_limpo e excerto
+- meta.json: versão do formato e tamanho/mtime do CSV de origem; se o CSV mudar,
+  o diretório é reconstruído no próximo carregamento
+
+Inclui:
+- carregar_corpus(caminho_csv): abre (ou constrói) o corpus; uma instância por CSV no processo
+- construir_corpus(caminho_csv, diretorio): lê e limpa o CSV e grava as colunas
+- CorpusColunar: ids, colunas de texto, documentos(limite), mapa_enunciados_limpos(), enunciado_limpo(doc_id)
+"""
+
+import json
+import os
+import shutil
+import threading
+import time
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.documento import DocumentoJuris
+from src.utils.execucoes import extrair_doc_id_numerico
+from src.utils.instrumentacao import instrumentar
+from src.utils.preprocessamento import PreprocessadorTexto
+
+VERSAO_FORMATO = 5
+COLUNAS_TEXTO = ("chave", "enunciado", "enunciado_limpo", "excerto")
+
+_CORPORA: Dict[str, "CorpusColunar"] = {}
+_LOCK_CORPORA = threading.Lock()
+
+
+class ColunaTexto:
+    """Textos UTF-8 concatenados + offsets; cada acesso decodifica só o trecho pedido."""
+
+    __slots__ = ("dados", "offsets")
+
+    def __init__(self, dados: np.ndarray, offsets: np.ndarray):
+        self.dados = dados
+        self.offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        return self.dados[self.offsets[i]:self.offsets[i + 1]].tobytes().decode("utf-8")
+
+    def __iter__(self) -> Iterator[str]:
+        dados = self.dados.tobytes()
+        offsets = self.offsets.tolist()
+        for ini, fim in zip(offsets, offsets[1:]):
+            yield dados[ini:fim].decode("utf-8")
+
+
+class CorpusColunar:
+    """Corpus aberto por mmap a partir do diretório gravado por `construir_corpus`."""
+
+    def __init__(self, diretorio: str):
+        self.diretorio = diretorio
+        self.ids: np.ndarray = np.load(os.path.join(diretorio, "ids.npy"), mmap_mode="r")
+        self.colunas: Dict[str, ColunaTexto] = {
+            nome: ColunaTexto(
+                np.load(os.path.join(diretorio, f"{nome}.npy"), mmap_mode="r"),
+                np.load(os.path.join(diretorio, f"{nome}.offsets.npy"), mmap_mode="r"),
+            )
+            for nome in COLUNAS_TEXTO
+        }
+        # Ordenação estável dos ids, montada na primeira busca por id
+        self._ordem: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def coluna(self, nome: str) -> ColunaTexto:
+        return self.colunas[nome]
+
+    def documentos(self, limite: Optional[int] = None) -> List[DocumentoJuris]:
+        """Documentos na ordem do CSV (id = KEY original, enunciado com HTML, como no CSV)."""
+        n = min(limite, len(self)) if limite else len(self)
+        colunas = [iter(self.colunas[nome]) for nome in ("chave", "enunciado", "excerto")]
+        return [DocumentoJuris(id=chave, enunciado=enunciado, excerto=excerto)
+                for chave, enunciado, excerto, _ in zip(*colunas, range(n))]
+
+    def mapa_enunciados_limpos(self) -> Dict[int, str]:
+        """DOC_ID numérico -> ENUNCIADO normalizado (ids repetidos: vale a última linha)."""
+        return {doc_id: texto for doc_id, texto in zip(self.ids.tolist(), self.colunas["enunciado_limpo"]) if doc_id >= 0}
+
+    def posicao(self, doc_id: int) -> Optional[int]:
+        """Linha do documento pelo DOC_ID numérico (última ocorrência), ou None."""
+        if self._ordem is None:
+            self._ordem = np.argsort(self.ids, kind="stable")
+        ordenados = self.ids[self._ordem]
+        i = int(np.searchsorted(ordenados, doc_id, side="right")) - 1
+        if i < 0 or ordenados[i] != doc_id or doc_id < 0:
+            return None
+        return int(self._ordem[i])
+
+    def enunciado_limpo(self, doc_id: int) -> Optional[str]:
+        posicao = self.posicao(doc_id)
+        return None if posicao is None else self.colunas["enunciado_limpo"][posicao]
+
+
+def diretorio_corpus(caminho_csv: str) -> str:
+    """Diretório das colunas de um CSV: ao lado dele, ou em CORPUS_CACHE_DIR."""
+    base = os.getenv("CORPUS_CACHE_DIR")
+    nome = os.path.splitext(os.path.basename(caminho_csv))[0] + ".colunas"
+    return os.path.join(base, nome) if base else os.path.join(os.path.dirname(os.path.abspath(caminho_csv)), nome)
+
+
+def _assinatura(caminho_csv: str) -> Dict[str, int]:
+    info = os.stat(caminho_csv)
+    return {"versao": VERSAO_FORMATO, "origem_bytes": info.st_size, "origem_mtime_ns": info.st_mtime_ns}
+
+
+def _valido(diretorio: str, caminho_csv: str) -> bool:
+    try:
+        with open(os.path.join(diretorio, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return False
+    if not os.path.exists(caminho_csv):
+        # Sem o CSV (ex.: só as colunas foram copiadas), vale o que estiver gravado
+        return meta.get("versao") == VERSAO_FORMATO
+    return all(meta.get(chave) == valor for chave, valor in _assinatura(caminho_csv).items())
+
+
+def _gravar_coluna(diretorio: str, nome: str, textos: List[str]) -> None:
+    codificados = [texto.encode("utf-8") for texto in textos]
+    offsets = np.zeros(len(codificados) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in codificados], out=offsets[1:])
+    np.save(os.path.join(diretorio, f"{nome}.npy"), np.frombuffer(b"".join(codificados), dtype=np.uint8))
+    np.save(os.path.join(diretorio, f"{nome}.offsets.npy"), offsets)
+
+
+@instrumentar("io.construir_corpus")
+def construir_corpus(caminho_csv: str, diretorio: Optional[str] = None) -> str:
+    """
+    Lê o doc.csv (KEY, ENUNCIADO, EXCERTO), limpa e grava as colunas em `diretorio`.
+
+    A gravação é feita em um diretório temporário renomeado ao final, para que outro
+    processo nunca abra colunas pela metade.
+
+    Returns:
+        O diretório gravado.
+    """
+    diretorio = diretorio or diretorio_corpus(caminho_csv)
+    inicio = time.perf_counter()
+    df = pd.read_csv(caminho_csv, dtype=str, encoding="utf-8", keep_default_na=False)
+    n = len(df)
+    vazio = pd.Series([""] * n, index=df.index, dtype=object)
+    chaves = df["KEY"] if "KEY" in df.columns else vazio
+    # O id numérico vem só da KEY (sem KEY -> -1); no documento, a posição identifica a linha, como antes
+    ids = extrair_doc_id_numerico(chaves).fillna(-1).to_numpy(dtype=np.int64)
+    chaves = chaves.where(chaves != "", pd.Series(range(n), index=df.index).astype(str))
+    enunciados = df["ENUNCIADO"] if "ENUNCIADO" in df.columns else vazio
+    excertos = df["EXCERTO"] if "EXCERTO" in df.columns else vazio
+    preproc = PreprocessadorTexto()
+
+    temporario = f"{diretorio}.tmp-{os.getpid()}-{threading.get_ident()}"
+    os.makedirs(temporario, exist_ok=True)
+    try:
+        np.save(os.path.join(temporario, "ids.npy"), ids)
+        _gravar_coluna(temporario, "chave", chaves.tolist())
+        _gravar_coluna(temporario, "enunciado", enunciados.tolist())
+        _gravar_coluna(temporario, "enunciado_limpo", preproc.normalizar_textos(enunciados).tolist())
+        _gravar_coluna(temporario, "excerto", excertos.tolist())
+        with open(os.path.join(temporario, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({**_assinatura(caminho_csv), "documentos": n}, f)
+
+        if os.path.isdir(diretorio):
+            shutil.rmtree(diretorio, ignore_errors=True)
+        try:
+            os.replace(temporario, diretorio)
+        except OSError:
+            # Outro processo gravou o mesmo diretório primeiro
+            if not _valido(diretorio, caminho_csv):
+                raise
+    finally:
+        shutil.rmtree(temporario, ignore_errors=True)
+    print(f"✓ Corpus em colunas gravado em {diretorio} ({n} documentos, {time.perf_counter() - inicio:.1f}s)")
+    return diretorio
+
+
+@instrumentar("io.carregar_corpus")
+def carregar_corpus(caminho_csv: str, reconstruir: bool = False) -> CorpusColunar:
+    """
+    Corpus do CSV, aberto por mmap; constrói as colunas se ausentes ou desatualizadas.
+
+    A instância é compartilhada no processo (uma por CSV): chamadas seguintes só
+    conferem a assinatura do CSV.
+    """
+    caminho = os.path.abspath(caminho_csv)
+    diretorio = diretorio_corpus(caminho)
+    with _LOCK_CORPORA:
+        corpus = _CORPORA.get(caminho)
+        if corpus is not None and not reconstruir and _valido(diretorio, caminho):
+            return corpus
+        if reconstruir or not _valido(diretorio, caminho):
+            if not os.path.exists(caminho):
+                raise FileNotFoundError(caminho)
+            construir_corpus(caminho, diretorio)
+        corpus = CorpusColunar(diretorio)
+        _CORPORA[caminho] = corpus
+        return corpus
@@ -1,33 +1,23 @@
 """
 Utilitários para carregamento e manipulação de dados do jurisTCU.
 
-Inclui loaders reutilizáveis para `query.csv`, `qrel.csv` e `doc.csv`.
+Inclui loaders reutilizáveis para `query.csv`, `qrel.csv` e `doc.csv`
+(este último lido do corpus em colunas de `src/utils/corpus.py`).
 """
 
 import pandas as pd
 from typing import List, Dict
 
 from src.documento import DocumentoJuris
-from src.utils.preprocessamento import PreprocessadorTexto
+from src.utils.corpus import carregar_corpus
+from src.utils.instrumentacao import instrumentar
 
 
+@instrumentar("io.carregar_documentos")
 def carregar_dados_juris_tcu(caminho_csv: str, limite: int = None) -> List[DocumentoJuris]:
-    """Carrega documentos do CSV (KEY, ENUNCIADO, EXCERTO) em objetos DocumentoJuris."""
+    """Carrega documentos do CSV (KEY, ENUNCIADO, EXCERTO) em objetos DocumentoJuris (via corpus em colunas)."""
     try:
-        df = pd.read_csv(caminho_csv)
-        if limite:
-            df = df.head(limite)
-        documentos = []
-        for idx, row in df.iterrows():
-            enunciado = str(row.get('ENUNCIADO', ''))
-            excerto = str(row.get('EXCERTO', ''))
-            doc = DocumentoJuris(
-                id=str(row.get('KEY', idx)),
-                enunciado=enunciado,
-                excerto=excerto
-            )
-            documentos.append(doc)
-        return documentos
+        return carregar_corpus(caminho_csv).documentos(limite)
     except Exception:
         return []
 
@@ -51,15 +41,10 @@ def load_qrels_df(path: str) -> pd.DataFrame:
     return df
 
 
+@instrumentar("io.carregar_enunciados")
 def load_docs_enunciado_map_clean(path: str) -> Dict[int, str]:
     """Cria um mapa DOC_ID (numérico extraído de KEY) -> ENUNCIADO limpo (HTML removido)."""
-    preproc = PreprocessadorTexto()
-    df = pd.read_csv(path, dtype=str, encoding="utf-8").fillna("")
-    df["NUM"] = df["KEY"].astype(str).str.extract(r"(\d+)$")
-    df["NUM"] = pd.to_numeric(df["NUM"], errors="coerce")
-    df = df.dropna(subset=["NUM"]).astype({"NUM": int})
-    df["ENUNCIADO_CLEAN"] = df["ENUNCIADO"].apply(lambda x: preproc.remove_html(x))
-    return df.set_index("NUM")["ENUNCIADO_CLEAN"].to_dict()
+    return carregar_corpus(path).mapa_enunciados_limpos()
 
 
 def criar_dados_exemplo() -> List[DocumentoJuris]:
@@ -0,0 +1,173 @@
+"""
+Leitura e gravação de execuções (runs) e qrels em CSV, TREC e formatos binários.
+
+Uma execução normalizada tem as colunas QUERY_ID, DOC_ID_NUM (inteiro extraído do
+DOC_ID original, ex.: "JURISPRUDENCIA-SELECIONADA-85434" -> 85434), RANK e
+RERANK_SCORE; colunas extras do CSV (ex.: DOC_ID original) são mantidas.
+
+Formatos, escolhidos pela extensão do arquivo:
+- .csv: CSV de candidatos (QUERY_ID, DOC_ID, RERANK_SCORE, RANK)
+- .trec/.run/.txt: run TREC ("qid Q0 docid rank score tag"); qrels TREC ("qid 0 docid rel")
+- .npy: array estruturado com ids inteiros (lido por mmap, sem parse de texto)
+- .parquet: requer pyarrow (dependência opcional)
+
+Inclui:
+- extrair_doc_id_numerico(serie): DOC_ID -> inteiro, vetorizado
+- iterar_execucao(caminho, linhas_por_bloco): blocos normalizados, sem carregar o arquivo inteiro
+- ler_execucao(caminho) / gravar_execucao(df, caminho)
+- ler_qrels(caminho) / gravar_qrels(df, caminho)
+- converter_execucao(origem, destino): ex.: CSV de candidatos -> .npy
+"""
+
+import os
+from typing import Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.utils.instrumentacao import instrumentar
+
+LINHAS_POR_BLOCO = 500_000
+EXTENSOES_TREC = (".trec", ".run", ".txt")
+
+DTYPE_EXECUCAO = np.dtype([
+    ("QUERY_ID", "<i8"),
+    ("DOC_ID_NUM", "<i8"),
+    ("RANK", "<i4"),
+    ("RERANK_SCORE", "<f4"),
+])
+
+
+def _formato(caminho: str) -> str:
+    extensao = os.path.splitext(caminho)[1].lower()
+    if extensao in EXTENSOES_TREC:
+        return "trec"
+    if extensao in (".csv", ".npy", ".parquet"):
+        return extensao[1:]
+    raise ValueError(f"Formato de execução não suportado: {caminho}")
+
+
+def _importar_parquet():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Formato .parquet requer pyarrow (pip install pyarrow); use .npy como alternativa.") from e
+    return pa, pq
+
+
+def extrair_doc_id_numerico(serie: pd.Series) -> pd.Series:
+    """Número ao final de cada DOC_ID (NaN se não houver), sem regex para ids já numéricos."""
+    if pd.api.types.is_numeric_dtype(serie):
+        return serie.astype(float)
+    numeros = pd.to_numeric(serie, errors="coerce")
+    faltando = numeros.isna() & serie.notna()
+    if faltando.any():
+        numeros[faltando] = pd.to_numeric(serie[faltando].astype(str).str.extract(r"(\d+)$")[0], errors="coerce")
+    return numeros
+
+
+def _normalizar(df: pd.DataFrame) -> pd.DataFrame:
+    if "DOC_ID_NUM" not in df.columns:
+        df["DOC_ID_NUM"] = extrair_doc_id_numerico(df["DOC_ID"])
+    if "RERANK_SCORE" not in df.columns:
+        df["RERANK_SCORE"] = np.nan
+    df = df.dropna(subset=["QUERY_ID", "DOC_ID_NUM"])
+    return df.astype({"QUERY_ID": "int64", "DOC_ID_NUM": "int64", "RANK": "int64", "RERANK_SCORE": "float64"})
+
+
+def iterar_execucao(caminho: str, linhas_por_bloco: int = LINHAS_POR_BLOCO) -> Iterator[pd.DataFrame]:
+    """Lê uma execução em blocos normalizados de até `linhas_por_bloco` linhas."""
+    formato = _formato(caminho)
+    if formato == "csv":
+        for bloco in pd.read_csv(caminho, dtype={"DOC_ID": str}, chunksize=linhas_por_bloco, encoding="utf-8"):
+            yield _normalizar(bloco)
+    elif formato == "trec":
+        colunas = ["QUERY_ID", "Q0", "DOC_ID", "RANK", "RERANK_SCORE", "TAG"]
+        leitor = pd.read_csv(
+            caminho, sep=r"\s+", header=None, names=colunas, usecols=[0, 2, 3, 4],
+            dtype={"DOC_ID": str}, chunksize=linhas_por_bloco,
+        )
+        for bloco in leitor:
+            yield _normalizar(bloco)
+    elif formato == "npy":
+        dados = np.load(caminho, mmap_mode="r")
+        for inicio in range(0, len(dados), linhas_por_bloco):
+            yield pd.DataFrame(np.asarray(dados[inicio:inicio + linhas_por_bloco])).astype(
+                {"RANK": "int64", "RERANK_SCORE": "float64"}
+            )
+    else:
+        _, pq = _importar_parquet()
+        for lote in pq.ParquetFile(caminho).iter_batches(batch_size=linhas_por_bloco):
+            yield _normalizar(lote.to_pandas())
+
+
+@instrumentar("io.ler_execucao")
+def ler_execucao(caminho: str, linhas_por_bloco: int = LINHAS_POR_BLOCO) -> pd.DataFrame:
+    """Execução inteira, normalizada (ver docstring do módulo)."""
+    blocos = list(iterar_execucao(caminho, linhas_por_bloco))
+    if not blocos:
+        return _normalizar(pd.DataFrame(columns=["QUERY_ID", "DOC_ID", "RANK", "RERANK_SCORE"]))
+    return pd.concat(blocos, ignore_index=True) if len(blocos) > 1 else blocos[0].reset_index(drop=True)
+
+
+@instrumentar("io.gravar_execucao")
+def gravar_execucao(df: pd.DataFrame, caminho: str, tag: str = "run", linhas_por_bloco: int = LINHAS_POR_BLOCO) -> None:
+    """Grava uma execução no formato da extensão de `caminho`.
+
+    Os formatos binários guardam apenas as colunas normalizadas (DOC_ID_NUM no lugar do DOC_ID original).
+    """
+    formato = _formato(caminho)
+    diretorio = os.path.dirname(os.path.abspath(caminho))
+    os.makedirs(diretorio, exist_ok=True)
+    if formato == "csv":
+        df.to_csv(caminho, index=False, encoding="utf-8", chunksize=linhas_por_bloco)
+        return
+    if "DOC_ID_NUM" not in df.columns or "RERANK_SCORE" not in df.columns:
+        df = _normalizar(df.copy())
+    if formato == "trec":
+        docs = df["DOC_ID"] if "DOC_ID" in df.columns else df["DOC_ID_NUM"]
+        pd.DataFrame({
+            "QUERY_ID": df["QUERY_ID"], "Q0": "Q0", "DOC_ID": docs,
+            "RANK": df["RANK"], "RERANK_SCORE": df["RERANK_SCORE"].fillna(0), "TAG": tag,
+        }).to_csv(caminho, sep=" ", header=False, index=False, chunksize=linhas_por_bloco)
+    elif formato == "npy":
+        dados = np.empty(len(df), dtype=DTYPE_EXECUCAO)
+        for coluna in DTYPE_EXECUCAO.names:
+            dados[coluna] = df[coluna].to_numpy()
+        np.save(caminho, dados)
+    else:
+        pa, pq = _importar_parquet()
+        tabela = pa.Table.from_pandas(df[list(DTYPE_EXECUCAO.names)].astype(dict(DTYPE_EXECUCAO.descr)), preserve_index=False)
+        pq.write_table(tabela, caminho)
+
+
+@instrumentar("io.ler_qrels")
+def ler_qrels(caminho: str) -> pd.DataFrame:
+    """Qrels com QUERY_ID, DOC_ID (inteiro) e SCORE, de `qrel.csv` ou de um arquivo TREC."""
+    if _formato(caminho) != "trec":
+        from src.utils.dados import load_qrels_df
+
+        return load_qrels_df(caminho)
+    df = pd.read_csv(
+        caminho, sep=r"\s+", header=None, names=["QUERY_ID", "ITER", "DOC_ID", "SCORE"],
+        usecols=[0, 2, 3], dtype={"DOC_ID": str},
+    )
+    df["DOC_ID"] = extrair_doc_id_numerico(df["DOC_ID"])
+    df["SCORE"] = pd.to_numeric(df["SCORE"], errors="coerce").fillna(0)
+    return df.dropna(subset=["QUERY_ID", "DOC_ID"]).astype({"QUERY_ID": int, "DOC_ID": int})
+
+
+def gravar_qrels(df: pd.DataFrame, caminho: str) -> None:
+    """Grava qrels (QUERY_ID, DOC_ID, SCORE) no formato TREC."""
+    os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+    pd.DataFrame({
+        "QUERY_ID": df["QUERY_ID"], "ITER": 0, "DOC_ID": df["DOC_ID"], "SCORE": df["SCORE"],
+    }).to_csv(caminho, sep=" ", header=False, index=False)
+
+
+def converter_execucao(origem: str, destino: str, tag: Optional[str] = None) -> int:
+    """Converte uma execução entre formatos; retorna o número de linhas gravadas."""
+    df = ler_execucao(origem)
+    gravar_execucao(df, destino, tag=tag or os.path.splitext(os.path.basename(origem))[0])
+    return len(df)
@@ -2,37 +2,114 @@
 Helpers compartilhados para integração com Gemini.
 
 Inclui:
-- configurar_gemini(): carrega .env e configura cliente com GOOGLE_API_KEY
+- importar_genai(): importa o SDK `google.generativeai` sob demanda
+- configurar_gemini(): carrega .env e configura cliente com GOOGLE_API_KEY (uma vez por chave/endpoint)
+- obter_modelo(): GenerativeModel reutilizado por (modelo, configuração de geração/schema)
 - strip_code_fences(text): remove cercas de código Markdown
 - extrair_texto_resposta(resp): extrai texto dos candidatos ou de resp.text
+- LimitadorTaxa: token bucket de requisições/min e tokens/min (sync e async)
+- ClienteGemini: cliente compartilhado com limite de taxa, concorrência limitada e
+  retentativa com backoff (jitter) para 429
+- CacheRespostasLLM: cache persistente (SQLite) de respostas, endereçado por conteúdo,
+  com modo "replay" somente leitura para reexecuções offline e determinísticas
+- BackendGemini, BackendOpenAI, BackendFake: backends de geração do cliente (criar_backend)
+- obter_cliente_gemini(): instância global configurada pelo ambiente
+- redefinir_cliente_gemini(): descarta a instância global (testes que trocam backend/endpoint)
+
+Variáveis de ambiente:
+- GEMINI_RPM, GEMINI_TPM: limites por minuto (0 desativa o limite correspondente)
+- GEMINI_MAX_CONCORRENCIA: requisições simultâneas ao Gemini
+- GEMINI_MAX_TENTATIVAS: tentativas por chamada em caso de 429/5xx
+- GEMINI_API_ENDPOINT: endpoint alternativo (ex.: servidor fake local, via transporte REST)
+- GEMINI_CACHE_MODO: leitura_escrita (padrão), replay (somente leitura; miss é erro) ou desligado
+- GEMINI_CACHE_PATH: arquivo SQLite do cache (padrão: dados/cache_llm.sqlite)
+- LLM_BACKEND: gemini (padrão), openai (servidor local compatível, ex.: llama.cpp) ou fake
+- LLM_OPENAI_URL, LLM_OPENAI_MODEL, LLM_OPENAI_API_KEY: configuração do backend openai
+- LLM_FAKE_LATENCIA, LLM_FAKE_JITTER, LLM_FAKE_TAXA_ERRO, LLM_FAKE_SEMENTE: backend fake
 """
 
+import abc
+import asyncio
+import hashlib
+import itertools
+import json
+import logging
 import os
-from typing import Optional
-
-try:
-    import google.generativeai as genai  # type: ignore
-    _HAS_GEMINI = True
-except Exception:
-    _HAS_GEMINI = False
+import random
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
 
 from dotenv import load_dotenv
 
+from src.utils.instrumentacao import contar, registrar, span
+
 # Sempre carregar variáveis de ambiente
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+CACHE_LLM_PADRAO = os.path.join(BASE_DIR, "dados", "cache_llm.sqlite")
 
-def configurar_gemini() -> None:
-    """Configura o cliente Gemini usando GOOGLE_API_KEY."""
-    if not _HAS_GEMINI:
+
+def importar_genai():
+    """Importa o SDK do Gemini no primeiro uso (o import do pacote custa segundos)."""
+    try:
+        import google.generativeai as genai  # type: ignore
+    except Exception:
         raise RuntimeError("Pacote 'google-generativeai' não está instalado. Execute 'pip install -r requirements.txt'.")
+    return genai
+
+
+_lock_configuracao = threading.Lock()
+_configuracao_atual: Optional[Tuple[str, Optional[str]]] = None
+_modelos: Dict[Tuple[str, str], Any] = {}
+
+
+def configurar_gemini(forcar: bool = False) -> None:
+    """Configura o cliente Gemini usando GOOGLE_API_KEY.
+
+    A configuração é feita uma única vez por (chave, endpoint): reconfigurar descarta os
+    clientes HTTP/gRPC do SDK e, com eles, as conexões abertas. Se a chave ou o endpoint
+    mudarem no ambiente, o cliente é reconfigurado e os modelos em cache são descartados.
+    """
+    global _configuracao_atual
+    genai = importar_genai()
     api_key = os.getenv("GOOGLE_API_KEY")
     if not api_key:
         raise RuntimeError("Variável de ambiente 'GOOGLE_API_KEY' não definida. Configure sua chave da API Gemini.")
-    try:
-        genai.configure(api_key=api_key)
-    except Exception as e:
-        raise RuntimeError(f"Falha ao configurar o cliente Gemini: {e}")
+    endpoint = os.getenv("GEMINI_API_ENDPOINT")
+    with _lock_configuracao:
+        if not forcar and _configuracao_atual == (api_key, endpoint):
+            return
+        try:
+            if endpoint:
+                genai.configure(api_key=api_key, transport="rest", client_options={"api_endpoint": endpoint})
+            else:
+                genai.configure(api_key=api_key)
+        except Exception as e:
+            raise RuntimeError(f"Falha ao configurar o cliente Gemini: {e}")
+        _configuracao_atual = (api_key, endpoint)
+        _modelos.clear()
+
+
+def obter_modelo(model_name: str, gen_config: Optional[Dict[str, Any]] = None):
+    """`GenerativeModel` reutilizável para (modelo, configuração de geração/schema).
+
+    O modelo guarda o cliente do SDK após a primeira chamada, então instâncias
+    reutilizadas mantêm a conexão (keep-alive) entre requisições.
+    """
+    configurar_gemini()
+    chave = (model_name, json.dumps(gen_config or {}, sort_keys=True, ensure_ascii=False, default=str))
+    with _lock_configuracao:
+        modelo = _modelos.get(chave)
+        if modelo is None:
+            modelo = importar_genai().GenerativeModel(model_name, generation_config=gen_config)
+            _modelos[chave] = modelo
+        return modelo
 
 
 def strip_code_fences(text: str) -> str:
@@ -70,4 +147,564 @@ def extrair_texto_resposta(resp) -> Optional[str]:
         full_text = getattr(resp, "text", None)
         if isinstance(full_text, str):
             full_text = full_text.strip()
-    return full_text
\ No newline at end of file
+    return full_text
+
+
+def estimar_tokens(texto: str) -> int:
+    """Estimativa barata de tokens (~4 caracteres por token) para o limitador de taxa."""
+    return max(1, len(texto or "") // 4)
+
+
+class LimitadorTaxa:
+    """Token bucket duplo: requisições por minuto (rpm) e tokens por minuto (tpm).
+
+    Cada chamada reserva sua cota imediatamente e espera o tempo necessário para que
+    o balde volte a ficar não-negativo, o que mantém a ordem de chegada entre threads
+    e corrotinas. Baldes começam cheios (permite rajada de até um minuto de cota).
+    """
+
+    def __init__(
+        self,
+        rpm: Optional[float] = None,
+        tpm: Optional[float] = None,
+        relogio: Callable[[], float] = time.monotonic,
+    ):
+        self.rpm = rpm or None
+        self.tpm = tpm or None
+        self._relogio = relogio
+        self._requisicoes = float(self.rpm or 0)
+        self._tokens = float(self.tpm or 0)
+        self._ultimo = relogio()
+        self._lock = threading.Lock()
+
+    def reservar(self, tokens: int = 1) -> float:
+        """Reserva uma requisição e `tokens`; retorna quantos segundos aguardar antes de enviá-la."""
+        with self._lock:
+            agora = self._relogio()
+            decorrido = max(0.0, agora - self._ultimo)
+            self._ultimo = agora
+            espera = 0.0
+            if self.rpm:
+                taxa = self.rpm / 60.0
+                self._requisicoes = min(self.rpm, self._requisicoes + decorrido * taxa) - 1
+                if self._requisicoes < 0:
+                    espera = max(espera, -self._requisicoes / taxa)
+            if self.tpm:
+                taxa = self.tpm / 60.0
+                # Uma requisição maior que o balde esperaria para sempre
+                tokens = min(tokens, self.tpm)
+                self._tokens = min(self.tpm, self._tokens + decorrido * taxa) - tokens
+                if self._tokens < 0:
+                    espera = max(espera, -self._tokens / taxa)
+            return espera
+
+    def adquirir(self, tokens: int = 1) -> None:
+        """Bloqueia a thread até que a requisição possa ser enviada."""
+        espera = self.reservar(tokens)
+        if espera > 0:
+            time.sleep(espera)
+
+    async def adquirir_async(self, tokens: int = 1) -> None:
+        """Versão assíncrona de `adquirir`."""
+        espera = self.reservar(tokens)
+        if espera > 0:
+            await asyncio.sleep(espera)
+
+
+class LimiteDiarioAtingido(RuntimeError):
+    """Cota diária esgotada: novas tentativas não adiantam até a renovação da cota."""
+
+
+def _eh_limite_diario(msg: str) -> bool:
+    return "PerDay" in msg or "per day" in msg.lower()
+
+
+# Códigos HTTP como palavra inteira: "limit 1500" ou "req-4290" não são erros retentáveis
+_RE_RETENTAVEL = re.compile(r"\b(?:429|500|503)\b|ResourceExhausted|RESOURCE_EXHAUSTED|ServiceUnavailable|UNAVAILABLE")
+
+
+def _eh_retentavel(msg: str) -> bool:
+    """429 (quota/limite de taxa) e erros transitórios do servidor."""
+    return _RE_RETENTAVEL.search(msg) is not None
+
+
+def _atraso_sugerido(msg: str) -> Optional[float]:
+    """Extrai o atraso sugerido pelo servidor ("retry in 13.5s" / "retry_delay { seconds: 13 }")."""
+    m = re.search(r"retry in ([\d.]+)\s*s", msg, re.IGNORECASE) or re.search(r"seconds:\s*(\d+)", msg)
+    return float(m.group(1)) if m else None
+
+
+class RespostaAusenteNoCache(RuntimeError):
+    """Modo replay: a chamada não está no cache e a rede não pode ser usada."""
+
+
+class CacheRespostasLLM:
+    """Cache persistente de respostas do LLM em SQLite, endereçado por conteúdo.
+
+    A chave é o SHA-256 de (modelo, configuração de geração, prompt). Como as chamadas
+    do projeto usam temperature 0, reexecutar um experimento com o cache produz as
+    mesmas perguntas/respostas sem custo de cota.
+
+    Modos:
+        leitura_escrita: consulta o cache e grava respostas novas (padrão)
+        replay: somente leitura; uma chamada ausente levanta RespostaAusenteNoCache
+        desligado: não consulta nem grava
+    """
+
+    MODOS = ("leitura_escrita", "replay", "desligado")
+
+    def __init__(self, caminho: str = CACHE_LLM_PADRAO, modo: str = "leitura_escrita"):
+        if modo not in self.MODOS:
+            raise ValueError(f"Modo de cache inválido: {modo}. Use um de {self.MODOS}.")
+        self.caminho = caminho
+        self.modo = modo
+        self.hits = 0
+        self.misses = 0
+        self.gravacoes = 0
+        self._lock = threading.Lock()
+        self._conexao: Optional[sqlite3.Connection] = None
+
+    def _conectar(self) -> sqlite3.Connection:
+        """Abre a conexão no primeiro uso (compartilhada entre threads, protegida pelo lock)."""
+        if self._conexao is None:
+            diretorio = os.path.dirname(self.caminho)
+            if diretorio:
+                os.makedirs(diretorio, exist_ok=True)
+            self._conexao = sqlite3.connect(self.caminho, check_same_thread=False)
+            self._conexao.execute(
+                "CREATE TABLE IF NOT EXISTS respostas ("
+                " chave TEXT PRIMARY KEY, modelo TEXT, resposta TEXT, criado_em REAL)"
+            )
+            self._conexao.commit()
+        return self._conexao
+
+    @staticmethod
+    def chave(model_name: str, gen_config: Dict[str, Any], prompt: str) -> str:
+        conteudo = json.dumps(
+            {"modelo": model_name, "config": gen_config, "prompt": prompt},
+            sort_keys=True, ensure_ascii=False, default=str,
+        )
+        return hashlib.sha256(conteudo.encode("utf-8")).hexdigest()
+
+    def obter(self, chave: str) -> Optional[str]:
+        """Resposta em cache ou None. Em modo replay, ausência levanta RespostaAusenteNoCache."""
+        if self.modo == "desligado":
+            return None
+        with self._lock:
+            linha = self._conectar().execute(
+                "SELECT resposta FROM respostas WHERE chave = ?", (chave,)
+            ).fetchone()
+            if linha is not None:
+                self.hits += 1
+                return linha[0]
+            self.misses += 1
+        if self.modo == "replay":
+            raise RespostaAusenteNoCache(
+                f"Modo replay: resposta ausente no cache ({self.caminho}) para a chave {chave[:12]}…"
+            )
+        return None
+
+    def gravar(self, chave: str, model_name: str, resposta: str) -> None:
+        if self.modo != "leitura_escrita" or resposta is None:
+            return
+        with self._lock:
+            conexao = self._conectar()
+            conexao.execute(
+                "INSERT OR REPLACE INTO respostas (chave, modelo, resposta, criado_em) VALUES (?, ?, ?, ?)",
+                (chave, model_name, resposta, time.time()),
+            )
+            conexao.commit()
+            self.gravacoes += 1
+
+    def estatisticas(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "modo": self.modo,
+                "hits": self.hits,
+                "misses": self.misses,
+                "gravacoes": self.gravacoes,
+                "taxa_acerto": (self.hits / total) if total else 0.0,
+            }
+
+    def fechar(self) -> None:
+        with self._lock:
+            if self._conexao is not None:
+                self._conexao.close()
+                self._conexao = None
+
+
+class BackendLLM(abc.ABC):
+    """Backend de geração usado pelo ClienteGemini: uma requisição, sem retentativas.
+
+    Erros devem levantar exceções cuja mensagem siga as convenções do Gemini
+    ("429 ...", "503 ...") para que o cliente decida sobre retentativas.
+    """
+
+    nome = "base"
+
+    @abc.abstractmethod
+    def gerar(self, prompt: str, gen_config: Dict[str, Any], model_name: str) -> Optional[str]:
+        """Uma requisição ao modelo; retorna o texto da resposta (None se vier vazia)."""
+
+
+class BackendGemini(BackendLLM):
+    """Gemini via `google.generativeai` (modelos reutilizados por `obter_modelo`)."""
+
+    nome = "gemini"
+
+    def gerar(self, prompt: str, gen_config: Dict[str, Any], model_name: str) -> Optional[str]:
+        resp = obter_modelo(model_name, gen_config).generate_content(prompt)
+        return extrair_texto_resposta(resp)
+
+
+class BackendOpenAI(BackendLLM):
+    """Endpoint HTTP compatível com a API OpenAI (`/v1/chat/completions`), ex.: servidor do llama.cpp.
+
+    O `response_schema` do Gemini vira `response_format` com json_schema. Cada thread
+    mantém sua própria conexão HTTP aberta (keep-alive).
+
+    Args:
+        url: URL base do servidor (LLM_OPENAI_URL; padrão http://127.0.0.1:8080).
+        modelo: Nome do modelo enviado na requisição (LLM_OPENAI_MODEL; padrão: o do cliente).
+        api_key: Chave opcional enviada como Bearer (LLM_OPENAI_API_KEY).
+        timeout: Timeout por requisição, em segundos.
+    """
+
+    nome = "openai"
+
+    def __init__(
+        self,
+        url: Optional[str] = None,
+        modelo: Optional[str] = None,
+        api_key: Optional[str] = None,
+        timeout: float = 300.0,
+    ):
+        from urllib.parse import urlsplit
+
+        self.url = (url or os.getenv("LLM_OPENAI_URL", "http://127.0.0.1:8080")).rstrip("/")
+        self.modelo = modelo or os.getenv("LLM_OPENAI_MODEL")
+        self.api_key = api_key or os.getenv("LLM_OPENAI_API_KEY")
+        self.timeout = timeout
+        partes = urlsplit(self.url)
+        self._https = partes.scheme == "https"
+        self._host = partes.netloc
+        self._caminho = (partes.path or "") + "/v1/chat/completions"
+        self._local = threading.local()
+
+    def _conexao(self):
+        import http.client
+
+        conexao = getattr(self._local, "conexao", None)
+        if conexao is None:
+            classe = http.client.HTTPSConnection if self._https else http.client.HTTPConnection
+            conexao = classe(self._host, timeout=self.timeout)
+            self._local.conexao = conexao
+        return conexao
+
+    def _corpo(self, prompt: str, gen_config: Dict[str, Any], model_name: str) -> Dict[str, Any]:
+        corpo: Dict[str, Any] = {
+            "model": self.modelo or model_name,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": gen_config.get("temperature", 0),
+        }
+        if "max_output_tokens" in gen_config:
+            corpo["max_tokens"] = gen_config["max_output_tokens"]
+        schema = gen_config.get("response_schema")
+        if schema:
+            corpo["response_format"] = {
+                "type": "json_schema",
+                "json_schema": {"name": "resposta", "schema": _schema_json(schema)},
+            }
+        elif gen_config.get("response_mime_type") == "application/json":
+            corpo["response_format"] = {"type": "json_object"}
+        return corpo
+
+    def gerar(self, prompt: str, gen_config: Dict[str, Any], model_name: str) -> Optional[str]:
+        dados = json.dumps(self._corpo(prompt, gen_config, model_name)).encode("utf-8")
+        cabecalhos = {"Content-Type": "application/json"}
+        if self.api_key:
+            cabecalhos["Authorization"] = f"Bearer {self.api_key}"
+        conexao = self._conexao()
+        try:
+            conexao.request("POST", self._caminho, body=dados, headers=cabecalhos)
+            resposta = conexao.getresponse()
+            texto = resposta.read().decode("utf-8", errors="replace")
+        except Exception as e:
+            # Conexão descartada; a próxima tentativa abre outra
+            conexao.close()
+            self._local.conexao = None
+            raise RuntimeError(f"503 UNAVAILABLE: falha de conexão com {self.url}: {e}")
+        if resposta.status >= 400:
+            raise RuntimeError(f"{resposta.status} {texto}")
+        try:
+            return json.loads(texto)["choices"][0]["message"]["content"]
+        except (ValueError, KeyError, IndexError, TypeError):
+            return None
+
+
+class BackendFake(BackendLLM):
+    """Backend determinístico em processo, para testes e testes de carga sem rede.
+
+    Gera um JSON que respeita o `response_schema` da chamada, com textos derivados
+    do hash do prompt (mesmo prompt, mesma resposta). Arrays têm um item por
+    "### Caso" do prompt (perguntas em lote) ou `itens_array` itens.
+
+    Args:
+        latencia: Latência fixa por chamada, em segundos (LLM_FAKE_LATENCIA).
+        jitter: Variação uniforme adicional de latência, em segundos (LLM_FAKE_JITTER).
+        taxa_erro: Probabilidade de responder com 429 (LLM_FAKE_TAXA_ERRO).
+        falhas_429: Número de 429 injetados nas primeiras chamadas.
+        semente: Semente do gerador de latência/erros (LLM_FAKE_SEMENTE).
+        itens_array: Itens gerados para schemas de array fora do modo em lote.
+    """
+
+    nome = "fake"
+
+    def __init__(
+        self,
+        latencia: Optional[float] = None,
+        jitter: Optional[float] = None,
+        taxa_erro: Optional[float] = None,
+        falhas_429: int = 0,
+        semente: Optional[int] = None,
+        itens_array: int = 3,
+    ):
+        self.latencia = float(os.getenv("LLM_FAKE_LATENCIA", "0")) if latencia is None else latencia
+        self.jitter = float(os.getenv("LLM_FAKE_JITTER", "0")) if jitter is None else jitter
+        self.taxa_erro = float(os.getenv("LLM_FAKE_TAXA_ERRO", "0")) if taxa_erro is None else taxa_erro
+        self.falhas_429 = falhas_429
+        self.itens_array = itens_array
+        self.chamadas = 0
+        self._aleatorio = random.Random(int(os.getenv("LLM_FAKE_SEMENTE", "0")) if semente is None else semente)
+        self._lock = threading.Lock()
+
+    def gerar(self, prompt: str, gen_config: Dict[str, Any], model_name: str) -> Optional[str]:
+        with self._lock:
+            self.chamadas += 1
+            falhar = self.chamadas <= self.falhas_429 or self._aleatorio.random() < self.taxa_erro
+            espera = self.latencia + (self._aleatorio.uniform(0, self.jitter) if self.jitter else 0.0)
+        if espera:
+            time.sleep(espera)
+        if falhar:
+            raise RuntimeError("429 Resource has been exhausted (e.g. check quota). Please retry in 0.05s.")
+
+        semente = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        n_casos = len(re.findall(r"^### Caso \d+", prompt, flags=re.MULTILINE))
+        schema = gen_config.get("response_schema") or {"type": "object", "properties": {"text": {"type": "string"}}}
+        return json.dumps(self._valor(schema, semente, n_casos or self.itens_array), ensure_ascii=False)
+
+    def _valor(self, schema: Dict[str, Any], semente: str, n_itens: int, campo: str = "", indice: int = 0) -> Any:
+        tipo = str(schema.get("type", "string")).lower()
+        if tipo == "object":
+            return {
+                nome: self._valor(sub, semente, n_itens, nome, indice)
+                for nome, sub in (schema.get("properties") or {}).items()
+            }
+        if tipo == "array":
+            return [self._valor(schema.get("items") or {}, semente, n_itens, campo, i) for i in range(n_itens)]
+        if tipo == "integer":
+            return indice
+        if tipo == "number":
+            return float(indice)
+        if tipo == "boolean":
+            return True
+        return f"{campo or 'texto'} fake {semente[:8]}-{indice}"
+
+
+def _schema_json(schema: Any) -> Any:
+    """Schema no formato do Gemini ("OBJECT", "STRING"...) para JSON Schema (tipos em minúsculas)."""
+    if isinstance(schema, dict):
+        return {
+            chave: (valor.lower() if chave == "type" and isinstance(valor, str) else _schema_json(valor))
+            for chave, valor in schema.items()
+        }
+    if isinstance(schema, list):
+        return [_schema_json(v) for v in schema]
+    return schema
+
+
+BACKENDS: Dict[str, Callable[[], BackendLLM]] = {
+    "gemini": BackendGemini,
+    "openai": BackendOpenAI,
+    "fake": BackendFake,
+}
+
+
+def criar_backend(nome: Optional[str] = None) -> BackendLLM:
+    """Backend pelo nome (LLM_BACKEND se omitido; padrão "gemini")."""
+    nome = (nome or os.getenv("LLM_BACKEND", "gemini")).strip().lower()
+    if nome not in BACKENDS:
+        raise ValueError(f"Backend LLM inválido: {nome}. Use um de {sorted(BACKENDS)}.")
+    return BACKENDS[nome]()
+
+
+class ClienteGemini:
+    """Cliente LLM compartilhado (Gemini por padrão), seguro para threads e corrotinas.
+
+    Aplica o limitador de taxa antes de cada requisição, limita o número de chamadas
+    simultâneas e refaz chamadas que falharem com 429/5xx usando backoff exponencial
+    com jitter (respeitando o atraso sugerido pelo servidor, quando houver).
+    Cotas diárias esgotadas levantam `LimiteDiarioAtingido` sem novas tentativas.
+    Com `cache`, respostas já obtidas são servidas sem tocar o limitador nem a rede.
+
+    Args:
+        rpm, tpm: Limites por minuto do token bucket (None desativa).
+        max_concorrencia: Requisições simultâneas permitidas.
+        max_tentativas: Tentativas por chamada.
+        backoff_base, backoff_max: Parâmetros do backoff exponencial (segundos).
+        model_name: Modelo padrão (GEMINI_MODEL_NAME se omitido).
+        cache: Cache de respostas opcional.
+        backend: Backend de geração (LLM_BACKEND se omitido).
+    """
+
+    def __init__(
+        self,
+        rpm: Optional[float] = None,
+        tpm: Optional[float] = None,
+        max_concorrencia: int = 4,
+        max_tentativas: int = 5,
+        backoff_base: float = 2.0,
+        backoff_max: float = 60.0,
+        model_name: Optional[str] = None,
+        cache: Optional[CacheRespostasLLM] = None,
+        backend: Optional[BackendLLM] = None,
+    ):
+        self.cache = cache
+        self.backend = backend or criar_backend()
+        self.limitador = LimitadorTaxa(rpm=rpm, tpm=tpm)
+        self.max_concorrencia = max(1, int(max_concorrencia))
+        self.max_tentativas = max(1, int(max_tentativas))
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.model_name = model_name or os.getenv("GEMINI_MODEL_NAME", "gemini-2.5-flash-lite")
+        self._semaforo = threading.BoundedSemaphore(self.max_concorrencia)
+        self.estatisticas: Dict[str, int] = {
+            "requisicoes": 0, "retentativas": 0, "falhas": 0, "tokens_prompt": 0, "tokens_prompt_max": 0,
+        }
+        self._lock_stats = threading.Lock()
+
+    def _contar(self, chave: str) -> None:
+        with self._lock_stats:
+            self.estatisticas[chave] += 1
+
+    def _chamar(self, prompt: str, gen_config: Dict[str, Any], model_name: str) -> Optional[str]:
+        """Uma requisição ao backend (bloqueante), limitada pelo semáforo de concorrência."""
+        with self._semaforo:
+            self._contar("requisicoes")
+            tokens_prompt = estimar_tokens(prompt)
+            with self._lock_stats:
+                self.estatisticas["tokens_prompt"] += tokens_prompt
+                self.estatisticas["tokens_prompt_max"] = max(self.estatisticas["tokens_prompt_max"], tokens_prompt)
+            logger.debug(
+                "[LLM] %s: prompt com ~%d tokens", model_name, tokens_prompt,
+                extra={"modelo": model_name, "tokens_prompt": tokens_prompt},
+            )
+            registrar("llm.tokens_prompt", tokens_prompt)
+            with span("llm.requisicao", modelo=model_name, backend=self.backend.nome):
+                return self.backend.gerar(prompt, gen_config, model_name)
+
+    def _chave_cache(self, prompt: str, gen_config: Dict[str, Any], model_name: str) -> str:
+        # Respostas de backends diferentes não se misturam (chaves do Gemini mantidas)
+        modelo = model_name if self.backend.nome == "gemini" else f"{self.backend.nome}/{model_name}"
+        return self.cache.chave(modelo, gen_config, prompt)
+
+    def _tokens_da_chamada(self, prompt: str, gen_config: Dict[str, Any]) -> int:
+        return estimar_tokens(prompt) + int(gen_config.get("max_output_tokens", 256))
+
+    def _espera_retentativa(self, erro: Exception, tentativa: int) -> float:
+        """Segundos até a próxima tentativa; relança o erro se não houver nova tentativa."""
+        msg = str(erro)
+        if "429" in msg and _eh_limite_diario(msg):
+            self._contar("falhas")
+            raise LimiteDiarioAtingido(f"Falha ao gerar conteúdo com Gemini: {msg}")
+        if not _eh_retentavel(msg) or tentativa >= self.max_tentativas:
+            self._contar("falhas")
+            raise RuntimeError(f"Falha ao gerar conteúdo com Gemini: {msg}")
+        self._contar("retentativas")
+        contar("llm.retentativas")
+        # Backoff exponencial com "full jitter"
+        espera = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** (tentativa - 1))))
+        sugerido = _atraso_sugerido(msg)
+        if sugerido is not None:
+            espera = max(espera, min(self.backoff_max, sugerido))
+        return espera
+
+    def gerar(self, prompt: str, gen_config: Dict[str, Any], model_name: Optional[str] = None) -> Optional[str]:
+        """Gera conteúdo e retorna o texto da resposta (None se o modelo não devolver texto)."""
+        model_name = model_name or self.model_name
+        chave = self._chave_cache(prompt, gen_config, model_name) if self.cache else None
+        if self.cache:
+            em_cache = self.cache.obter(chave)
+            if em_cache is not None:
+                contar("llm.cache_hits")
+                return em_cache
+        tokens = self._tokens_da_chamada(prompt, gen_config)
+        # Sai pelo return ou pela exceção de `_espera_retentativa` (erro não retentável ou última tentativa)
+        for tentativa in itertools.count(1):
+            self.limitador.adquirir(tokens)
+            try:
+                texto = self._chamar(prompt, gen_config, model_name)
+            except Exception as e:
+                time.sleep(self._espera_retentativa(e, tentativa))
+                continue
+            if self.cache:
+                self.cache.gravar(chave, model_name, texto)
+            return texto
+
+    async def gerar_async(self, prompt: str, gen_config: Dict[str, Any], model_name: Optional[str] = None) -> Optional[str]:
+        """Versão assíncrona de `gerar`: esperas não bloqueiam o event loop e a
+        requisição roda em uma thread, sob o mesmo limite de concorrência."""
+        model_name = model_name or self.model_name
+        chave = self._chave_cache(prompt, gen_config, model_name) if self.cache else None
+        if self.cache:
+            em_cache = self.cache.obter(chave)
+            if em_cache is not None:
+                contar("llm.cache_hits")
+                return em_cache
+        tokens = self._tokens_da_chamada(prompt, gen_config)
+        for tentativa in itertools.count(1):
+            await self.limitador.adquirir_async(tokens)
+            try:
+                texto = await asyncio.to_thread(self._chamar, prompt, gen_config, model_name)
+            except Exception as e:
+                await asyncio.sleep(self._espera_retentativa(e, tentativa))
+                continue
+            if self.cache:
+                self.cache.gravar(chave, model_name, texto)
+            return texto
+
+
+_CLIENTE: Optional[ClienteGemini] = None
+_LOCK_CLIENTE = threading.Lock()
+
+
+def obter_cliente_gemini() -> ClienteGemini:
+    """Cliente Gemini global do processo, configurado pelas variáveis de ambiente."""
+    global _CLIENTE
+    if _CLIENTE is None:
+        with _LOCK_CLIENTE:
+            if _CLIENTE is None:
+                _CLIENTE = ClienteGemini(
+                    rpm=float(os.getenv("GEMINI_RPM", "60")),
+                    tpm=float(os.getenv("GEMINI_TPM", "250000")),
+                    max_concorrencia=int(os.getenv("GEMINI_MAX_CONCORRENCIA", "4")),
+                    max_tentativas=int(os.getenv("GEMINI_MAX_TENTATIVAS", "5")),
+                    cache=CacheRespostasLLM(
+                        caminho=os.getenv("GEMINI_CACHE_PATH", CACHE_LLM_PADRAO),
+                        modo=os.getenv("GEMINI_CACHE_MODO", "leitura_escrita"),
+                    ),
+                )
+    return _CLIENTE
+
+
+def redefinir_cliente_gemini() -> None:
+    """Descarta o cliente global; a próxima chamada a `obter_cliente_gemini` relê o ambiente.
+
+    Usado por testes que trocam o backend (ex.: LLM_BACKEND=fake) ou o endpoint.
+    """
+    global _CLIENTE
+    with _LOCK_CLIENTE:
+        cliente, _CLIENTE = _CLIENTE, None
+    if cliente is not None and cliente.cache is not None:
+        cliente.cache.fechar()
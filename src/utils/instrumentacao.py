@@ -0,0 +1,226 @@
+"""
+Instrumentação leve do pipeline: spans (tempo por etapa), contadores e histogramas.
+
+Desligada por padrão: `span()` devolve um context manager nulo reutilizado e
+`instrumentar()` apenas chama a função, de modo que o custo no caminho quente é uma
+checagem de flag. Liga com `INSTRUMENTACAO=1`, `ativar()` ou `--trace` nos scripts run_*.
+
+Inclui:
+- span(nome, **args): context manager que mede uma etapa (aninhável)
+- instrumentar(nome): decorator equivalente a envolver a função em um span
+- contar(nome, valor) / registrar(nome, valor): contadores e histogramas
+- resumo() / imprimir_resumo(): tabela com n, total, média, p50, p95 e máximo por nome
+- exportar_trace(caminho): JSON no formato Chrome trace (chrome://tracing, Perfetto)
+- configurar(caminho_trace): liga a coleta e, na saída do processo, imprime o resumo e grava o trace
+
+A coleta é por processo: etapas executadas em workers de ProcessPoolExecutor não entram no trace.
+"""
+
+import atexit
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional
+
+# Eventos individuais guardados para o trace; acima disso, só os agregados do resumo
+MAX_EVENTOS = 200_000
+
+_ATIVO = os.getenv("INSTRUMENTACAO", "").strip().lower() in ("1", "true", "sim")
+_NULO = contextlib.nullcontext()
+_LOCK = threading.Lock()
+_PID = os.getpid()
+_INICIO_NS = time.perf_counter_ns()
+
+_eventos: List[Dict[str, Any]] = []
+_duracoes: Dict[str, List[float]] = defaultdict(list)
+_contadores: Dict[str, float] = defaultdict(float)
+_histogramas: Dict[str, List[float]] = defaultdict(list)
+_nomes_threads: Dict[int, str] = {}
+
+
+def ativa() -> bool:
+    return _ATIVO
+
+
+def ativar() -> None:
+    global _ATIVO
+    _ATIVO = True
+
+
+def desativar() -> None:
+    global _ATIVO
+    _ATIVO = False
+
+
+def reiniciar() -> None:
+    """Descarta tudo o que foi coletado (o estado ligado/desligado é mantido)."""
+    global _INICIO_NS
+    with _LOCK:
+        _eventos.clear()
+        _duracoes.clear()
+        _contadores.clear()
+        _histogramas.clear()
+        _nomes_threads.clear()
+        _INICIO_NS = time.perf_counter_ns()
+
+
+class _Span:
+    __slots__ = ("nome", "args", "inicio")
+
+    def __init__(self, nome: str, args: Dict[str, Any]):
+        self.nome = nome
+        self.args = args
+
+    def __enter__(self) -> "_Span":
+        self.inicio = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, tipo, valor, tb) -> None:
+        fim = time.perf_counter_ns()
+        duracao_us = (fim - self.inicio) / 1000.0
+        tid = threading.get_ident()
+        with _LOCK:
+            _duracoes[self.nome].append(duracao_us)
+            if len(_eventos) < MAX_EVENTOS:
+                if tid not in _nomes_threads:
+                    _nomes_threads[tid] = threading.current_thread().name
+                evento = {
+                    "name": self.nome, "cat": self.nome.split(".", 1)[0], "ph": "X",
+                    "ts": (self.inicio - _INICIO_NS) / 1000.0, "dur": duracao_us,
+                    "pid": _PID, "tid": tid,
+                }
+                if self.args or tipo is not None:
+                    evento["args"] = dict(self.args, erro=tipo.__name__) if tipo is not None else self.args
+                _eventos.append(evento)
+
+
+def span(nome: str, **args):
+    """Mede o bloco `with` como a etapa `nome`; `args` aparecem no evento do trace."""
+    if not _ATIVO:
+        return _NULO
+    return _Span(nome, args)
+
+
+def instrumentar(nome: Optional[str] = None) -> Callable:
+    """Decorator: cada chamada vira um span (`nome` padrão: módulo.função)."""
+    def decorador(funcao: Callable) -> Callable:
+        nome_span = nome or f"{funcao.__module__.rsplit('.', 1)[-1]}.{funcao.__name__}"
+
+        @functools.wraps(funcao)
+        def envolvida(*a, **kw):
+            if not _ATIVO:
+                return funcao(*a, **kw)
+            with _Span(nome_span, {}):
+                return funcao(*a, **kw)
+        return envolvida
+    return decorador
+
+
+def contar(nome: str, valor: float = 1) -> None:
+    """Soma `valor` ao contador `nome` (no trace, um evento de contador com o total)."""
+    if not _ATIVO:
+        return
+    agora = time.perf_counter_ns()
+    with _LOCK:
+        _contadores[nome] += valor
+        if len(_eventos) < MAX_EVENTOS:
+            _eventos.append({
+                "name": nome, "ph": "C", "ts": (agora - _INICIO_NS) / 1000.0,
+                "pid": _PID, "args": {"total": _contadores[nome]},
+            })
+
+
+def registrar(nome: str, valor: float) -> None:
+    """Acrescenta uma observação ao histograma `nome` (ex.: pares por reranking)."""
+    if not _ATIVO:
+        return
+    with _LOCK:
+        _histogramas[nome].append(float(valor))
+
+
+def _percentil(ordenados: List[float], p: float) -> float:
+    """Percentil com interpolação linear (como numpy.percentile)."""
+    if len(ordenados) == 1:
+        return ordenados[0]
+    posicao = (len(ordenados) - 1) * p / 100.0
+    i = int(posicao)
+    if i + 1 >= len(ordenados):
+        return ordenados[-1]
+    return ordenados[i] + (ordenados[i + 1] - ordenados[i]) * (posicao - i)
+
+
+def _agregar(valores: List[float], escala: float = 1.0) -> Dict[str, float]:
+    ordenados = sorted(v * escala for v in valores)
+    return {
+        "n": len(ordenados),
+        "total": sum(ordenados),
+        "media": sum(ordenados) / len(ordenados),
+        "p50": _percentil(ordenados, 50),
+        "p95": _percentil(ordenados, 95),
+        "max": ordenados[-1],
+    }
+
+
+def resumo():
+    """DataFrame com uma linha por span (tempos em ms), histograma e contador, spans por tempo total."""
+    import pandas as pd
+
+    with _LOCK:
+        duracoes = {nome: list(v) for nome, v in _duracoes.items()}
+        histogramas = {nome: list(v) for nome, v in _histogramas.items()}
+        contadores = dict(_contadores)
+
+    linhas = [{"tipo": "span (ms)", "nome": nome, **_agregar(v, escala=1e-3)} for nome, v in duracoes.items()]
+    linhas.sort(key=lambda linha: -linha["total"])
+    linhas += [{"tipo": "histograma", "nome": nome, **_agregar(v)} for nome, v in sorted(histogramas.items())]
+    linhas += [{"tipo": "contador", "nome": nome, "total": v} for nome, v in sorted(contadores.items())]
+    colunas = ["tipo", "nome", "n", "total", "media", "p50", "p95", "max"]
+    return pd.DataFrame(linhas, columns=colunas).astype({"n": "Int64"})
+
+
+def imprimir_resumo() -> None:
+    tabela = resumo()
+    if tabela.empty:
+        print("Instrumentação: nenhuma etapa registrada.")
+        return
+    print("\n=== Instrumentação (tempo por etapa) ===")
+    print(tabela.to_string(index=False, na_rep="", float_format=lambda v: f"{v:.2f}"))
+
+
+def exportar_trace(caminho: str) -> int:
+    """Grava os eventos coletados em JSON (Chrome trace); retorna o número de eventos."""
+    with _LOCK:
+        eventos = list(_eventos)
+        metadados = [
+            {"name": "thread_name", "ph": "M", "pid": _PID, "tid": tid, "args": {"name": nome}}
+            for tid, nome in _nomes_threads.items()
+        ]
+    os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": metadados + eventos, "displayTimeUnit": "ms"}, f, ensure_ascii=False)
+    return len(eventos)
+
+
+def finalizar(caminho_trace: Optional[str] = None) -> None:
+    """Imprime o resumo e, se `caminho_trace` for dado, grava o trace."""
+    if not _ATIVO:
+        return
+    imprimir_resumo()
+    if caminho_trace:
+        n = exportar_trace(caminho_trace)
+        print(f"✓ Trace com {n} eventos salvo em: {caminho_trace} (abrir em chrome://tracing ou ui.perfetto.dev)")
+
+
+def configurar(caminho_trace: Optional[str] = None) -> Optional[str]:
+    """Para os scripts run_*: com `caminho_trace` (ou INSTRUMENTACAO_TRACE), liga a coleta e
+    registra `finalizar` na saída do processo. Retorna o caminho efetivo do trace."""
+    caminho_trace = caminho_trace or os.getenv("INSTRUMENTACAO_TRACE") or None
+    if caminho_trace:
+        ativar()
+    if _ATIVO:
+        atexit.register(finalizar, caminho_trace)
+    return caminho_trace
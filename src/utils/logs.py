@@ -0,0 +1,111 @@
+"""
+Logs estruturados do pipeline (logger "src" e filhos, via logging.getLogger(__name__)).
+
+Mensagens por consulta (banners da busca híbrida, do reranking e das conversas dos
+scripts run_*) são emitidas em nível INFO e ficam desligadas por padrão: sem
+`configurar_logs`, só avisos e erros aparecem (no stderr, pelo handler padrão do
+logging). Os argumentos usam o estilo %-format, então mensagens desligadas não
+chegam a ser formatadas.
+
+Inclui:
+- configurar_logs(verboso, nivel, formato, assincrono): instala o handler do logger "src"
+- FormatadorJson: uma linha JSON por registro, com os campos passados em `extra`
+- parar_logs(): esvazia a fila do handler assíncrono (também chamado na saída do processo)
+
+Variáveis de ambiente (usadas quando o argumento correspondente é None):
+LOG_VERBOSO=1, LOG_NIVEL (padrão WARNING), LOG_FORMATO (texto | json), LOG_ASSINCRONO=1.
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+from typing import Optional, TextIO
+
+LOGGER_RAIZ = "src"
+
+# Atributos de todo LogRecord; o que sobra veio de `extra` e entra no JSON
+_ATRIBUTOS_PADRAO = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def _env_ligado(nome: str) -> bool:
+    return os.getenv(nome, "").strip().lower() in ("1", "true", "sim")
+
+
+class FormatadorJson(logging.Formatter):
+    """Uma linha JSON por registro: ts, nivel, logger, msg e os campos de `extra`."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        dados = {
+            "ts": round(record.created, 6),
+            "nivel": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for chave, valor in vars(record).items():
+            if chave not in _ATRIBUTOS_PADRAO:
+                dados[chave] = valor
+        if record.exc_info:
+            dados["excecao"] = self.formatException(record.exc_info)
+        return json.dumps(dados, ensure_ascii=False, default=str)
+
+
+def parar_logs() -> None:
+    """Encerra o listener assíncrono, gravando o que ainda estiver na fila."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def configurar_logs(
+    verboso: Optional[bool] = None,
+    nivel: Optional[str] = None,
+    formato: Optional[str] = None,
+    assincrono: Optional[bool] = None,
+    fluxo: Optional[TextIO] = None,
+) -> logging.Logger:
+    """
+    Configura o logger "src" (pode ser chamada de novo; substitui a configuração anterior).
+
+    Args:
+        verboso: Liga as mensagens INFO por consulta (equivale a nivel="INFO").
+        nivel: Nível mínimo (ex.: "DEBUG", "WARNING").
+        formato: "texto" (só a mensagem, como os prints antigos) ou "json" (estruturado).
+        assincrono: Se True, a escrita sai da thread que loga (QueueHandler + QueueListener).
+        fluxo: Destino dos registros (padrão: stdout).
+
+    Returns:
+        O logger "src".
+    """
+    verboso = _env_ligado("LOG_VERBOSO") if verboso is None else verboso
+    nivel = nivel or ("INFO" if verboso else os.getenv("LOG_NIVEL", "WARNING"))
+    formato = formato or os.getenv("LOG_FORMATO", "texto")
+    assincrono = _env_ligado("LOG_ASSINCRONO") if assincrono is None else assincrono
+
+    parar_logs()
+    logger = logging.getLogger(LOGGER_RAIZ)
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    logger.setLevel(nivel.upper() if isinstance(nivel, str) else nivel)
+    logger.propagate = False
+
+    destino = logging.StreamHandler(fluxo or sys.stdout)
+    destino.setFormatter(FormatadorJson() if formato == "json" else logging.Formatter("%(message)s"))
+    if assincrono:
+        global _listener
+        fila: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+        logger.addHandler(logging.handlers.QueueHandler(fila))
+        _listener = logging.handlers.QueueListener(fila, destino, respect_handler_level=True)
+        _listener.start()
+    else:
+        logger.addHandler(destino)
+    return logger
+
+
+atexit.register(parar_logs)
@@ -1,6 +1,10 @@
 import pandas as pd
+import numpy as np
 import math
 
+from src.utils.execucoes import ler_execucao, ler_qrels
+from src.utils.instrumentacao import instrumentar
+
 def precisao_recall(docs_retornados, docs_relevantes, k=None):
     """
         Dado um conjunto de documentos retornados e de documentos relevantes,
@@ -128,6 +132,7 @@ def ndcg(resultado_pesquisa, qrels, col_resultado_doc_key, col_qrels_doc_key, co
 
     return dcg(doc_retornados, doc_relevantes, k, debug, aproximacao_trec_eval) / idcg(doc_retornados, doc_relevantes, k, debug, aproximacao_trec_eval)
 
+@instrumentar("avaliacao.metricas")
 def metricas(resultado_pesquisa, qrels, 
              col_resultado_query_key="QUERY_KEY",
              col_resultado_doc_key="DOC_KEY",
@@ -152,6 +157,152 @@ def metricas(resultado_pesquisa, qrels,
         col_qrels_query_key -- indica a KEY da query que será testada.
         col_qrels_doc_key -- indica a KEY de um documento associado a query.
         col_qrels_score -- indica a relevância do documento para aquela query. Quanto maior, mais relevante.
+
+        As métricas de todos os k são calculadas de uma vez sobre uma matriz query x posição
+        (até o maior k), com os mesmos valores de `precisao_recall`, `mrr` e `ndcg` por query.
+        Empates de RANK mantêm a ordem original das linhas. Com debug=True, usa a
+        implementação query a query, que imprime o cálculo intermediário.
+    """
+    if debug:
+        return _metricas_por_query(
+            resultado_pesquisa, qrels, col_resultado_query_key, col_resultado_doc_key, col_resultado_rank,
+            col_qrels_query_key, col_qrels_doc_key, col_qrels_score, k, debug, aproximacao_trec_eval,
+        )
+
+    # Remove do qrels os resultados cujo score é 0
+    qrels = qrels[qrels[col_qrels_score] > 0]
+
+    # Extrai as queries que devem ser analisadas. Se tiver query no resultado que não 
+    # está no qrels, ela não será avaliada.
+    query_keys = qrels[col_qrels_query_key].unique()
+    indice_queries = pd.Index(query_keys)
+    n_queries = len(query_keys)
+    profundidade = max(k)
+
+    # Resultado: só queries avaliadas, ordenado por (query, rank) de forma estável, até o maior k
+    q_res = indice_queries.get_indexer(resultado_pesquisa[col_resultado_query_key])
+    manter = q_res >= 0
+    q_res = q_res[manter]
+    docs_res = resultado_pesquisa[col_resultado_doc_key].to_numpy()[manter]
+    ordem = np.lexsort((resultado_pesquisa[col_resultado_rank].to_numpy()[manter], q_res))
+    q_res, docs_res = q_res[ordem], docs_res[ordem]
+    posicao = np.arange(len(q_res)) - np.searchsorted(q_res, q_res)
+    no_corte = posicao < profundidade
+    linhas, colunas, docs_res = q_res[no_corte], posicao[no_corte], docs_res[no_corte]
+
+    # Chave inteira (query, doc) comum ao resultado e ao qrels
+    q_qrels = indice_queries.get_indexer(qrels[col_qrels_query_key])
+    codigos, docs_unicos = pd.factorize(np.concatenate([qrels[col_qrels_doc_key].to_numpy(), docs_res]))
+    n_docs = max(len(docs_unicos), 1)
+    chave_qrels = q_qrels.astype(np.int64) * n_docs + codigos[:len(q_qrels)]
+    chave_res = linhas.astype(np.int64) * n_docs + codigos[len(q_qrels):]
+
+    # Recall usa o total de linhas relevantes do qrels (como len(docs_relevantes))
+    n_relevantes = np.bincount(q_qrels, minlength=n_queries)
+
+    # Relevância por (query, doc): como no dict do ndcg, vale o último score de docs repetidos
+    ordem = np.argsort(chave_qrels, kind="stable")[::-1]
+    chaves_rel, ultimo = np.unique(chave_qrels[ordem], return_index=True)
+    rel_por_chave = qrels[col_qrels_score].to_numpy(dtype=float)[ordem][ultimo]
+    q_rel = chaves_rel // n_docs
+
+    achado = np.minimum(np.searchsorted(chaves_rel, chave_res), max(len(chaves_rel) - 1, 0))
+    relevante = (chaves_rel[achado] == chave_res) if len(chaves_rel) else np.zeros(len(chave_res), dtype=bool)
+    rel = np.where(relevante, rel_por_chave[achado] if len(chaves_rel) else 0.0, 0.0)
+
+    # P/R contam cada documento uma única vez (conjunto dos k primeiros)
+    primeira_ocorrencia = np.zeros(len(chave_res), dtype=bool)
+    primeira_ocorrencia[np.unique(chave_res, return_index=True)[1]] = True
+    celulas = linhas.astype(np.int64) * profundidade + colunas
+    acertos = np.bincount(celulas[relevante & primeira_ocorrencia], minlength=n_queries * profundidade)
+    acertos_em_k = np.cumsum(acertos.reshape(n_queries, profundidade), axis=1)
+
+    # MRR: posição do primeiro relevante (profundidade se não houver); linhas já estão em ordem de posição
+    primeiro = np.full(n_queries, profundidade)
+    q_com_relevante, primeira_linha = np.unique(linhas[relevante], return_index=True)
+    primeiro[q_com_relevante] = colunas[relevante][primeira_linha]
+
+    # DCG: mesmos descontos e ordem de soma de `dcg` (documentos repetidos contam de novo)
+    descontos = np.array([math.log(rank + 1, 2) for rank in range(1, profundidade + 1)])
+    ganhos = rel if aproximacao_trec_eval else 2 ** rel - 1
+    matriz_dcg = np.zeros((n_queries, profundidade))
+    matriz_dcg[linhas, colunas] = ganhos / descontos[colunas]
+    dcg_em_k = np.cumsum(matriz_dcg, axis=1)
+
+    # iDCG: relevâncias de cada query em ordem decrescente
+    ordem = np.lexsort((-rel_por_chave, q_rel))
+    q_ideal, rel_ideal = q_rel[ordem], rel_por_chave[ordem]
+    pos_ideal = np.arange(len(q_ideal)) - np.searchsorted(q_ideal, q_ideal)
+    no_corte = pos_ideal < profundidade
+    q_ideal, pos_ideal, rel_ideal = q_ideal[no_corte], pos_ideal[no_corte], rel_ideal[no_corte]
+    ganhos_ideais = rel_ideal if aproximacao_trec_eval else 2 ** rel_ideal - 1
+    matriz_idcg = np.zeros((n_queries, profundidade))
+    matriz_idcg[q_ideal, pos_ideal] = ganhos_ideais / descontos[pos_ideal]
+    idcg_em_k = np.cumsum(matriz_idcg, axis=1)
+
+    pd_metricas = pd.DataFrame({'QUERY_KEY': query_keys})
+
+    # Insere as métricas na ordem: precisão, recall, MRR, nDCG:
+    for valor_k in k:
+        pd_metricas[f'P@{valor_k}'] = acertos_em_k[:, valor_k - 1] / max(valor_k, 1)
+    for valor_k in k:
+        pd_metricas[f'R@{valor_k}'] = acertos_em_k[:, valor_k - 1] / n_relevantes
+    for valor_k in k:
+        pd_metricas[f'MRR@{valor_k}'] = np.where(primeiro < valor_k, 1.0 / (primeiro + 1), 0.0)
+    for valor_k in k:
+        pd_metricas[f'nDCG@{valor_k}'] = dcg_em_k[:, valor_k - 1] / idcg_em_k[:, valor_k - 1]
+
+    return pd_metricas
+
+
+def metricas_de_arquivos(caminho_execucao, caminho_qrels, k=[5, 10, 20, 50], aproximacao_trec_eval=False):
+    """
+        Calcula `metricas` para uma execução e um qrels em arquivo (CSV, TREC, .npy ou .parquet;
+        ver src.utils.execucoes). Os documentos são comparados pelo id numérico.
+    """
+    return metricas(
+        resultado_pesquisa=ler_execucao(caminho_execucao),
+        qrels=ler_qrels(caminho_qrels),
+        col_resultado_query_key="QUERY_ID",
+        col_resultado_doc_key="DOC_ID_NUM",
+        col_resultado_rank="RANK",
+        col_qrels_query_key="QUERY_ID",
+        col_qrels_doc_key="DOC_ID",
+        col_qrels_score="SCORE",
+        k=k,
+        aproximacao_trec_eval=aproximacao_trec_eval,
+    )
+
+
+def _metricas_por_query(resultado_pesquisa, qrels, 
+             col_resultado_query_key="QUERY_KEY",
+             col_resultado_doc_key="DOC_KEY",
+             col_resultado_rank="RANK",
+             col_qrels_query_key="QUERY_KEY",
+             col_qrels_doc_key="DOC_KEY",
+             col_qrels_score="SCORE",
+             k=[5, 10, 20, 50], debug=False, aproximacao_trec_eval=False):
+    """
+        Implementação de referência de `metricas`, query a query.
+
+        Usada quando debug=True (imprime o cálculo intermediário do DCG) e para
+        conferir a implementação vetorizada.
+
+        Calcula um conjunto de métricas para um resultado de pesquisa e um conjunto qrels.
+        resultado_pesquisa -- DataFrame Pandas contendo o resultado das pesquisas.
+        qrels -- DataFrame Pandas contendo o qrels
+
+        Os parâmetros col_resultado_xxxx referem-se a nomes de colunas no DataFrame resultado_pesquisa:
+
+        col_resultado_query_key -- indica a KEY da query.
+        col_resultado_doc_key -- indica a KEY do documento retornado.
+        col_resultado_rank -- indica a posição do documento retornado.
+
+        Os parâmetros col_qrels_xxxx referem-se a nomes de colunas no DataFrame qrels:
+
+        col_qrels_query_key -- indica a KEY da query que será testada.
+        col_qrels_doc_key -- indica a KEY de um documento associado a query.
+        col_qrels_score -- indica a relevância do documento para aquela query. Quanto maior, mais relevante.
     """
     # Remove do qrels os resultados cujo score é 0
     qrels = qrels[qrels[col_qrels_score] > 0]
@@ -0,0 +1,196 @@
+"""
+Registro de modelos compartilhado pelo processo.
+
+Vários buscadores (corpora ou parâmetros diferentes) no mesmo processo passam a
+reutilizar uma única cópia de cada modelo, identificada por (nome, device, dtype).
+
+Inclui:
+- HandleModelo: referência contada a um modelo carregado (liberar() ao terminar)
+- RegistroModelos: carrega cada modelo uma única vez, conta referências e descarrega sob demanda
+- obter_registro(): registro global do processo
+- lock_inferencia(modelo): lock de inferência do modelo registrado (ou contexto nulo)
+"""
+
+import contextlib
+import gc
+import sys
+import threading
+import weakref
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+ChaveModelo = Tuple[str, str, str]
+
+
+class _EntradaModelo:
+    """Modelo carregado e seus metadados de controle."""
+
+    __slots__ = ("chave", "modelo", "referencias", "lock_inferencia", "handles")
+
+    def __init__(self, chave: ChaveModelo, modelo: Any):
+        self.chave = chave
+        self.modelo = modelo
+        self.referencias = 0
+        # Handles entregues, invalidados em um descarregamento forçado
+        self.handles: "weakref.WeakSet[HandleModelo]" = weakref.WeakSet()
+        # Tokenizers rápidos do HF não toleram uso simultâneo entre threads
+        self.lock_inferencia = threading.RLock()
+
+
+class HandleModelo:
+    """Referência a um modelo do registro. Pode ser usado como context manager."""
+
+    __slots__ = ("chave", "modelo", "lock_inferencia", "_registro", "_liberado", "__weakref__")
+
+    def __init__(self, registro: "RegistroModelos", entrada: _EntradaModelo):
+        self.chave = entrada.chave
+        self.modelo = entrada.modelo
+        self.lock_inferencia = entrada.lock_inferencia
+        self._registro = registro
+        self._liberado = False
+
+    def liberar(self) -> None:
+        """Devolve a referência ao registro (idempotente)."""
+        if not self._liberado:
+            self._liberado = True
+            self._registro._liberar(self.chave)
+
+    def __enter__(self) -> "HandleModelo":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.liberar()
+
+
+class RegistroModelos:
+    """Registro thread-safe de modelos carregados, com contagem de referências.
+
+    O carregamento de uma mesma chave acontece uma única vez, mesmo com chamadas
+    simultâneas; chaves diferentes podem carregar em paralelo. Modelos sem
+    referências continuam em memória até `descarregar` ser chamado.
+    """
+
+    def __init__(self):
+        self._entradas: Dict[ChaveModelo, _EntradaModelo] = {}
+        self._locks_carga: Dict[ChaveModelo, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def chave(nome: str, device: Optional[str] = None, dtype: Optional[str] = None) -> ChaveModelo:
+        return (nome, str(device or "auto"), str(dtype or "auto"))
+
+    def obter(
+        self,
+        nome: str,
+        carregador: Callable[[], Any],
+        device: Optional[str] = None,
+        dtype: Optional[str] = None,
+    ) -> HandleModelo:
+        """Retorna um handle para o modelo, carregando-o com `carregador` se necessário.
+
+        Exceções do carregador são propagadas e nada é registrado.
+        """
+        chave = self.chave(nome, device, dtype)
+        with self._lock:
+            lock_carga = self._locks_carga.setdefault(chave, threading.Lock())
+
+        with lock_carga:
+            with self._lock:
+                entrada = self._entradas.get(chave)
+            if entrada is None:
+                entrada = _EntradaModelo(chave, carregador())
+                with self._lock:
+                    self._entradas[chave] = entrada
+            with self._lock:
+                entrada.referencias += 1
+                handle = HandleModelo(self, entrada)
+                entrada.handles.add(handle)
+                return handle
+
+    def _liberar(self, chave: ChaveModelo) -> None:
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is not None and entrada.referencias > 0:
+                entrada.referencias -= 1
+
+    def referencias(self, nome: str, device: Optional[str] = None, dtype: Optional[str] = None) -> int:
+        """Número de handles ativos para a chave (0 se não carregado)."""
+        with self._lock:
+            entrada = self._entradas.get(self.chave(nome, device, dtype))
+            return entrada.referencias if entrada else 0
+
+    def modelos_carregados(self) -> List[Dict[str, Any]]:
+        """Lista as chaves carregadas e suas contagens de referências."""
+        with self._lock:
+            return [
+                {"nome": c[0], "device": c[1], "dtype": c[2], "referencias": e.referencias}
+                for c, e in self._entradas.items()
+            ]
+
+    def descarregar(
+        self,
+        nome: str,
+        device: Optional[str] = None,
+        dtype: Optional[str] = None,
+        forcar: bool = False,
+    ) -> bool:
+        """Remove o modelo do registro e libera sua memória.
+
+        Sem `forcar`, só descarrega modelos sem referências ativas. Com `forcar`,
+        os handles ainda ativos são invalidados (`handle.modelo` passa a None);
+        quem guardou o modelo em outra variável continua retendo a memória.
+        Retorna True se o modelo foi descarregado.
+        """
+        chave = self.chave(nome, device, dtype)
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is None or (entrada.referencias > 0 and not forcar):
+                return False
+            del self._entradas[chave]
+            self._locks_carga.pop(chave, None)
+            for handle in list(entrada.handles):
+                handle.modelo = None
+                # liberar() não pode descontar de uma nova carga da mesma chave
+                handle._liberado = True
+            entrada.handles.clear()
+        entrada.modelo = None
+        _liberar_memoria()
+        return True
+
+    def descarregar_nao_usados(self) -> int:
+        """Descarrega todos os modelos sem referências ativas; retorna quantos foram removidos."""
+        with self._lock:
+            chaves = [c for c, e in self._entradas.items() if e.referencias == 0]
+        return sum(1 for c in chaves if self.descarregar(*c))
+
+    def lock_de(self, modelo: Any):
+        """Lock de inferência do modelo, se ele pertencer ao registro."""
+        with self._lock:
+            for entrada in self._entradas.values():
+                if entrada.modelo is modelo:
+                    return entrada.lock_inferencia
+        return None
+
+
+def _liberar_memoria() -> None:
+    """Coleta lixo e devolve a memória da GPU, se o torch já estiver carregado."""
+    gc.collect()
+    torch = sys.modules.get("torch")
+    if torch is not None and torch.cuda.is_available():
+        torch.cuda.empty_cache()
+
+
+_REGISTRO = RegistroModelos()
+
+
+def obter_registro() -> RegistroModelos:
+    """Registro global de modelos do processo."""
+    return _REGISTRO
+
+
+def lock_inferencia(modelo: Any):
+    """Context manager que serializa a inferência de um modelo do registro.
+
+    Para modelos fora do registro, retorna um contexto nulo.
+    """
+    lock = _REGISTRO.lock_de(modelo) if modelo is not None else None
+    return lock if lock is not None else contextlib.nullcontext()
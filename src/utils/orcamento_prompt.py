@@ -0,0 +1,152 @@
+"""
+Orçamento de tokens para os prompts enviados ao LLM.
+
+O tamanho da entrada domina a latência e o custo das chamadas ao Gemini. Aqui os
+trechos variáveis de um prompt (conversa, documentos) são contados e, se o total
+passar do orçamento, os de menor valor são encurtados primeiro.
+
+Inclui:
+- TrechoPrompt: texto variável com prioridade, mínimo de tokens e forma de corte
+- ajustar_ao_orcamento(trechos, orcamento, tokens_fixos): encurta os trechos até caber
+- truncar_tokens(texto, tokens, manter): corta um texto para ~`tokens` tokens
+- orcamento_padrao(): orçamento configurado (GEMINI_ORCAMENTO_PROMPT)
+
+A contagem de tokens de cada ajuste sai no logger do módulo, em nível DEBUG.
+
+Variáveis de ambiente:
+- GEMINI_ORCAMENTO_PROMPT: tokens de entrada por prompt (padrão 6000; 0 desativa)
+"""
+
+import logging
+import os
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from src.utils.gemini import estimar_tokens
+
+MARCADOR_CORTE = " […] "
+# Turnos da conversa clarificadora: pergunta original, depois "Pergunta clarificadora: ...\nResposta: ..."
+SEPARADOR_TURNOS = "\n\n"
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class TrechoPrompt:
+    """Trecho variável de um prompt.
+
+    Atributos:
+        nome: Identificação do trecho nos logs.
+        texto: Conteúdo.
+        prioridade: Trechos de prioridade menor são encurtados primeiro.
+        minimo: Tokens que o trecho mantém mesmo acima do orçamento.
+        manter: "inicio" (corta o fim), "fim" (corta o início), "extremos"
+            (mantém começo e fim, corta o meio) ou "turnos" (mantém a pergunta original
+            e os últimos turnos inteiros, separados por SEPARADOR_TURNOS).
+    """
+
+    nome: str
+    texto: str
+    prioridade: int = 0
+    minimo: int = 0
+    manter: str = "inicio"
+
+
+def orcamento_padrao() -> Optional[int]:
+    """Orçamento de tokens de entrada por prompt (None se desativado)."""
+    valor = int(os.getenv("GEMINI_ORCAMENTO_PROMPT", "6000"))
+    return valor if valor > 0 else None
+
+
+def _prefixo(texto: str, caracteres: int) -> str:
+    corte = texto[:caracteres]
+    espaco = corte.rfind(" ")
+    return corte[:espaco] if espaco > caracteres * 3 // 4 else corte
+
+
+def _sufixo(texto: str, caracteres: int) -> str:
+    corte = texto[-caracteres:] if caracteres > 0 else ""
+    espaco = corte.find(" ")
+    return corte[espaco + 1:] if 0 <= espaco < caracteres // 4 else corte
+
+
+def _truncar_turnos(texto: str, tokens: int) -> Optional[str]:
+    """Primeiro bloco + os últimos turnos inteiros que cabem; None se nem um turno couber."""
+    blocos = texto.split(SEPARADOR_TURNOS)
+    marcador = MARCADOR_CORTE.strip()
+    mantidos: List[str] = []
+    for bloco in reversed(blocos[1:]):
+        if estimar_tokens(SEPARADOR_TURNOS.join([blocos[0], marcador, bloco, *mantidos])) > tokens:
+            break
+        mantidos.insert(0, bloco)
+    if not mantidos:
+        return None
+    return SEPARADOR_TURNOS.join([blocos[0], marcador, *mantidos])
+
+
+def truncar_tokens(texto: str, tokens: int, manter: str = "inicio") -> str:
+    """Corta `texto` para ~`tokens` tokens, em fronteira de palavra, marcando o corte."""
+    texto = texto or ""
+    if estimar_tokens(texto) <= tokens:
+        return texto
+    if tokens <= 0:
+        return ""
+    if manter == "turnos":
+        cortado = _truncar_turnos(texto, tokens)
+        if cortado is not None:
+            return cortado
+        # Nem a pergunta original com o último turno cabem: corta dentro deles
+        manter = "extremos"
+    caracteres = tokens * 4
+    if manter == "fim":
+        return MARCADOR_CORTE.lstrip() + _sufixo(texto, caracteres)
+    if manter == "extremos":
+        return _prefixo(texto, caracteres // 2) + MARCADOR_CORTE + _sufixo(texto, caracteres // 2)
+    return _prefixo(texto, caracteres) + MARCADOR_CORTE.rstrip()
+
+
+def ajustar_ao_orcamento(
+    trechos: List[TrechoPrompt],
+    orcamento: Optional[int] = None,
+    tokens_fixos: int = 0,
+) -> Tuple[List[str], int]:
+    """Encurta os trechos de menor prioridade até o prompt caber no orçamento.
+
+    Args:
+        trechos: Trechos variáveis do prompt.
+        orcamento: Tokens de entrada permitidos (orcamento_padrao() se None).
+        tokens_fixos: Tokens do restante do prompt (instruções, formato).
+
+    Returns:
+        (textos ajustados, na ordem de `trechos`; total estimado de tokens do prompt).
+        Se nem os mínimos couberem, os trechos ficam nos mínimos e o total excede o orçamento.
+    """
+    orcamento = orcamento if orcamento is not None else orcamento_padrao()
+    textos = [t.texto or "" for t in trechos]
+    tokens = [estimar_tokens(t) for t in textos]
+    total_original = tokens_fixos + sum(tokens)
+    if orcamento is None or total_original <= orcamento:
+        return textos, total_original
+
+    excesso = total_original - orcamento
+    cortados = []
+    # Prioridade menor primeiro; em empate, o trecho mais ao fim do prompt
+    for i in sorted(range(len(trechos)), key=lambda i: (trechos[i].prioridade, -i)):
+        if excesso <= 0:
+            break
+        alvo = max(trechos[i].minimo, tokens[i] - excesso)
+        if alvo >= tokens[i]:
+            continue
+        textos[i] = truncar_tokens(textos[i], alvo, trechos[i].manter)
+        novo = estimar_tokens(textos[i])
+        excesso -= tokens[i] - novo
+        tokens[i] = novo
+        cortados.append(trechos[i].nome)
+
+    total = tokens_fixos + sum(tokens)
+    logger.debug(
+        "✂ Prompt ajustado ao orçamento de %d tokens: %d → %d (cortes: %s)",
+        orcamento, total_original, total, ", ".join(cortados),
+        extra={"orcamento": orcamento, "tokens_prompt": total, "tokens_prompt_original": total_original, "cortes": cortados},
+    )
+    return textos, total
@@ -2,31 +2,106 @@
 Módulo para preprocessamento de texto específico para documentos jurídicos
 """
 
+import html
+import importlib.util
 import re
-import pandas as pd
+import string
+import threading
+from types import SimpleNamespace
+from typing import Iterable
 
-import nltk
-from nltk.tokenize import word_tokenize
-from nltk.corpus import stopwords
-from nltk.stem import RSLPStemmer
+import pandas as pd
 from unidecode import unidecode
-import string
 
-# Baixar recursos do NLTK se necessário
-try:
-    stopwords.words('portuguese')
-except LookupError:
-    nltk.download('stopwords')
+# Padrões da normalização em lote, com a mesma semântica no `re` e no RE2 do pyarrow
+# (sem \b, \s ou \w, que no RE2 são só ASCII).
+# Tags de bloco viram espaço; as demais (ex.: <b>) somem sem separar palavras.
+_TAGS_BLOCO = r"(?i)</?(?:p|br|div|li|ul|ol|tr|td|th|h[1-6]|blockquote|table)(?:[^>0-9A-Z_a-z][^>]*)?>"
+_TAGS = r"<[^>]*>"
+# Espaço em branco = exatamente os caracteres de str.isspace() (os que str.split() usa)
+_BRANCOS = "\t\n\x0b\x0c\r\x1c-\x1f \x85\xa0\u1680\u2000-\u200a\u2028\u2029\u202f\u205f\u3000"
+# Só as sequências que mudam: dois ou mais brancos, ou um branco que não é o espaço simples
+_ESPACOS = f"[{_BRANCOS}]{{2,}}|[{_BRANCOS.replace(' ', '')}]"
+_RE_TAGS_BLOCO = re.compile(_TAGS_BLOCO)
+_RE_TAGS = re.compile(_TAGS)
+_RE_ESPACOS = re.compile(_ESPACOS)
+
+
+def _normalizar_texto(texto: str) -> str:
+    """Mesmas etapas de `normalizar_textos` em um texto, pulando as que não se aplicam."""
+    if "<" in texto:
+        texto = _RE_TAGS.sub("", _RE_TAGS_BLOCO.sub(" ", texto))
+    # Depois das tags: "&lt;b&gt;" é texto, não deve ser removido como tag
+    if "&" in texto:
+        texto = html.unescape(texto)
+    # Sem "  " e sem caracteres não imprimíveis (todos os brancos além do espaço), _ESPACOS não casa
+    if "  " in texto or not texto.isprintable():
+        texto = _RE_ESPACOS.sub(" ", texto)
+    return texto.strip(" ")
+
+
+def _normalizar_python(textos: pd.Series) -> pd.Series:
+    return pd.Series([_normalizar_texto(texto) for texto in textos], index=textos.index, dtype=object)
+
+
+def _normalizar_pyarrow(textos: pd.Series) -> pd.Series:
+    """Etapas como operações .str sobre string[pyarrow] (RE2, em C++)."""
+    textos = textos.astype("string[pyarrow]")
+    textos = textos.str.replace(_TAGS_BLOCO, " ", regex=True).str.replace(_TAGS, "", regex=True)
+    # Entidades: sem equivalente no Arrow, só nas linhas com "&"
+    com_entidades = textos.str.contains("&", regex=False)
+    if com_entidades.any():
+        textos[com_entidades] = textos[com_entidades].map(html.unescape)
+    return textos.str.replace(_ESPACOS, " ", regex=True).str.strip(" ")
+
+
+def _pyarrow_disponivel() -> bool:
+    return importlib.util.find_spec("pyarrow") is not None
+
 
-try:
-    word_tokenize("test", language='portuguese')
-except LookupError:
-    nltk.download('punkt')
+# NLTK e seus recursos (stopwords, punkt, rslp) são carregados no primeiro uso,
+# para que importar este módulo não dispare verificações nem downloads.
+_RECURSOS_NLTK = None
+_LOCK_NLTK = threading.Lock()
+
+
+def _recursos_nltk() -> SimpleNamespace:
+    """Importa o NLTK, baixa os recursos ausentes e retorna tokenizador, stopwords e stemmer."""
+    global _RECURSOS_NLTK
+    if _RECURSOS_NLTK is not None:
+        return _RECURSOS_NLTK
+    with _LOCK_NLTK:
+        if _RECURSOS_NLTK is not None:
+            return _RECURSOS_NLTK
+
+        import nltk
+        from nltk.tokenize import word_tokenize
+        from nltk.corpus import stopwords
+        from nltk.stem import RSLPStemmer
+
+        # Baixar recursos do NLTK se necessário
+        try:
+            stopwords.words('portuguese')
+        except LookupError:
+            nltk.download('stopwords')
+
+        try:
+            word_tokenize("test", language='portuguese')
+        except LookupError:
+            nltk.download('punkt')
+
+        try:
+            RSLPStemmer()
+        except LookupError:
+            nltk.download('rslp')
+
+        _RECURSOS_NLTK = SimpleNamespace(
+            word_tokenize=word_tokenize,
+            stopwords=frozenset(stopwords.words('portuguese')),
+            stemmer=RSLPStemmer(),
+        )
+        return _RECURSOS_NLTK
 
-try:
-    RSLPStemmer()
-except LookupError:
-    nltk.download('rslp')
 
 class PreprocessadorTexto:
     """Classe para preprocessamento de texto específico para documentos jurídicos"""
@@ -39,11 +114,32 @@ class PreprocessadorTexto:
         if not html:
             return ""
         return re.sub("<[^>]*>", "", html).strip()
-    
+
+    def normalizar_textos(self, textos: Iterable[str]) -> pd.Series:
+        """
+        Normaliza uma coluna inteira de textos de uma vez.
+
+        Remove as tags HTML (tags de bloco viram espaço), decodifica entidades HTML
+        (&nbsp;, &quot;, &#231; ...) e colapsa espaços em branco (os de `str.isspace()`).
+        Com o pyarrow instalado, a coluna vira string[pyarrow] e as substituições são
+        operações .str vetorizadas (RE2, em C++). Sem ele, os métodos .str do pandas
+        seriam laços em Python com uma cópia da coluna por etapa, e uma única passada
+        por texto sai mais barata. Os dois caminhos usam os mesmos padrões e dão o
+        mesmo resultado. Valores ausentes viram "". Retorna uma Series com o mesmo
+        índice da entrada (string[pyarrow] ou object).
+        """
+        textos = textos if isinstance(textos, pd.Series) else pd.Series(list(textos), dtype=object)
+        textos = textos.fillna("").astype(str)
+        if _pyarrow_disponivel():
+            return _normalizar_pyarrow(textos)
+        return _normalizar_python(textos)
+
     def tokenizador_pt(self, texto):
         """Tokenizador em português com stemização e remoção de stopwords"""
         if not texto or pd.isna(texto):
             return []
+
+        nltk_pt = _recursos_nltk()
             
         # Remove acentuação e converte para minúsculo
         texto = unidecode(texto.lower())
@@ -52,14 +148,13 @@ class PreprocessadorTexto:
         texto = ''.join([char if char not in string.punctuation else ' ' for char in texto])
         
         # Tokeniza o texto
-        tokens = word_tokenize(texto, language='portuguese')
+        tokens = nltk_pt.word_tokenize(texto, language='portuguese')
         
         # Remove stopwords e aplica stemização
-        stemmer = RSLPStemmer()
-        tokens_processados = [stemmer.stem(token) for token in tokens if token not in stopwords.words('portuguese')]
+        tokens_processados = [nltk_pt.stemmer.stem(token) for token in tokens if token not in nltk_pt.stopwords]
         
         return tokens_processados
     
     def tokenizador_pt_remove_html(self, texto):
         """Tokenizador que remove HTML antes de processar"""
-        return self.tokenizador_pt(self.remove_html(texto))
\ No newline at end of file
+        return self.tokenizador_pt(self.remove_html(texto))
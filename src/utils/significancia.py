@@ -0,0 +1,98 @@
+"""
+Testes de significância pareados para comparar execuções query a query.
+
+Inclui:
+- t_pareado(a, b): t de Student pareado bicaudal -> (t, p)
+- aleatorizacao_pareada(a, b): teste de aleatorização pareado (troca de sinais) -> p
+
+Sem dependência de scipy: a distribuição t é calculada pela função beta
+incompleta regularizada (fração contínua de Lentz).
+"""
+
+import math
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+
+def _fracao_continua_beta(a: float, b: float, x: float, max_iter: int = 300, eps: float = 1e-15) -> float:
+    minimo = 1e-300
+    c = 1.0
+    d = 1.0 - (a + b) * x / (a + 1.0)
+    d = 1.0 / (d if abs(d) > minimo else minimo)
+    h = d
+    for m in range(1, max_iter + 1):
+        m2 = 2 * m
+        for numerador in (
+            m * (b - m) * x / ((a + m2 - 1.0) * (a + m2)),
+            -(a + m) * (a + b + m) * x / ((a + m2) * (a + m2 + 1.0)),
+        ):
+            d = 1.0 + numerador * d
+            d = 1.0 / (d if abs(d) > minimo else minimo)
+            c = 1.0 + numerador / c
+            c = c if abs(c) > minimo else minimo
+            h *= d * c
+        if abs(d * c - 1.0) < eps:
+            break
+    return h
+
+
+def beta_incompleta(a: float, b: float, x: float) -> float:
+    """Função beta incompleta regularizada I_x(a, b)."""
+    if x <= 0.0:
+        return 0.0
+    if x >= 1.0:
+        return 1.0
+    log_frente = math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b) + a * math.log(x) + b * math.log1p(-x)
+    if x < (a + 1.0) / (a + b + 2.0):
+        return math.exp(log_frente) * _fracao_continua_beta(a, b, x) / a
+    return 1.0 - math.exp(log_frente) * _fracao_continua_beta(b, a, 1.0 - x) / b
+
+
+def t_pareado(a: Sequence[float], b: Sequence[float]) -> Tuple[float, float]:
+    """Teste t pareado bicaudal de H0: média(a - b) = 0.
+
+    Returns:
+        (estatística t, p-valor). Sem variação nas diferenças, t é 0 ou ±inf e
+        p é 1.0 ou 0.0. Com menos de 2 pares, retorna (nan, nan).
+    """
+    diferencas = np.asarray(a, dtype=float) - np.asarray(b, dtype=float)
+    n = len(diferencas)
+    if n < 2:
+        return float("nan"), float("nan")
+    media = float(diferencas.mean())
+    desvio = float(diferencas.std(ddof=1))
+    if desvio == 0.0:
+        return (0.0, 1.0) if media == 0.0 else (math.copysign(math.inf, media), 0.0)
+    t = media / (desvio / math.sqrt(n))
+    graus = n - 1
+    p = beta_incompleta(graus / 2.0, 0.5, graus / (graus + t * t))
+    return t, min(1.0, p)
+
+
+def aleatorizacao_pareada(
+    a: Sequence[float],
+    b: Sequence[float],
+    n_permutacoes: int = 10000,
+    semente: Optional[int] = 0,
+    tamanho_bloco: int = 1000,
+) -> float:
+    """Teste de aleatorização pareado bicaudal (troca aleatória de sinais das diferenças).
+
+    p = (permutações com |média| >= |média observada| + 1) / (n_permutacoes + 1).
+    """
+    diferencas = np.asarray(a, dtype=float) - np.asarray(b, dtype=float)
+    if len(diferencas) == 0:
+        return float("nan")
+    observada = abs(diferencas.mean())
+    rng = np.random.default_rng(semente)
+    extremos = 0
+    restantes = n_permutacoes
+    while restantes > 0:
+        bloco = min(tamanho_bloco, restantes)
+        sinais = rng.integers(0, 2, size=(bloco, len(diferencas)), dtype=np.int8) * 2 - 1
+        medias = np.abs(sinais @ diferencas) / len(diferencas)
+        # Tolerância para empates numéricos com a média observada
+        extremos += int(np.count_nonzero(medias >= observada - 1e-12))
+        restantes -= bloco
+    return (extremos + 1) / (n_permutacoes + 1)
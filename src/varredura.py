@@ -0,0 +1,294 @@
+"""
+Varredura de hiperparâmetros do BM25 (k1, b) e da fusão híbrida, avaliada no qrels.
+
+Em vez de reconstruir o BuscadorHibridoLlamaIndex a cada configuração:
+- IndiceBM25 tokeniza o corpus uma única vez e guarda as frequências em listas de
+  postings (arrays NumPy); cada (k1, b) só recalcula a normalização por documento.
+  Os scores são os mesmos do BM25Okapi (rank_bm25) usado pelo buscador.
+- Os scores densos (consulta x documento) são calculados uma vez e reaproveitados por
+  todas as configurações (ver calcular_scores_densos / carregar_scores_densos).
+- As configurações são avaliadas em processos paralelos, agrupadas por (k1, b).
+
+Fusões avaliadas:
+- "rrf": soma de peso / (rank + rrf_k) sobre o top-k de cada retriever, como o
+  QueryFusionRetriever do buscador (peso 0.5 para ambos e rrf_k=60 reproduzem o padrão)
+- "combinacao": peso * BM25 + (1 - peso) * denso, com scores min-max normalizados por consulta
+- "bm25": apenas BM25 (também usada quando não há scores densos)
+"""
+
+import hashlib
+import itertools
+import math
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.utils.instrumentacao import instrumentar
+from src.utils.metricas import metricas
+
+# Versão do cache de scores densos (.npz); mudar invalida os arquivos gravados
+VERSAO_SCORES_DENSOS = 1
+
+
+class IndiceBM25:
+    """Frequências de termos do corpus em listas de postings, para pontuar qualquer (k1, b).
+
+    Args:
+        corpus_tokenizado: Tokens de cada documento (mesma ordem de `doc_ids`).
+        epsilon: Piso de idf para termos em mais da metade dos documentos (como no BM25Okapi).
+    """
+
+    def __init__(self, corpus_tokenizado: Sequence[List[str]], epsilon: float = 0.25):
+        self.n_docs = len(corpus_tokenizado)
+        self.vocabulario: Dict[str, int] = {}
+        docs, termos, freqs = [], [], []
+        self.tamanhos = np.zeros(self.n_docs, dtype=np.float64)
+        for i, tokens in enumerate(corpus_tokenizado):
+            self.tamanhos[i] = len(tokens)
+            for termo, tf in Counter(tokens).items():
+                docs.append(i)
+                termos.append(self.vocabulario.setdefault(termo, len(self.vocabulario)))
+                freqs.append(tf)
+        termos = np.asarray(termos, dtype=np.int64)
+        ordem = np.argsort(termos, kind="stable")
+        self._docs = np.asarray(docs, dtype=np.int64)[ordem]
+        self._tf = np.asarray(freqs, dtype=np.float64)[ordem]
+        df = np.bincount(termos, minlength=len(self.vocabulario))
+        self._inicio = np.concatenate([[0], np.cumsum(df)])
+        self.media_tamanho = float(self.tamanhos.mean()) if self.n_docs else 0.0
+
+        idf = np.array([math.log(self.n_docs - n + 0.5) - math.log(n + 0.5) for n in df])
+        media_idf = float(idf.mean()) if len(idf) else 0.0
+        self.idf = np.where(idf < 0, epsilon * media_idf, idf)
+        self._normas: Dict[Tuple[float, float], np.ndarray] = {}
+
+    def _norma(self, k1: float, b: float) -> np.ndarray:
+        chave = (k1, b)
+        if chave not in self._normas:
+            self._normas[chave] = k1 * (1 - b + b * self.tamanhos / self.media_tamanho)
+        return self._normas[chave]
+
+    def pontuar(self, tokens_consulta: Iterable[str], k1: float = 1.2, b: float = 0.75) -> np.ndarray:
+        """Scores BM25 da consulta para todos os documentos (iguais a BM25Okapi.get_scores)."""
+        scores = np.zeros(self.n_docs)
+        norma = self._norma(k1, b)
+        for token in tokens_consulta:
+            termo = self.vocabulario.get(token)
+            if termo is None:
+                continue
+            inicio, fim = self._inicio[termo], self._inicio[termo + 1]
+            docs, tf = self._docs[inicio:fim], self._tf[inicio:fim]
+            scores[docs] += self.idf[termo] * tf * (k1 + 1) / (tf + norma[docs])
+        return scores
+
+
+def calcular_scores_densos(
+    embeddings_docs: np.ndarray,
+    embeddings_consultas: np.ndarray,
+) -> np.ndarray:
+    """Similaridade de cosseno consulta x documento (float32)."""
+    docs = np.asarray(embeddings_docs, dtype=np.float32)
+    consultas = np.asarray(embeddings_consultas, dtype=np.float32)
+    docs = docs / np.maximum(np.linalg.norm(docs, axis=1, keepdims=True), 1e-12)
+    consultas = consultas / np.maximum(np.linalg.norm(consultas, axis=1, keepdims=True), 1e-12)
+    return consultas @ docs.T
+
+
+def assinatura_scores_densos(modelo: str, textos_docs: Iterable[str], textos_consultas: Iterable[str]) -> str:
+    """Identifica os scores densos: versão do formato, modelo de embeddings e hash dos textos."""
+    h = hashlib.sha256()
+    for textos in (textos_docs, textos_consultas):
+        for texto in textos:
+            h.update(texto.encode("utf-8"))
+            h.update(b"\0")
+        h.update(b"\1")
+    return f"v{VERSAO_SCORES_DENSOS}|{modelo}|{h.hexdigest()}"
+
+
+def carregar_scores_densos(
+    caminho: str,
+    query_ids: Sequence[int],
+    doc_ids: Sequence[int],
+    calcular: Callable[[], np.ndarray],
+    assinatura: str = "",
+) -> np.ndarray:
+    """Scores densos do cache em `caminho` (.npz), ou calculados e gravados.
+
+    O cache só vale para os mesmos ids e a mesma `assinatura` (ver
+    `assinatura_scores_densos`): trocar o modelo ou a limpeza dos textos recalcula.
+    """
+    if os.path.exists(caminho):
+        with np.load(caminho) as dados:
+            gravada = str(dados["assinatura"]) if "assinatura" in dados.files else None
+            if (gravada == assinatura and np.array_equal(dados["query_ids"], query_ids)
+                    and np.array_equal(dados["doc_ids"], doc_ids)):
+                print(f"✓ Scores densos carregados do cache: {caminho}")
+                return dados["scores"]
+        print("⚠ Cache de scores densos de outro corpus, consultas ou modelo; recalculando")
+    scores = np.asarray(calcular(), dtype=np.float32)
+    os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+    np.savez(caminho, query_ids=np.asarray(query_ids), doc_ids=np.asarray(doc_ids), scores=scores,
+             assinatura=np.asarray(assinatura))
+    return scores
+
+
+@dataclass(frozen=True)
+class ConfiguracaoFusao:
+    """Configuração avaliada na varredura."""
+
+    k1: float
+    b: float
+    fusao: str = "rrf"
+    peso_bm25: float = 0.5
+    rrf_k: float = 60.0
+    top_k: int = 50
+
+
+def grade_configuracoes(
+    k1s: Sequence[float],
+    bs: Sequence[float],
+    fusoes: Sequence[str] = ("rrf", "combinacao"),
+    pesos_bm25: Sequence[float] = (0.5,),
+    rrf_ks: Sequence[float] = (60.0,),
+    top_ks: Sequence[int] = (50,),
+    com_densos: bool = True,
+) -> List[ConfiguracaoFusao]:
+    """Produto cartesiano dos parâmetros; sem scores densos, só configurações "bm25"."""
+    configuracoes = []
+    for k1, b in itertools.product(k1s, bs):
+        if not com_densos:
+            configuracoes.append(ConfiguracaoFusao(k1, b, "bm25", 1.0, 0.0, 0))
+            continue
+        for fusao in fusoes:
+            if fusao == "rrf":
+                for peso, rrf_k, top_k in itertools.product(pesos_bm25, rrf_ks, top_ks):
+                    configuracoes.append(ConfiguracaoFusao(k1, b, "rrf", peso, rrf_k, top_k))
+            elif fusao == "combinacao":
+                for peso in pesos_bm25:
+                    configuracoes.append(ConfiguracaoFusao(k1, b, "combinacao", peso, 0.0, 0))
+            elif fusao == "bm25":
+                configuracoes.append(ConfiguracaoFusao(k1, b, "bm25", 1.0, 0.0, 0))
+            else:
+                raise ValueError(f"Fusão desconhecida: {fusao}")
+    return configuracoes
+
+
+def _top(scores: np.ndarray, n: int) -> np.ndarray:
+    """Índices dos n maiores scores de cada linha, em ordem decrescente (empates: menor índice,
+    como a ordenação estável dos retrievers)."""
+    return np.argsort(-scores, axis=1, kind="stable")[:, :n]
+
+
+def _minmax(scores: np.ndarray) -> np.ndarray:
+    minimo = scores.min(axis=1, keepdims=True)
+    amplitude = scores.max(axis=1, keepdims=True) - minimo
+    return (scores - minimo) / np.where(amplitude > 0, amplitude, 1.0)
+
+
+def fundir(
+    config: ConfiguracaoFusao,
+    scores_bm25: np.ndarray,
+    scores_densos: Optional[np.ndarray],
+) -> np.ndarray:
+    """Score fundido consulta x documento para a configuração (maior = melhor).
+
+    No RRF, documentos fora do top-k dos dois retrievers ficam com -inf (não são retornados).
+    """
+    if config.fusao == "bm25" or scores_densos is None:
+        return scores_bm25
+    if config.fusao == "combinacao":
+        return config.peso_bm25 * _minmax(scores_bm25) + (1 - config.peso_bm25) * _minmax(scores_densos)
+    fundido = np.zeros_like(scores_bm25)
+    presente = np.zeros(scores_bm25.shape, dtype=bool)
+    linhas = np.arange(len(scores_bm25))[:, None]
+    contribuicao = 1.0 / (np.arange(min(config.top_k, scores_bm25.shape[1])) + config.rrf_k)
+    for scores, peso in ((scores_bm25, config.peso_bm25), (scores_densos, 1 - config.peso_bm25)):
+        # Pesos 0.5/0.5 dão metade do RRF do QueryFusionRetriever: a ordem é a mesma
+        topo = _top(scores, config.top_k)
+        fundido[linhas, topo] += peso * contribuicao
+        presente[linhas, topo] = True
+    return np.where(presente, fundido, -np.inf)
+
+
+# Estado dos processos de avaliação (definido pelo initializer do pool)
+_ESTADO: Dict[str, object] = {}
+
+
+def _iniciar_processo(indice, consultas_tokenizadas, scores_densos, query_ids, doc_ids, qrels, profundidade, k) -> None:
+    _ESTADO.update(
+        indice=indice, consultas=consultas_tokenizadas, densos=scores_densos,
+        query_ids=np.asarray(query_ids), doc_ids=np.asarray(doc_ids), qrels=qrels,
+        profundidade=profundidade, k=k,
+    )
+
+
+def _avaliar_grupo(configuracoes: List[ConfiguracaoFusao]) -> List[Dict]:
+    """Avalia configurações com o mesmo (k1, b): o BM25 é pontuado uma vez para o grupo."""
+    indice: IndiceBM25 = _ESTADO["indice"]
+    k1, b = configuracoes[0].k1, configuracoes[0].b
+    scores_bm25 = np.vstack([indice.pontuar(tokens, k1, b) for tokens in _ESTADO["consultas"]])
+    query_ids, doc_ids, profundidade = _ESTADO["query_ids"], _ESTADO["doc_ids"], _ESTADO["profundidade"]
+    linhas = []
+    for config in configuracoes:
+        fundido = fundir(config, scores_bm25, _ESTADO["densos"])
+        topo = _top(fundido, profundidade)
+        valido = np.isfinite(np.take_along_axis(fundido, topo, axis=1)).ravel()
+        execucao = pd.DataFrame({
+            "QUERY_ID": np.repeat(query_ids, topo.shape[1]),
+            "DOC_ID": doc_ids[topo].ravel(),
+            "RANK": np.tile(np.arange(1, topo.shape[1] + 1), len(query_ids)),
+        })[valido]
+        pd_metricas = metricas(
+            resultado_pesquisa=execucao,
+            qrels=_ESTADO["qrels"],
+            col_resultado_query_key="QUERY_ID",
+            col_resultado_doc_key="DOC_ID",
+            col_resultado_rank="RANK",
+            col_qrels_query_key="QUERY_ID",
+            col_qrels_doc_key="DOC_ID",
+            col_qrels_score="SCORE",
+            k=_ESTADO["k"],
+        )
+        medias = pd_metricas.drop(columns=["QUERY_KEY"]).mean()
+        linhas.append({**asdict(config), **medias.to_dict()})
+    return linhas
+
+
+@instrumentar("varredura.execucao")
+def executar_varredura(
+    indice: IndiceBM25,
+    consultas_tokenizadas: Sequence[List[str]],
+    query_ids: Sequence[int],
+    doc_ids: Sequence[int],
+    qrels: pd.DataFrame,
+    configuracoes: Sequence[ConfiguracaoFusao],
+    scores_densos: Optional[np.ndarray] = None,
+    k: Sequence[int] = (10,),
+    workers: Optional[int] = None,
+) -> pd.DataFrame:
+    """Avalia as configurações e retorna o leaderboard ordenado por nDCG no maior k.
+
+    `consultas_tokenizadas`, `query_ids` e as linhas de `scores_densos` seguem a mesma
+    ordem; `doc_ids` (ids numéricos do qrels) segue a ordem do índice e das colunas.
+    """
+    k = sorted(set(k))
+    grupos: Dict[Tuple[float, float], List[ConfiguracaoFusao]] = {}
+    for config in configuracoes:
+        grupos.setdefault((config.k1, config.b), []).append(config)
+    estado = (indice, list(consultas_tokenizadas), scores_densos, query_ids, doc_ids, qrels, max(k), k)
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(grupos)))
+    if workers == 1:
+        _iniciar_processo(*estado)
+        resultados = [_avaliar_grupo(g) for g in grupos.values()]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_iniciar_processo, initargs=estado) as pool:
+            resultados = list(pool.map(_avaliar_grupo, grupos.values()))
+
+    leaderboard = pd.DataFrame([linha for grupo in resultados for linha in grupo])
+    return leaderboard.sort_values(f"nDCG@{max(k)}", ascending=False, kind="stable").reset_index(drop=True)
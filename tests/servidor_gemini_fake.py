@@ -0,0 +1,118 @@
+"""
+Servidor HTTP local que imita o endpoint REST `generateContent` do Gemini.
+
+Usado pelos testes do cliente Gemini para rodar sem rede nem chave real
+(GEMINI_API_ENDPOINT=http://127.0.0.1:<porta>).
+
+Recursos:
+- responde com um JSON fixo (ou gerado por função a partir do prompt)
+- também atende `/v1/chat/completions` (formato OpenAI), para o BackendOpenAI
+- injeta respostas 429 nas primeiras `falhas_429` requisições
+- latência configurável e registro da concorrência máxima observada
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Optional
+
+
+class ServidorGeminiFake:
+    def __init__(
+        self,
+        resposta: Optional[Callable[[str], str]] = None,
+        falhas_429: int = 0,
+        latencia: float = 0.0,
+    ):
+        self.resposta = resposta or (lambda prompt: json.dumps({"question": "Pergunta fake?", "rationale": "fake"}))
+        self.falhas_429 = falhas_429
+        self.latencia = latencia
+        self.requisicoes = 0
+        self.respostas_429 = 0
+        self.concorrencia_max = 0
+        self._ativas = 0
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    @property
+    def endpoint(self) -> str:
+        host, porta = self._httpd.server_address[:2]
+        return f"http://{host}:{porta}"
+
+    def __enter__(self) -> "ServidorGeminiFake":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def _handler(self):
+        servidor = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Cabeçalho e corpo saem em escritas separadas; com keep-alive, o Nagle somado ao
+            # ACK atrasado do cliente acrescentaria ~40ms a cada resposta
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                corpo = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                with servidor._lock:
+                    servidor.requisicoes += 1
+                    servidor._ativas += 1
+                    servidor.concorrencia_max = max(servidor.concorrencia_max, servidor._ativas)
+                    falhar = servidor.respostas_429 < servidor.falhas_429
+                    if falhar:
+                        servidor.respostas_429 += 1
+                try:
+                    if servidor.latencia:
+                        time.sleep(servidor.latencia)
+                    if falhar:
+                        payload = {"error": {
+                            "code": 429,
+                            "message": "Resource has been exhausted (e.g. check quota). Please retry in 0.05s.",
+                            "status": "RESOURCE_EXHAUSTED",
+                        }}
+                        self._responder(429, payload)
+                        return
+                    dados = json.loads(corpo or b"{}")
+                    if self.path.startswith("/v1/chat/completions"):
+                        prompt = (dados.get("messages") or [{}])[-1].get("content", "")
+                        self._responder(200, {
+                            "choices": [{
+                                "index": 0,
+                                "message": {"role": "assistant", "content": servidor.resposta(prompt)},
+                                "finish_reason": "stop",
+                            }],
+                        })
+                        return
+                    partes = (dados.get("contents") or [{}])[0].get("parts") or [{}]
+                    prompt = partes[0].get("text", "")
+                    payload = {
+                        "candidates": [{
+                            "content": {"parts": [{"text": servidor.resposta(prompt)}], "role": "model"},
+                            "finishReason": "STOP",
+                            "index": 0,
+                        }],
+                        "usageMetadata": {"promptTokenCount": len(prompt) // 4, "candidatesTokenCount": 8},
+                    }
+                    self._responder(200, payload)
+                finally:
+                    with servidor._lock:
+                        servidor._ativas -= 1
+
+            def _responder(self, status, payload):
+                corpo = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(corpo)))
+                self.end_headers()
+                self.wfile.write(corpo)
+
+        return Handler
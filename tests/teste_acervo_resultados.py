@@ -0,0 +1,203 @@
+import copy
+import hashlib
+import os
+import sys
+import tracemalloc
+from typing import List
+
+import numpy as np
+
+# Adicionar o diretório raiz do projeto ao sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from llama_index.core import Settings
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from llama_index.core.llms import MockLLM
+from llama_index.core.retrievers import QueryFusionRetriever
+from llama_index.core.schema import TextNode
+
+from src.buscador_hibrido import BuscadorHibridoLlamaIndex
+from src.documento import AcervoDocumentos, DocumentoJuris, ResultadoBusca
+
+
+class _EmbeddingHash(BaseEmbedding):
+    """Embedding determinístico (saco de palavras com hash), sem modelo."""
+
+    def _vetor(self, texto: str) -> List[float]:
+        v = np.zeros(64)
+        for token in texto.lower().split():
+            v[int(hashlib.md5(token.encode()).hexdigest(), 16) % 64] += 1.0
+        return (v / (np.linalg.norm(v) or 1.0)).tolist()
+
+    def _get_query_embedding(self, query: str) -> List[float]:
+        return self._vetor(query)
+
+    def _get_text_embedding(self, text: str) -> List[float]:
+        return self._vetor(text)
+
+    async def _aget_query_embedding(self, query: str) -> List[float]:
+        return self._vetor(query)
+
+
+def _documentos(n, semente=0):
+    rng = np.random.default_rng(semente)
+    vocabulario = [f"termo{i}" for i in range(400)]
+    return [
+        DocumentoJuris(
+            id=f"JURISPRUDENCIA-SELECIONADA-{1000 + i}",
+            enunciado="<p>" + " ".join(rng.choice(vocabulario, size=int(rng.integers(20, 60)))) + "</p>",
+            excerto=" ".join(rng.choice(vocabulario, size=int(rng.integers(80, 200)))),
+        )
+        for i in range(n)
+    ]
+
+
+def _nodes(buscador, documentos):
+    """Mesmos nós de `_criar_nodes` (textos curtos, sem truncamento pelo tokenizer do modelo)."""
+    nodes = []
+    textos = buscador.preprocessador.normalizar_textos([doc.enunciado for doc in documentos])
+    for doc, texto in zip(documentos, textos):
+        nodes.append(TextNode(
+            text=texto,
+            id_=str(doc.id),
+            metadata={
+                "id": doc.id,
+                "enunciado": doc.enunciado,
+                "excerto": doc.excerto,
+                "titulo": doc.enunciado[:100] + "..." if len(doc.enunciado) > 100 else doc.enunciado,
+            },
+        ))
+    return nodes
+
+
+def _buscador(documentos):
+    buscador = BuscadorHibridoLlamaIndex()
+    buscador.embeddings_model = _EmbeddingHash()
+    # Tokenização simples: o teste não depende dos recursos do NLTK (stopwords/punkt)
+    preprocessador = buscador.preprocessador
+    preprocessador.tokenizador_pt_remove_html = lambda texto: preprocessador.remove_html(texto).lower().split()
+    buscador.nodes = _nodes(buscador, documentos)
+    buscador.acervo.adicionar(documentos, [node.text for node in buscador.nodes])
+    buscador._configurar_bm25(buscador.nodes)
+    buscador._configurar_embeddings(buscador.nodes)
+    buscador._configurar_retrievers_llama()
+    return buscador
+
+
+def _formato_antigo(nodes, metodo):
+    """Dicts montados como em buscar_bm25/buscar_embeddings antes dos registros."""
+    return [{
+        "id": node.metadata.get("id", f"doc_{i}"),
+        "enunciado": node.metadata.get("enunciado", ""),
+        "excerto": node.metadata.get("excerto", ""),
+        "score": getattr(node, 'score', 0.0),
+        "texto_completo": node.text,
+        "metodo": metodo,
+    } for i, node in enumerate(nodes)]
+
+
+def _formato_antigo_hibrido(nodes):
+    return copy.deepcopy([{
+        "id": node.node.metadata.get("id"),
+        "titulo": node.node.metadata.get("titulo", ""),
+        "conteudo": node.node.text,
+        "score": node.score,
+        "metodo": "Híbrido (QueryFusionRetriever)",
+        "metadata": {"enunciado": node.node.metadata.get("enunciado", ""), "excerto": node.node.metadata.get("excerto", "")},
+    } for node in nodes])
+
+
+def _paridade(buscador, consultas):
+    """Registros == dicts antigos; retriever denso == retriever do VectorStoreIndex."""
+    referencia_densa = buscador.vector_index.as_retriever(similarity_top_k=10)
+    referencia_hibrida = QueryFusionRetriever(
+        retrievers=[buscador.bm25_retriever, referencia_densa],
+        similarity_top_k=10, num_queries=1, mode="reciprocal_rerank", use_async=False,
+    )
+    for consulta in consultas:
+        bm25 = buscador.buscar_bm25(consulta)
+        assert all(isinstance(r, ResultadoBusca) for r in bm25)
+        assert [dict(r) for r in bm25] == _formato_antigo(buscador.bm25_retriever.retrieve(consulta), "BM25")
+
+        bundle = buscador._query_bundle(consulta)
+        esperado = referencia_densa.retrieve(bundle)
+        assert [dict(r) for r in buscador.buscar_embeddings(consulta)] == _formato_antigo(esperado, "Embeddings")
+
+        hibrido = buscador.buscar_hibrido(consulta)
+        assert hibrido == _formato_antigo_hibrido(referencia_hibrida.retrieve(bundle))
+        # Resultados se comportam como os dicts de antes (acesso, get, in, cópia)
+        r = hibrido[0]
+        assert r["metadata"]["enunciado"].startswith("<p>") and r.get("texto_completo") is None and "conteudo" in r
+        assert copy.deepcopy(r).acervo is r.acervo
+    print(f"✓ Paridade em {len(consultas)} consultas (BM25, denso e híbrido)")
+
+
+def _bytes_retidos(funcao):
+    """Bytes que continuam alocados depois de `funcao()` (o retorno é mantido vivo)."""
+    tracemalloc.start()
+    antes = tracemalloc.get_traced_memory()[0]
+    retido = funcao()
+    depois = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return depois - antes, retido
+
+
+def _pico_por_consulta(funcao, consultas):
+    """Maior alocação transitória de uma consulta (pico acima do que já estava alocado)."""
+    picos = []
+    tracemalloc.start()
+    for consulta in consultas:
+        atual = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        funcao(consulta)
+        picos.append(tracemalloc.get_traced_memory()[1] - atual)
+    tracemalloc.stop()
+    return float(np.median(picos))
+
+
+def _memoria(buscador, documentos, consultas):
+    """Memória por documento indexado e alocação por consulta, antes e depois."""
+    n = len(documentos)
+    # Por documento: corpus tokenizado que o BM25RetrieverCustom mantinha vs. acervo em colunas
+    tokenizar = buscador.preprocessador.tokenizador_pt_remove_html
+    corpus, _ = _bytes_retidos(lambda: [tokenizar(node.get_content()) for node in buscador.nodes])
+    acervo, _ = _bytes_retidos(lambda: _acervo(documentos, buscador.nodes))
+    print(f"Por documento: corpus tokenizado retido {corpus / n:.0f} B (removido); acervo {acervo / n:.0f} B")
+    assert corpus > acervo
+
+    # Por consulta (top-10): resultados retidos (ex.: entradas do cache) e pico de alocação
+    referencia_densa = buscador.vector_index.as_retriever(similarity_top_k=10)
+    antigos, _ = _bytes_retidos(lambda: [_formato_antigo(referencia_densa.retrieve(buscador._query_bundle(c)), "Embeddings") for c in consultas])
+    novos, _ = _bytes_retidos(lambda: [buscador.buscar_embeddings(c) for c in consultas])
+    print(f"Resultados retidos por consulta: dicts {antigos / len(consultas):.0f} B, registros {novos / len(consultas):.0f} B")
+    assert novos < antigos
+
+    pico_antigo = _pico_por_consulta(
+        lambda c: _formato_antigo(referencia_densa.retrieve(buscador._query_bundle(c)), "Embeddings"), consultas)
+    pico_novo = _pico_por_consulta(buscador.buscar_embeddings, consultas)
+    print(f"Pico de alocação por consulta densa: docstore + dicts {pico_antigo / 1024:.1f} KiB, "
+          f"nós em memória + registros {pico_novo / 1024:.1f} KiB")
+    assert pico_novo < pico_antigo
+
+
+def _acervo(documentos, nodes):
+    acervo = AcervoDocumentos()
+    acervo.adicionar(documentos, [node.text for node in nodes])
+    return acervo
+
+
+def teste_acervo_resultados():
+    print("--- Iniciando Teste do Acervo e dos Registros de Resultado ---")
+    # O QueryFusionRetriever exige um LLM padrão, não usado com num_queries=1
+    Settings.llm = MockLLM()
+    documentos = _documentos(2000)
+    buscador = _buscador(documentos)
+    rng = np.random.default_rng(1)
+    consultas = [" ".join(f"termo{t}" for t in rng.integers(0, 400, size=4)) for _ in range(30)]
+    _paridade(buscador, consultas)
+    _memoria(buscador, documentos, consultas)
+    print("\n--- Teste do Acervo e dos Registros de Resultado Concluído ---")
+
+
+if __name__ == "__main__":
+    teste_acervo_resultados()
@@ -0,0 +1,60 @@
+import json
+import os
+import sys
+
+# Adicionar o diretório raiz do projeto ao sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.servidor_gemini_fake import ServidorGeminiFake
+from src.utils.gemini import BackendFake, BackendOpenAI, ClienteGemini
+
+SCHEMA_PERGUNTA = {
+    "type": "object",
+    "properties": {"question": {"type": "string"}, "rationale": {"type": "string"}},
+    "required": ["question", "rationale"],
+}
+
+
+def _backend_fake():
+    """Fake determinístico: respeita o schema, injeta 429 e latência."""
+    gen_config = {"response_mime_type": "application/json", "response_schema": SCHEMA_PERGUNTA, "temperature": 0}
+    backend = BackendFake(latencia=0.05, falhas_429=2)
+    cliente = ClienteGemini(rpm=600, backoff_base=0.01, backoff_max=0.1, backend=backend)
+
+    r1 = json.loads(cliente.gerar("prompt X", gen_config))
+    r2 = json.loads(cliente.gerar("prompt X", gen_config))
+    r3 = json.loads(cliente.gerar("prompt Y", gen_config))
+    print(f"Resposta fake: {r1} (estatísticas {cliente.estatisticas})")
+    assert set(r1) == {"question", "rationale"} and r1 == r2 and r1 != r3
+    assert cliente.estatisticas["retentativas"] == 2
+
+    schema_lote = {"type": "array", "items": {"type": "object", "properties": {"id": {"type": "integer"}, "question": {"type": "string"}}}}
+    lote = json.loads(BackendFake().gerar("### Caso 0\na\n### Caso 1\nb\n### Caso 2\nc", {"response_schema": schema_lote}, "m"))
+    assert [item["id"] for item in lote] == [0, 1, 2]
+    print("✓ Backend fake determinístico, com schema e 429")
+
+
+def _backend_openai():
+    """Endpoint compatível com OpenAI (servidor fake local), com 429 refeito pelo cliente."""
+    with ServidorGeminiFake(falhas_429=1) as servidor:
+        backend = BackendOpenAI(url=servidor.endpoint, modelo="modelo-local")
+        corpo = backend._corpo("p", {"response_schema": {"type": "OBJECT", "properties": {"a": {"type": "STRING"}}}}, "m")
+        assert corpo["response_format"]["json_schema"]["schema"]["type"] == "object"
+
+        cliente = ClienteGemini(rpm=600, backoff_base=0.01, backoff_max=0.1, backend=backend)
+        respostas = [json.loads(cliente.gerar(f"prompt {i}", {"response_mime_type": "application/json"})) for i in range(3)]
+        print(f"Respostas OpenAI: {respostas[0]} | requisições no servidor: {servidor.requisicoes}")
+        assert all("question" in r for r in respostas)
+        assert servidor.requisicoes == 4 and cliente.estatisticas["retentativas"] == 1
+    print("✓ Backend OpenAI-compatível funcionando")
+
+
+def teste_backends_llm():
+    print("--- Iniciando Teste dos Backends LLM ---")
+    _backend_fake()
+    _backend_openai()
+    print("\n--- Teste dos Backends LLM Concluído ---")
+
+
+if __name__ == "__main__":
+    teste_backends_llm()
@@ -16,6 +16,7 @@ load_dotenv()
 # Imports da estrutura modular
 from src.buscador_hibrido import BuscadorHibridoLlamaIndex
 from src.utils.dados import criar_dados_exemplo
+from src.utils.logs import configurar_logs
 
 def testar_com_dados_exemplo():
     """Testa o sistema com dados de exemplo"""
@@ -141,6 +142,8 @@ def testar_configuracoes_hibridas():
             print(f"  {i}. ID: {resultado['id']} | Score: {resultado['score']:.4f}")
 
 if __name__ == "__main__":
+    # Logs por consulta (banners da busca híbrida e do reranking)
+    configurar_logs(verboso=True)
     # Teste rápido com dados de exemplo
     testar_com_dados_exemplo()
 
@@ -16,6 +16,7 @@ load_dotenv()
 # Imports da estrutura modular
 from src.buscador_hibrido import BuscadorHibridoLlamaIndex
 from src.utils.dados import carregar_dados_juris_tcu
+from src.utils.logs import configurar_logs
 
 
 def testar_reranker_com_dados_reais():
@@ -77,6 +78,8 @@ def testar_reranker_com_dados_reais():
 
 
 if __name__ == "__main__":
+    # Logs por consulta (banners da busca híbrida e do reranking)
+    configurar_logs(verboso=True)
 
     # Teste do Reranker
     testar_reranker_com_dados_reais()
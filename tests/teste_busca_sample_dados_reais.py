@@ -16,6 +16,7 @@ load_dotenv()
 # Imports da estrutura modular
 from src.buscador_hibrido import BuscadorHibridoLlamaIndex
 from src.utils.dados import carregar_dados_juris_tcu, criar_dados_exemplo
+from src.utils.logs import configurar_logs
 
 def testar_com_dados_reais():
     """Testa o sistema com dados reais do jurisTCU"""
@@ -117,6 +118,8 @@ def testar_com_dados_reais():
 
 
 if __name__ == "__main__":
+    # Logs por consulta (banners da busca híbrida e do reranking)
+    configurar_logs(verboso=True)
 
     # Teste com dados reais
     testar_com_dados_reais()
@@ -0,0 +1,60 @@
+import os
+import sys
+import tempfile
+
+# Adicionar o diretório raiz do projeto ao sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.cache import CacheEmbeddingsConsulta, normalizar_consulta
+
+
+def teste_cache_embeddings():
+    """
+    Testa o cache LRU de embeddings de consulta sem carregar modelos:
+    1) Consultas repetidas (com variação de espaços) viram hits
+    2) A capacidade é respeitada com despejo do item menos recente
+    3) O cache sobrevive a salvar/carregar em disco
+    4) Um arquivo gravado com outro modelo de embeddings é descartado
+    """
+    print("--- Iniciando Teste do Cache de Embeddings de Consulta ---")
+
+    chamadas = []
+
+    def gerar_fake(texto):
+        chamadas.append(texto)
+        return [float(len(texto)), 1.0]
+
+    cache = CacheEmbeddingsConsulta(capacidade=2, modelo="modelo-a")
+    cache.obter("técnica e preço", gerar_fake)
+    cache.obter("  técnica   e preço ", gerar_fake)
+    assert chamadas == ["técnica e preço"], f"Esperado 1 embedding gerado, obtido: {chamadas}"
+    assert normalizar_consulta(" restos\ta  pagar ") == "restos a pagar"
+
+    cache.obter("restos a pagar", gerar_fake)
+    cache.obter("técnica e preço", gerar_fake)  # torna 'técnica e preço' o mais recente
+    cache.obter("dispensa de licitação", gerar_fake)  # despeja 'restos a pagar'
+    assert len(cache) == 2
+    cache.obter("restos a pagar", gerar_fake)
+    assert chamadas.count("restos a pagar") == 2, "Consulta despejada deveria ser recalculada"
+
+    stats = cache.estatisticas()
+    print(f"Estatísticas: {stats}")
+    assert stats["hits"] == 2 and stats["misses"] == 4
+
+    with tempfile.TemporaryDirectory() as tmp:
+        caminho = os.path.join(tmp, "cache.json")
+        cache.salvar(caminho)
+        recarregado = CacheEmbeddingsConsulta(capacidade=2, caminho=caminho, modelo="modelo-a")
+        assert len(recarregado) == 2
+        recarregado.obter("restos a pagar", gerar_fake)
+        assert recarregado.estatisticas()["hits"] == 1
+
+        outro_modelo = CacheEmbeddingsConsulta(capacidade=2, caminho=caminho, modelo="modelo-b")
+        assert len(outro_modelo) == 0, "Embeddings de outro modelo não podem ser reaproveitados"
+
+    print("✓ Cache de embeddings de consulta funcionando")
+    print("\n--- Teste do Cache de Embeddings Concluído ---")
+
+
+if __name__ == "__main__":
+    teste_cache_embeddings()
@@ -0,0 +1,57 @@
+import os
+import sys
+import tempfile
+from unittest import mock
+
+# Adicionar o diretório raiz do projeto ao sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.servidor_gemini_fake import ServidorGeminiFake
+from src.utils.gemini import CacheRespostasLLM, ClienteGemini, RespostaAusenteNoCache
+
+
+def teste_cache_respostas_llm():
+    """
+    Testa o cache persistente de respostas do LLM contra o servidor fake:
+    1) A segunda execução do mesmo prompt/config não chega ao servidor
+    2) Mudar a configuração de geração muda a chave
+    3) O cache sobrevive a uma nova instância (mesmo arquivo SQLite)
+    4) Modo replay serve os hits sem rede e falha em prompts ausentes
+    """
+    print("--- Iniciando Teste do Cache de Respostas LLM ---")
+    gen_config = {"response_mime_type": "application/json", "temperature": 0}
+
+    with tempfile.TemporaryDirectory() as tmp, ServidorGeminiFake() as servidor, mock.patch.dict(os.environ, {
+        "GOOGLE_API_KEY": os.getenv("GOOGLE_API_KEY") or "chave-fake",
+        "GEMINI_API_ENDPOINT": servidor.endpoint,
+    }):
+        caminho = os.path.join(tmp, "cache_llm.sqlite")
+
+        cache = CacheRespostasLLM(caminho)
+        cliente = ClienteGemini(rpm=600, cache=cache)
+        primeira = cliente.gerar("prompt A", gen_config)
+        segunda = cliente.gerar("prompt A", gen_config)
+        assert primeira == segunda and servidor.requisicoes == 1
+        cliente.gerar("prompt A", {**gen_config, "temperature": 0.5})
+        assert servidor.requisicoes == 2, "Config diferente deveria gerar outra chave"
+        print(f"Estatísticas (leitura_escrita): {cache.estatisticas()}")
+        assert cache.estatisticas()["hits"] == 1 and cache.estatisticas()["gravacoes"] == 2
+        cache.fechar()
+
+        replay = CacheRespostasLLM(caminho, modo="replay")
+        cliente_replay = ClienteGemini(rpm=600, cache=replay)
+        assert cliente_replay.gerar("prompt A", gen_config) == primeira
+        try:
+            cliente_replay.gerar("prompt inédito", gen_config)
+            raise AssertionError("Replay deveria falhar para prompt ausente")
+        except RespostaAusenteNoCache as e:
+            print(f"✓ Replay recusou prompt ausente: {e}")
+        assert servidor.requisicoes == 2, "Replay não deveria acessar o servidor"
+        print(f"Estatísticas (replay): {replay.estatisticas()}")
+        replay.fechar()
+
+    print("\n--- Teste do Cache de Respostas LLM Concluído ---")
+
+
+if __name__ == "__main__":
+    teste_cache_respostas_llm()
@@ -0,0 +1,73 @@
+import os
+import sys
+import threading
+import time
+
+# Adicionar o diretório raiz do projeto ao sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.cache import CacheResultados
+
+
+def teste_cache_resultados():
+    """
+    Testa o cache de resultados completos sem carregar modelos:
+    1) Chaves com outra versão de índice não reaproveitam resultados
+    2) Entradas expiram após o TTL
+    3) Chamadas concorrentes idênticas executam um único cálculo (single-flight)
+    """
+    print("--- Iniciando Teste do Cache de Resultados ---")
+
+    agora = [0.0]
+    cache = CacheResultados(capacidade=2, ttl_segundos=10, relogio=lambda: agora[0])
+    calculos = []
+
+    def calcular(valor):
+        calculos.append(valor)
+        return [{"id": valor}]
+
+    chave_v1 = ("restos a pagar", 10, True, 1)
+    chave_v2 = ("restos a pagar", 10, True, 2)
+    cache.obter_ou_calcular(chave_v1, lambda: calcular("v1"))
+    cache.obter_ou_calcular(chave_v1, lambda: calcular("v1"))
+    cache.obter_ou_calcular(chave_v2, lambda: calcular("v2"))
+    assert calculos == ["v1", "v2"], f"Cálculos inesperados: {calculos}"
+
+    agora[0] = 11.0
+    cache.obter_ou_calcular(chave_v1, lambda: calcular("v1"))
+    assert calculos == ["v1", "v2", "v1"], "Entrada expirada deveria ser recalculada"
+
+    lento = CacheResultados()
+    contador = []
+    inicio = threading.Event()
+
+    def calculo_lento():
+        contador.append(1)
+        time.sleep(0.2)
+        return ["resultado"]
+
+    resultados = []
+
+    def worker():
+        inicio.wait()
+        resultados.append(lento.obter_ou_calcular(("técnica e preço", 20, True, 1), calculo_lento))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    inicio.set()
+    for t in threads:
+        t.join()
+
+    stats = lento.estatisticas()
+    print(f"Estatísticas (concorrência): {stats}")
+    assert len(contador) == 1, f"Esperado 1 cálculo, obtido {len(contador)}"
+    assert all(r == ["resultado"] for r in resultados) and len(resultados) == 8
+    assert stats["misses"] == 1 and stats["colapsadas"] + stats["hits"] == 7
+
+    print("✓ Cache de resultados funcionando")
+    print("\n--- Teste do Cache de Resultados Concluído ---")
+
+
+if __name__ == "__main__":
+    teste_cache_resultados()
@@ -0,0 +1,48 @@
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+# Adicionar o diretório raiz do projeto ao sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.checkpoint import CheckpointJsonl
+
+
+def teste_checkpoint():
+    """
+    Testa o checkpoint JSONL:
+    1) Registros com escalares numpy são gravados e recarregados por chave
+    2) Uma última linha truncada (interrupção na escrita) é ignorada
+    3) Chaves repetidas: vale o último registro
+    4) Um registro novo após a linha truncada não é corrompido
+    """
+    print("--- Iniciando Teste do Checkpoint JSONL ---")
+    with tempfile.TemporaryDirectory() as tmp:
+        checkpoint = CheckpointJsonl(os.path.join(tmp, "sub", "checkpoint.jsonl"))
+        assert not checkpoint.existe() and checkpoint.carregar() == {}
+
+        checkpoint.registrar({"QUERY_ID": np.int64(1), "ranking": [{"DOC_ID": 7, "RERANK_SCORE": np.float32(0.5)}]})
+        checkpoint.registrar({"QUERY_ID": 2, "ranking": []})
+        checkpoint.registrar({"QUERY_ID": 2, "ranking": [{"DOC_ID": 9, "RERANK_SCORE": 0.1}]})
+        with open(checkpoint.caminho, "a", encoding="utf-8") as f:
+            f.write('{"QUERY_ID": 3, "rank')
+
+        registros = checkpoint.carregar()
+        print(f"Registros recarregados: {sorted(registros)}")
+        assert sorted(registros) == [1, 2]
+        assert registros[1]["ranking"][0]["RERANK_SCORE"] == 0.5
+        assert registros[2]["ranking"][0]["DOC_ID"] == 9
+
+        checkpoint.registrar({"QUERY_ID": 3, "ranking": []})
+        assert sorted(checkpoint.carregar()) == [1, 2, 3]
+
+        checkpoint.reiniciar()
+        assert not checkpoint.existe()
+
+    print("\n--- Teste do Checkpoint JSONL Concluído ---")
+
+
+if __name__ == "__main__":
+    teste_checkpoint()
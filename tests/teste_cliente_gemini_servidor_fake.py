@@ -0,0 +1,78 @@
+import asyncio
+import os
+import sys
+import time
+from unittest import mock
+
+# Adicionar o diretório raiz do projeto ao sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.servidor_gemini_fake import ServidorGeminiFake
+from src.utils.gemini import ClienteGemini, LimitadorTaxa, _eh_retentavel, importar_genai
+
+
+def _limitador_taxa():
+    """Token bucket com relógio fake: rajada inicial e depois ritmo de rpm/60 por segundo."""
+    agora = [0.0]
+    limitador = LimitadorTaxa(rpm=60, tpm=600, relogio=lambda: agora[0])
+    esperas = [limitador.reservar(tokens=5) for _ in range(60)]
+    assert all(e == 0 for e in esperas), "Rajada de um minuto de cota deveria passar sem espera"
+    assert abs(limitador.reservar(tokens=5) - 1.0) < 1e-9, "61ª requisição deveria aguardar 1s"
+    agora[0] = 10.0
+    # 10s depois: saldo de tokens = 600 - 61*5 + 10s * 10 tokens/s = 395 < 500
+    assert limitador.reservar(tokens=500) > 0, "Limite de tokens por minuto deveria segurar a requisição"
+    print("✓ Limitador de taxa (rpm/tpm) funcionando")
+
+
+def _erros_retentaveis():
+    """Códigos 429/500/503 só contam como palavra inteira."""
+    assert _eh_retentavel("429 RESOURCE_EXHAUSTED") and _eh_retentavel("500 Internal error")
+    assert _eh_retentavel("503 UNAVAILABLE") and _eh_retentavel("ServiceUnavailable: tente depois")
+    assert not _eh_retentavel("400 INVALID_ARGUMENT: token limit 1500 exceeded")
+    assert not _eh_retentavel("request req-4290 failed: 404 NOT_FOUND")
+    print("✓ Classificação de erros retentáveis")
+
+
+def teste_cliente_gemini_servidor_fake():
+    """
+    Testa o ClienteGemini contra um servidor REST local que imita o Gemini:
+    1) Respostas 429 são refeitas com backoff até o sucesso
+    2) A concorrência no servidor respeita `max_concorrencia`
+    3) Chamadas assíncronas concorrentes chegam ao servidor em paralelo
+    """
+    print("--- Iniciando Teste do Cliente Gemini (servidor fake) ---")
+    _limitador_taxa()
+    _erros_retentaveis()
+
+    with ServidorGeminiFake(falhas_429=3, latencia=0.2) as servidor, mock.patch.dict(os.environ, {
+        "GOOGLE_API_KEY": os.getenv("GOOGLE_API_KEY") or "chave-fake",
+        "GEMINI_API_ENDPOINT": servidor.endpoint,
+    }):
+        cliente = ClienteGemini(rpm=600, max_concorrencia=4, backoff_base=0.05, backoff_max=0.5)
+        gen_config = {"response_mime_type": "application/json", "temperature": 0}
+
+        async def _rodar():
+            return await asyncio.gather(*[
+                cliente.gerar_async(f"prompt {i}", gen_config) for i in range(12)
+            ])
+
+        importar_genai()  # custo do import do SDK fora da medição
+        inicio = time.perf_counter()
+        respostas = asyncio.run(_rodar())
+        duracao = time.perf_counter() - inicio
+
+        print(f"Requisições no servidor: {servidor.requisicoes} (429 injetados: {servidor.respostas_429})")
+        print(f"Concorrência máxima observada: {servidor.concorrencia_max}")
+        print(f"Estatísticas do cliente: {cliente.estatisticas}")
+        print(f"Duração: {duracao:.2f}s para {len(respostas)} chamadas")
+
+        assert all(r and "question" in r for r in respostas)
+        assert cliente.estatisticas["retentativas"] == 3
+        assert servidor.requisicoes == 15
+        assert 1 < servidor.concorrencia_max <= 4, "Chamadas deveriam chegar ao servidor em paralelo"
+
+    print("\n--- Teste do Cliente Gemini Concluído ---")
+
+
+if __name__ == "__main__":
+    teste_cliente_gemini_servidor_fake()
@@ -0,0 +1,95 @@
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+# Adicionar o diretório raiz do projeto ao sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.run_comparar_execucoes import avaliar_execucoes, comparar
+from src.utils.significancia import aleatorizacao_pareada, beta_incompleta, t_pareado
+
+
+def _gravar_execucao(caminho, qrels, acerto, semente, prefixo=""):
+    """Execução sintética: cada documento relevante entra no top 10 com probabilidade `acerto`."""
+    rng = np.random.default_rng(semente)
+    linhas = []
+    for qid, grupo in qrels.groupby("QUERY_ID"):
+        docs = [d for d in grupo["DOC_ID"] if rng.random() < acerto]
+        docs += list(rng.integers(100_000, 200_000, size=10 - len(docs)))
+        rng.shuffle(docs)
+        linhas += [(qid, f"{prefixo}{d}", 1.0 / (r + 1), r + 1) for r, d in enumerate(docs)]
+    pd.DataFrame(linhas, columns=["QUERY_ID", "DOC_ID", "RERANK_SCORE", "RANK"]).to_csv(caminho, index=False)
+
+
+def teste_comparar_execucoes():
+    """
+    Testa a comparação de execuções:
+    1) Beta incompleta e teste t pareado contra valores de referência
+    2) Teste de aleatorização: diferença nula -> p alto; diferença clara -> p baixo
+    3) Avaliação em processos paralelos = avaliação sequencial; DOC_ID com prefixo textual
+    4) Tabela comparativa e diferenças por query em relação à referência
+    5) Execução sem parte das queries: comparação restrita às queries comuns
+    """
+    print("--- Iniciando Teste da Comparação de Execuções ---")
+    # I_0.5(2, 3) = 0.6875; t pareado de [1..5] x [1,1,2,2,3]: t = 3.2071, p = 0.03268 (df = 4)
+    assert abs(beta_incompleta(2, 3, 0.5) - 0.6875) < 1e-12
+    t, p = t_pareado([1, 2, 3, 4, 5], [1, 1, 2, 2, 3])
+    print(f"t={t:.4f} p={p:.4f}")
+    assert abs(t - 3.2071349) < 1e-6 and abs(p - 0.0326779) < 1e-6
+    assert t_pareado([1, 2], [1, 2]) == (0.0, 1.0)
+
+    rng = np.random.default_rng(0)
+    a = rng.random(200)
+    assert aleatorizacao_pareada(a, a + rng.normal(0, 0.01, 200), n_permutacoes=2000) > 0.01
+    assert aleatorizacao_pareada(a + 0.1, a, n_permutacoes=2000) < 0.001
+    print("✓ Testes de significância")
+
+    qrels = pd.DataFrame({
+        "QUERY_ID": np.repeat(np.arange(1, 61), 3),
+        "DOC_ID": np.arange(1, 181),
+        "SCORE": 1,
+    })
+    with tempfile.TemporaryDirectory() as tmp:
+        caminhos = [os.path.join(tmp, f"{nome}.csv") for nome in ("base", "melhor", "igual")]
+        _gravar_execucao(caminhos[0], qrels, acerto=0.3, semente=1, prefixo="JURISPRUDENCIA-SELECIONADA-")
+        _gravar_execucao(caminhos[1], qrels, acerto=0.9, semente=2)
+        _gravar_execucao(caminhos[2], qrels, acerto=0.3, semente=1)
+
+        paralelo = avaliar_execucoes(caminhos, qrels, k=[5, 10], workers=2)
+        sequencial = avaliar_execucoes(caminhos, qrels, k=[5, 10], workers=1)
+        assert list(paralelo) == ["base", "melhor", "igual"]
+        for nome in paralelo:
+            pd.testing.assert_frame_equal(paralelo[nome], sequencial[nome])
+        print("✓ Avaliação paralela igual à sequencial")
+
+        tabela, deltas = comparar(paralelo, "base", n_permutacoes=2000)
+        print(tabela.to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+        linha = tabela[(tabela["EXECUCAO"] == "melhor") & (tabela["METRICA"] == "R@10")].iloc[0]
+        assert linha["DELTA"] > 0.4 and linha["P_T"] < 0.001 and linha["P_ALEATORIZACAO"] < 0.001
+        linha = tabela[(tabela["EXECUCAO"] == "igual") & (tabela["METRICA"] == "nDCG@10")].iloc[0]
+        assert linha["DELTA"] == 0 and linha["P_T"] == 1.0
+        assert tabela[tabela["EXECUCAO"] == "base"]["DELTA"].isna().all()
+        assert len(deltas) == 2 * 60 and set(deltas["EXECUCAO"]) == {"melhor", "igual"}
+        assert (deltas[deltas["EXECUCAO"] == "igual"][["P@5", "nDCG@10"]] == 0).all().all()
+        print("✓ Tabela comparativa")
+
+        parcial = os.path.join(tmp, "parcial.csv")
+        execucao = pd.read_csv(caminhos[2])
+        execucao[execucao["QUERY_ID"] > 10].to_csv(parcial, index=False)
+        por_execucao = avaliar_execucoes([caminhos[0], parcial], qrels, k=[10], workers=1)
+        assert len(por_execucao["base"]) == 60 and len(por_execucao["parcial"]) == 50
+        tabela, deltas = comparar(por_execucao, "base", n_permutacoes=200)
+        assert len(deltas) == 50 and deltas["QUERY_KEY"].min() == 11
+        assert (deltas["nDCG@10"] == 0).all()
+        linha = tabela[(tabela["EXECUCAO"] == "base") & (tabela["METRICA"] == "nDCG@10")].iloc[0]
+        assert linha["MEDIA"] == por_execucao["base"]["nDCG@10"].iloc[10:].mean()
+        print("✓ Queries ausentes descartadas antes da comparação")
+
+    print("\n--- Teste da Comparação de Execuções Concluído ---")
+
+
+if __name__ == "__main__":
+    teste_comparar_execucoes()
@@ -0,0 +1,143 @@
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+# Adicionar o diretório raiz do projeto ao sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.corpus import CorpusColunar, carregar_corpus, diretorio_corpus
+from src.utils.dados import carregar_dados_juris_tcu, load_docs_enunciado_map_clean
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _gravar_csv(caminho, n, semente=0):
+    """doc.csv sintético com HTML, acentos, aspas/quebras de linha e uma linha sem número em KEY."""
+    rng = np.random.default_rng(semente)
+    vocabulario = ["licitação", "contrato", "pregão", "órgão", "dispensa", "\"obras\"", "serviços", "TCU", "análise"]
+    linhas = []
+    for i in range(n):
+        palavras = rng.choice(vocabulario, size=int(rng.integers(10, 40)))
+        linhas.append({
+            "KEY": f"JURISPRUDENCIA-SELECIONADA-{1000 + i}",
+            "ENUNCIADO": "<p>" + " ".join(palavras[:8]) + "</p>\n<p><b>" + " ".join(palavras[8:]) + "</b></p>",
+            "EXCERTO": " ".join(rng.choice(vocabulario, size=int(rng.integers(50, 150)))),
+        })
+    linhas[1]["KEY"] = "SEM-NUMERO"
+    linhas[2]["EXCERTO"] = ""
+    pd.DataFrame(linhas).to_csv(caminho, index=False)
+
+
+def _carregar_antigo(caminho_csv, limite=None):
+    """carregar_dados_juris_tcu antes do corpus em colunas (iterrows)."""
+    df = pd.read_csv(caminho_csv)
+    if limite:
+        df = df.head(limite)
+    return [(str(row.get('KEY', idx)), str(row.get('ENUNCIADO', '')), str(row.get('EXCERTO', '')))
+            for idx, row in df.iterrows()]
+
+
+def _mapa_antigo(caminho_csv):
+    """load_docs_enunciado_map_clean antes do corpus em colunas (remove_html por linha)."""
+    df = pd.read_csv(caminho_csv, dtype=str, encoding="utf-8").fillna("")
+    df["NUM"] = df["KEY"].astype(str).str.extract(r"(\d+)$")
+    df["NUM"] = pd.to_numeric(df["NUM"], errors="coerce")
+    df = df.dropna(subset=["NUM"]).astype({"NUM": int})
+    df["ENUNCIADO_CLEAN"] = df["ENUNCIADO"].apply(lambda x: re.sub("<[^>]*>", "", x).strip() if x else "")
+    return df.set_index("NUM")["ENUNCIADO_CLEAN"].to_dict()
+
+
+def _medir(funcao, repeticoes=3):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos) * 1000
+
+
+def _paridade(caminho_csv):
+    """Loaders sobre o corpus em colunas == loaders antigos sobre o CSV."""
+    for limite in (None, 10):
+        documentos = carregar_dados_juris_tcu(caminho_csv, limite=limite)
+        # Célula vazia: antes virava "nan" (str(NaN)), agora fica ""
+        esperado = [(chave, enunciado, "" if excerto == "nan" else excerto)
+                    for chave, enunciado, excerto in _carregar_antigo(caminho_csv, limite)]
+        assert [(d.id, d.enunciado, d.excerto) for d in documentos] == esperado
+    # Mesmo texto sem HTML, agora com os espaços colapsados ("</p>\n<p>" -> " ")
+    esperado = {doc_id: " ".join(texto.split()) for doc_id, texto in _mapa_antigo(caminho_csv).items()}
+    assert load_docs_enunciado_map_clean(caminho_csv) == esperado
+
+    corpus = carregar_corpus(caminho_csv)
+    assert isinstance(corpus.ids, np.memmap) and corpus.ids[1] == -1
+    assert corpus.enunciado_limpo(1005) == esperado[1005]
+    assert corpus.enunciado_limpo(999_999) is None and corpus.posicao(-1) is None
+    print(f"✓ Paridade com os loaders antigos ({len(corpus)} documentos)")
+
+
+def _reconstrucao(caminho_csv):
+    """Mesma instância enquanto o CSV não muda; CSV alterado -> colunas reconstruídas."""
+    corpus = carregar_corpus(caminho_csv)
+    assert carregar_corpus(caminho_csv) is corpus
+    _gravar_csv(caminho_csv, 50, semente=7)
+    novo = carregar_corpus(caminho_csv)
+    assert novo is not corpus and len(novo) == 50
+    assert novo.coluna("excerto")[0] == pd.read_csv(caminho_csv)["EXCERTO"][0]
+    print("✓ Colunas reconstruídas quando o CSV muda")
+
+
+def _outro_processo(caminho_csv):
+    """Outro processo reabre as colunas gravadas, sem reconstruí-las."""
+    carregar_corpus(caminho_csv)
+    meta = os.path.join(diretorio_corpus(caminho_csv), "meta.json")
+    antes = os.stat(meta).st_mtime_ns
+    codigo = (
+        "import sys; sys.path.insert(0, sys.argv[1]);"
+        "from src.utils.corpus import carregar_corpus;"
+        "print(len(carregar_corpus(sys.argv[2]).mapa_enunciados_limpos()))"
+    )
+    saida = subprocess.run([sys.executable, "-c", codigo, BASE_DIR, caminho_csv], capture_output=True, text=True, check=True)
+    assert "gravado" not in saida.stdout and int(saida.stdout.split()[-1]) == 49
+    assert os.stat(meta).st_mtime_ns == antes
+    print("✓ Outro processo reabre as colunas por mmap, sem reconstruir")
+
+
+def _tempo(caminho_csv, n):
+    """Tempo de carregamento: CSV (loaders antigos) vs. reabrir as colunas."""
+    _gravar_csv(caminho_csv, n, semente=1)
+    inicio = time.perf_counter()
+    carregar_corpus(caminho_csv)
+    construcao = (time.perf_counter() - inicio) * 1000
+
+    diretorio = diretorio_corpus(caminho_csv)
+    abrir = _medir(lambda: CorpusColunar(diretorio))
+    documentos_antigo = _medir(lambda: _carregar_antigo(caminho_csv), 1)
+    documentos_novo = _medir(lambda: CorpusColunar(diretorio).documentos())
+    mapa_antigo = _medir(lambda: _mapa_antigo(caminho_csv), 1)
+    mapa_novo = _medir(lambda: CorpusColunar(diretorio).mapa_enunciados_limpos())
+    print(f"Corpus sintético de {n} documentos: construção única {construcao:.0f} ms, abrir colunas {abrir:.2f} ms")
+    print(f"  Documentos: CSV + iterrows {documentos_antigo:.0f} ms -> colunas {documentos_novo:.0f} ms")
+    print(f"  Mapa de enunciados limpos: CSV + remove_html {mapa_antigo:.0f} ms -> colunas {mapa_novo:.0f} ms")
+    assert documentos_novo < documentos_antigo and mapa_novo < mapa_antigo
+
+
+def teste_corpus_colunar():
+    print("--- Iniciando Teste do Corpus em Colunas ---")
+    with tempfile.TemporaryDirectory() as tmp:
+        caminho_csv = os.path.join(tmp, "doc.csv")
+        _gravar_csv(caminho_csv, 200)
+        _paridade(caminho_csv)
+        _reconstrucao(caminho_csv)
+        _outro_processo(caminho_csv)
+        _tempo(caminho_csv, 20_000)
+    print("\n--- Teste do Corpus em Colunas Concluído ---")
+
+
+if __name__ == "__main__":
+    teste_corpus_colunar()
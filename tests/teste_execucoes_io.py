@@ -0,0 +1,105 @@
+import os
+import re
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+# Adicionar o diretório raiz do projeto ao sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.execucoes import (
+    extrair_doc_id_numerico,
+    gravar_execucao,
+    gravar_qrels,
+    iterar_execucao,
+    ler_execucao,
+    ler_qrels,
+)
+from src.utils.metricas import metricas_de_arquivos
+
+
+def _extrair_por_linha(value):
+    """Extração antiga (regex por linha), como referência."""
+    if pd.isna(value):
+        return None
+    m = re.search(r"(\d+)$", str(value))
+    return int(m.group(1)) if m else None
+
+
+def teste_execucoes_io():
+    """
+    Testa a camada de I/O de execuções:
+    1) Extração vetorizada do DOC_ID numérico = regex por linha (ids textuais, numéricos e inválidos)
+    2) CSV -> .npy -> TREC -> CSV preserva QUERY_ID, DOC_ID_NUM, RANK e score
+    3) Leitura em blocos = leitura inteira
+    4) Qrels TREC e métricas iguais para a mesma execução em formatos diferentes
+    """
+    print("--- Iniciando Teste de I/O de Execuções ---")
+    ids = pd.Series(["JURISPRUDENCIA-SELECIONADA-85434", "123", "SEM-NUMERO", None, "X-7"])
+    esperado = [_extrair_por_linha(v) for v in ids]
+    obtido = extrair_doc_id_numerico(ids)
+    assert [None if pd.isna(v) else int(v) for v in obtido] == esperado
+
+    rng = np.random.default_rng(0)
+    n_queries, profundidade = 300, 20
+    execucao = pd.DataFrame({
+        "QUERY_ID": np.repeat(np.arange(1, n_queries + 1), profundidade),
+        "DOC_ID": [f"JURISPRUDENCIA-SELECIONADA-{d}" for d in rng.integers(1, 2000, n_queries * profundidade)],
+        "RERANK_SCORE": rng.random(n_queries * profundidade).astype(np.float32).astype(float),
+        "RANK": np.tile(np.arange(1, profundidade + 1), n_queries),
+    })
+    qrels = pd.DataFrame({
+        "QUERY_ID": np.repeat(np.arange(1, n_queries + 1), 4),
+        "DOC_ID": rng.integers(1, 2000, n_queries * 4),
+        "SCORE": rng.integers(1, 3, n_queries * 4),
+    })
+    colunas = ["QUERY_ID", "DOC_ID_NUM", "RANK", "RERANK_SCORE"]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        caminho_csv = os.path.join(tmp, "run.csv")
+        execucao.to_csv(caminho_csv, index=False)
+        base = ler_execucao(caminho_csv)
+        assert list(base["DOC_ID_NUM"]) == [_extrair_por_linha(v) for v in execucao["DOC_ID"]]
+
+        caminho_npy, caminho_trec, caminho_csv2 = (os.path.join(tmp, f"run{e}") for e in (".npy", ".trec", "2.csv"))
+        gravar_execucao(base, caminho_npy)
+        gravar_execucao(ler_execucao(caminho_npy), caminho_trec)
+        gravar_execucao(ler_execucao(caminho_trec), caminho_csv2)
+        for caminho in (caminho_npy, caminho_trec, caminho_csv2):
+            pd.testing.assert_frame_equal(ler_execucao(caminho)[colunas], base[colunas], check_dtype=False, rtol=1e-6)
+        print("✓ CSV -> .npy -> TREC -> CSV sem perdas")
+
+        for caminho in (caminho_csv, caminho_npy, caminho_trec):
+            blocos = list(iterar_execucao(caminho, linhas_por_bloco=1000))
+            assert len(blocos) == 6
+            pd.testing.assert_frame_equal(
+                pd.concat(blocos, ignore_index=True)[colunas], ler_execucao(caminho)[colunas], check_dtype=False
+            )
+        print("✓ Leitura em blocos")
+
+        caminho_qrels = os.path.join(tmp, "qrels.txt")
+        gravar_qrels(qrels, caminho_qrels)
+        pd.testing.assert_frame_equal(ler_qrels(caminho_qrels), qrels, check_dtype=False)
+        referencia = metricas_de_arquivos(caminho_csv, caminho_qrels, k=[5, 10])
+        for caminho in (caminho_npy, caminho_trec):
+            pd.testing.assert_frame_equal(metricas_de_arquivos(caminho, caminho_qrels, k=[5, 10]), referencia)
+        print("✓ Métricas iguais em CSV, .npy e TREC")
+
+        grande = pd.concat([execucao] * 50, ignore_index=True)
+        inicio = time.perf_counter()
+        grande["DOC_ID"].apply(_extrair_por_linha)
+        tempo_regex = time.perf_counter() - inicio
+        gravar_execucao(grande.assign(DOC_ID_NUM=extrair_doc_id_numerico(grande["DOC_ID"])), caminho_npy)
+        inicio = time.perf_counter()
+        ler_execucao(caminho_npy)
+        tempo_npy = time.perf_counter() - inicio
+        print(f"{len(grande)} linhas: regex por linha {tempo_regex:.3f}s, leitura .npy {tempo_npy:.3f}s")
+
+    print("\n--- Teste de I/O de Execuções Concluído ---")
+
+
+if __name__ == "__main__":
+    teste_execucoes_io()
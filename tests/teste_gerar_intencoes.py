@@ -0,0 +1,86 @@
+import contextlib
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+# Adicionar o diretório raiz do projeto ao sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@contextlib.contextmanager
+def _backend_fake(**ambiente):
+    """Ambiente do backend fake com um cliente global novo; restaura ambos ao sair."""
+    from src.utils.gemini import redefinir_cliente_gemini
+
+    anterior = {nome: os.environ.get(nome) for nome in ambiente}
+    os.environ.update(ambiente)
+    # Um cliente global criado por outro teste não usaria o backend fake
+    redefinir_cliente_gemini()
+    try:
+        yield
+    finally:
+        redefinir_cliente_gemini()
+        for nome, valor in anterior.items():
+            if valor is None:
+                os.environ.pop(nome, None)
+            else:
+                os.environ[nome] = valor
+
+
+def teste_gerar_intencoes():
+    """
+    Testa a geração concorrente de intenções com o backend LLM fake (sem rede):
+    1) Queries já presentes na saída parcial (JSONL) não são reenviadas ao LLM
+    2) As chamadas rodam em paralelo (20 x 0.1s com 8 workers em bem menos de 2s)
+    3) O CSV final tem todas as intenções, na ordem das queries, e a saída parcial é removida
+    """
+    print("--- Iniciando Teste de Geração Concorrente de Intenções ---")
+    import src.gerar_intencoes_dataset as gid
+    from src.utils.checkpoint import CheckpointJsonl
+    from src.utils.gemini import obter_cliente_gemini
+
+    with _backend_fake(LLM_BACKEND="fake", LLM_FAKE_LATENCIA="0.1", GEMINI_CACHE_MODO="desligado",
+                       GEMINI_MAX_CONCORRENCIA="8"), tempfile.TemporaryDirectory() as tmp:
+        gid.QUERY_CSV = os.path.join(tmp, "query.csv")
+        gid.QREL_CSV = os.path.join(tmp, "qrel.csv")
+        gid.DOC_CSV = os.path.join(tmp, "doc.csv")
+        gid.OUTPUTS_DIR = tmp
+        gid.OUTPUT_CSV = os.path.join(tmp, "query_intencao.csv")
+        gid.PARCIAL_JSONL = os.path.join(tmp, "query_intencao.parcial.jsonl")
+
+        n = 24
+        pd.DataFrame({"ID": range(1, n + 1), "TEXT": [f"pergunta {i}" for i in range(1, n + 1)]}).to_csv(gid.QUERY_CSV, index=False)
+        pd.DataFrame({"KEY": [f"JURIS-{i}" for i in range(1, n + 1)], "ENUNCIADO": [f"<p>enunciado {i}</p>" for i in range(1, n + 1)]}).to_csv(gid.DOC_CSV, index=False)
+        pd.DataFrame({
+            "QUERY_ID": list(range(1, n + 1)),
+            "DOC_ID": list(range(1, n + 1)),
+            "SCORE": [3] * n,
+            "RANK": [1] * n,
+        }).to_csv(gid.QREL_CSV, index=False)
+
+        parcial = CheckpointJsonl(gid.PARCIAL_JSONL, campo_chave="ID")
+        for qid in (1, 2, 3, 4):
+            parcial.registrar({"ID": qid, "INTENCAO": f"intenção salva {qid}"})
+
+        inicio = time.perf_counter()
+        gid.gerar_para_todas_as_queries(workers=8)
+        duracao = time.perf_counter() - inicio
+
+        chamadas = obter_cliente_gemini().backend.chamadas
+        saida = pd.read_csv(gid.OUTPUT_CSV)
+        print(f"Chamadas ao LLM: {chamadas} | duração: {duracao:.2f}s")
+        assert chamadas == n - 4, "Queries da saída parcial não deveriam ser refeitas"
+        assert duracao < 2.0, f"Chamadas deveriam rodar em paralelo (duração {duracao:.2f}s)"
+        assert list(saida["ID"]) == list(range(1, n + 1))
+        assert saida["INTENCAO"].iloc[0] == "intenção salva 1"
+        assert saida["INTENCAO"].fillna("").str.len().gt(0).all()
+        assert not os.path.exists(gid.PARCIAL_JSONL)
+
+    print("\n--- Teste de Geração Concorrente de Intenções Concluído ---")
+
+
+if __name__ == "__main__":
+    teste_gerar_intencoes()
@@ -0,0 +1,125 @@
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import pandas as pd
+
+# Adicionar o diretório raiz do projeto ao sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils import instrumentacao
+from src.utils.execucoes import gravar_execucao
+from src.utils.gemini import BackendFake, ClienteGemini
+from src.utils.metricas import metricas_de_arquivos
+
+
+@instrumentacao.instrumentar("teste.decorada")
+def _dormir(segundos):
+    time.sleep(segundos)
+    return segundos
+
+
+def teste_desligada():
+    """Desligada: nada é coletado e o custo por span é desprezível."""
+    instrumentacao.desativar()
+    instrumentacao.reiniciar()
+    n = 200_000
+    inicio = time.perf_counter()
+    for _ in range(n):
+        with instrumentacao.span("teste.quente"):
+            pass
+        instrumentacao.contar("teste.contador")
+    custo_us = (time.perf_counter() - inicio) / n * 1e6
+    assert _dormir(0) == 0
+    assert instrumentacao.resumo().empty
+    print(f"✓ Desligada: {custo_us:.3f} µs por span + contador, nada coletado")
+    assert custo_us < 5
+
+
+def teste_spans_e_trace():
+    """Spans aninhados em threads, decorator, contadores, histogramas e trace Chrome."""
+    instrumentacao.ativar()
+    instrumentacao.reiniciar()
+
+    def trabalho():
+        with instrumentacao.span("teste.externo", origem="thread"):
+            _dormir(0.02)
+            instrumentacao.contar("teste.contador", 2)
+
+    threads = [threading.Thread(target=trabalho, name=f"trabalhador-{i}") for i in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    for valor in (1, 2, 3, 4):
+        instrumentacao.registrar("teste.hist", valor)
+    try:
+        with instrumentacao.span("teste.falha"):
+            raise ValueError("erro proposital")
+    except ValueError:
+        pass
+
+    tabela = instrumentacao.resumo().set_index("nome")
+    print(tabela.to_string(float_format=lambda v: f"{v:.2f}"))
+    assert tabela.loc["teste.externo", "n"] == 3 and tabela.loc["teste.decorada", "n"] == 3
+    assert tabela.loc["teste.decorada", "p50"] >= 20 and tabela.loc["teste.externo", "max"] >= tabela.loc["teste.decorada", "max"]
+    assert tabela.loc["teste.contador", "total"] == 6
+    assert tabela.loc["teste.hist", "p50"] == 2.5 and tabela.loc["teste.hist", "max"] == 4
+
+    with tempfile.TemporaryDirectory() as tmp:
+        caminho = os.path.join(tmp, "trace.json")
+        assert instrumentacao.exportar_trace(caminho) == 3 + 3 + 3 + 1
+        with open(caminho, encoding="utf-8") as f:
+            eventos = json.load(f)["traceEvents"]
+    spans = [e for e in eventos if e["ph"] == "X"]
+    externos = [e for e in spans if e["name"] == "teste.externo"]
+    # Cada span decorado está contido no span externo da mesma thread
+    for externo in externos:
+        internos = [e for e in spans if e["name"] == "teste.decorada" and e["tid"] == externo["tid"]]
+        assert len(internos) == 1
+        assert externo["ts"] <= internos[0]["ts"] and internos[0]["ts"] + internos[0]["dur"] <= externo["ts"] + externo["dur"]
+        assert externo["args"] == {"origem": "thread"}
+    assert next(e for e in spans if e["name"] == "teste.falha")["args"] == {"erro": "ValueError"}
+    nomes_threads = {e["args"]["name"] for e in eventos if e["ph"] == "M"}
+    assert {"trabalhador-0", "trabalhador-1", "trabalhador-2"} <= nomes_threads
+    print("✓ Trace Chrome com spans aninhados por thread, contadores e erros")
+
+
+def teste_pipeline_instrumentado():
+    """Etapas reais do pipeline (I/O de execuções, métricas, cliente LLM) aparecem no resumo."""
+    instrumentacao.ativar()
+    instrumentacao.reiniciar()
+    with tempfile.TemporaryDirectory() as tmp:
+        execucao = os.path.join(tmp, "execucao.npy")
+        qrels = os.path.join(tmp, "qrels.trec")
+        gravar_execucao(pd.DataFrame({"QUERY_ID": [1, 1, 2], "DOC_ID": ["D-10", "D-11", "D-12"], "RANK": [1, 2, 1]}), execucao)
+        with open(qrels, "w", encoding="utf-8") as f:
+            f.write("1 0 D-11 1\n2 0 D-12 2\n")
+        metricas_de_arquivos(execucao, qrels, k=[10])
+
+    cliente = ClienteGemini(rpm=None, backend=BackendFake(), cache=None)
+    for prompt in ("a", "b"):
+        cliente.gerar(prompt, {"temperature": 0})
+
+    tabela = instrumentacao.resumo().set_index("nome")
+    for etapa in ("io.gravar_execucao", "io.ler_execucao", "io.ler_qrels", "avaliacao.metricas", "llm.requisicao"):
+        assert etapa in tabela.index, etapa
+    assert tabela.loc["llm.requisicao", "n"] == 2 and tabela.loc["llm.tokens_prompt", "n"] == 2
+    instrumentacao.imprimir_resumo()
+    instrumentacao.desativar()
+    print("✓ Etapas do pipeline instrumentadas")
+
+
+def teste_instrumentacao():
+    print("--- Iniciando Teste da Instrumentação ---")
+    teste_desligada()
+    teste_spans_e_trace()
+    teste_pipeline_instrumentado()
+    print("\n--- Teste da Instrumentação Concluído ---")
+
+
+if __name__ == "__main__":
+    teste_instrumentacao()
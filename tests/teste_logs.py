@@ -0,0 +1,131 @@
+import contextlib
+import io
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+# Adicionar o diretório raiz do projeto ao sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from llama_index.core.schema import NodeWithScore, TextNode
+
+from src.buscador_hibrido import BuscadorHibridoLlamaIndex
+from src.documento import DocumentoJuris
+from src.utils.logs import configurar_logs, parar_logs
+
+
+class _RetrieverFake:
+    """Devolve sempre os mesmos nós, sem BM25 nem modelo de embeddings."""
+
+    def __init__(self, n):
+        self.nos = [
+            NodeWithScore(node=TextNode(text=f"texto {i}", id_=str(i), metadata={"id": str(i), "titulo": f"t{i}"}), score=1.0 / (i + 1))
+            for i in range(n)
+        ]
+
+    def retrieve(self, bundle):
+        return list(self.nos)
+
+
+def _buscador():
+    buscador = BuscadorHibridoLlamaIndex(cache_resultados_capacidade=1)
+    buscador.hybrid_retriever = _RetrieverFake(5)
+    documentos = [DocumentoJuris(id=str(i), enunciado=f"t{i}", excerto="") for i in range(5)]
+    buscador.acervo.adicionar(documentos, [f"texto {i}" for i in range(5)])
+    return buscador
+
+
+def _buscar(buscador, consultas):
+    for consulta in consultas:
+        buscador.buscar_hibrido(consulta, top_k=3)
+
+
+def teste_padrao_silencioso():
+    """Sem configurar_logs (e com o padrão WARNING), a busca não escreve nada por consulta."""
+    buscador = _buscador()
+    saida, erros = io.StringIO(), io.StringIO()
+    with contextlib.redirect_stdout(saida), contextlib.redirect_stderr(erros):
+        _buscar(buscador, ["a", "b"])
+    assert saida.getvalue() == "" and erros.getvalue() == "", (saida.getvalue(), erros.getvalue())
+
+    fluxo = io.StringIO()
+    configurar_logs(verboso=False, fluxo=fluxo)
+    _buscar(buscador, ["c"])
+    logging.getLogger("src.buscador_hibrido").warning("aviso")
+    assert fluxo.getvalue() == "aviso\n"
+    print("✓ Padrão: nenhuma linha por consulta; avisos continuam visíveis")
+
+
+def teste_verboso():
+    """verboso=True reproduz as linhas que antes eram impressas."""
+    fluxo = io.StringIO()
+    configurar_logs(verboso=True, fluxo=fluxo)
+    resultados = _buscador().buscar_hibrido("licitação", top_k=3)
+    assert len(resultados) == 3
+    assert fluxo.getvalue() == (
+        "\n=== BUSCA HÍBRIDA com QueryFusionRetriever ===\n"
+        "Consulta: licitação\n"
+        "QueryFusionRetriever retornou 5 nós únicos.\n"
+        "Retornando os 3 melhores resultados.\n"
+    ), fluxo.getvalue()
+    print("✓ Verboso: mesmas mensagens dos prints anteriores")
+
+
+def teste_json_assincrono():
+    """Formato JSON com os campos de `extra`; no modo assíncrono a escrita sai da thread chamadora."""
+    fluxo = io.StringIO()
+    threads_escrita = set()
+
+    class _Fluxo(io.StringIO):
+        def write(self, texto):
+            threads_escrita.add(threading.current_thread().name)
+            return fluxo.write(texto)
+
+    configurar_logs(verboso=True, formato="json", assincrono=True, fluxo=_Fluxo())
+    _buscar(_buscador(), [f"consulta {i}" for i in range(20)])
+    parar_logs()
+
+    registros = [json.loads(linha) for linha in fluxo.getvalue().splitlines()]
+    assert len(registros) == 20 * 4
+    consultas = [r["consulta"] for r in registros if r["msg"].startswith("Consulta:")]
+    assert consultas == [f"consulta {i}" for i in range(20)]
+    assert {r["logger"] for r in registros} == {"src.buscador_hibrido"} and registros[0]["nivel"] == "INFO"
+    assert next(r for r in registros if "nos" in r)["nos"] == 5
+    assert threading.current_thread().name not in threads_escrita
+    print(f"✓ JSON assíncrono: {len(registros)} registros, escritos pela thread {sorted(threads_escrita)}")
+
+
+def teste_custo():
+    """Custo por busca (com cache de resultados) com logs desligados vs. prints para o terminal."""
+    buscador = _buscador()
+    buscador.cache_resultados = type(buscador.cache_resultados)(capacidade=16, ttl_segundos=None)
+    n = 3000
+
+    configurar_logs(verboso=False)
+    inicio = time.perf_counter()
+    _buscar(buscador, ["mesma consulta"] * n)
+    desligado = (time.perf_counter() - inicio) / n * 1e6
+
+    configurar_logs(verboso=True, fluxo=io.StringIO())
+    inicio = time.perf_counter()
+    _buscar(buscador, ["mesma consulta"] * n)
+    ligado = (time.perf_counter() - inicio) / n * 1e6
+    configurar_logs(verboso=False)
+    print(f"✓ Busca em cache: {desligado:.1f} µs com logs desligados, {ligado:.1f} µs com logs INFO")
+    assert desligado < ligado
+
+
+def teste_logs():
+    print("--- Iniciando Teste dos Logs Estruturados ---")
+    teste_padrao_silencioso()
+    teste_verboso()
+    teste_json_assincrono()
+    teste_custo()
+    print("\n--- Teste dos Logs Estruturados Concluído ---")
+
+
+if __name__ == "__main__":
+    teste_logs()
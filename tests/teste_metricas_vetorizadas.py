@@ -0,0 +1,79 @@
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# Adicionar o diretório raiz do projeto ao sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.metricas import _metricas_por_query, metricas
+
+
+def _dados_aleatorios(n_queries, profundidade, n_docs, semente):
+    rng = np.random.default_rng(semente)
+    linhas_resultado, linhas_qrels = [], []
+    for q in range(n_queries):
+        # Documentos repetidos no resultado e ranks fora de ordem são intencionais
+        docs = rng.integers(0, n_docs, size=profundidade)
+        for rank in rng.permutation(profundidade):
+            linhas_resultado.append((q, int(docs[rank]), int(rank) + 1))
+        relevantes = rng.choice(n_docs, size=int(rng.integers(1, 8)), replace=False)
+        for doc in relevantes:
+            linhas_qrels.append((q, int(doc), int(rng.integers(0, 4))))
+    # Query só no resultado (não é avaliada) e query só no qrels (sem documentos retornados)
+    linhas_resultado.append((n_queries + 1, 0, 1))
+    linhas_qrels.append((n_queries, 1, 2))
+    # Documento repetido no qrels: vale o último score
+    linhas_qrels.append((linhas_qrels[0][0], linhas_qrels[0][1], 3))
+    resultado = pd.DataFrame(linhas_resultado, columns=["QUERY_KEY", "DOC_KEY", "RANK"])
+    qrels = pd.DataFrame(linhas_qrels, columns=["QUERY_KEY", "DOC_KEY", "SCORE"])
+    return resultado, qrels
+
+
+def _dados_grandes(n_queries, profundidade, n_docs, semente):
+    rng = np.random.default_rng(semente)
+    resultado = pd.DataFrame({
+        "QUERY_KEY": np.repeat(np.arange(n_queries), profundidade),
+        "DOC_KEY": rng.integers(0, n_docs, size=n_queries * profundidade),
+        "RANK": np.tile(np.arange(1, profundidade + 1), n_queries),
+    })
+    qrels = pd.DataFrame({
+        "QUERY_KEY": np.repeat(np.arange(n_queries), 5),
+        "DOC_KEY": rng.integers(0, n_docs, size=n_queries * 5),
+        "SCORE": rng.integers(1, 4, size=n_queries * 5),
+    })
+    return resultado, qrels
+
+
+def teste_metricas_vetorizadas():
+    """
+    Testa a avaliação vetorizada de `metricas`:
+    1) Mesmos valores da implementação query a query (ganho exponencial e linear)
+    2) Mesma ordem de linhas e colunas
+    3) 10 mil queries x 1000 posições avaliadas em segundos
+    """
+    print("--- Iniciando Teste das Métricas Vetorizadas ---")
+    resultado, qrels = _dados_aleatorios(n_queries=150, profundidade=60, n_docs=80, semente=7)
+    for aproximacao in (False, True):
+        k = [1, 5, 10, 50, 100]
+        esperado = _metricas_por_query(resultado, qrels, k=k, aproximacao_trec_eval=aproximacao)
+        obtido = metricas(resultado, qrels, k=k, aproximacao_trec_eval=aproximacao)
+        assert list(obtido.columns) == list(esperado.columns)
+        assert list(obtido["QUERY_KEY"]) == list(esperado["QUERY_KEY"])
+        pd.testing.assert_frame_equal(obtido, esperado, check_dtype=False, rtol=1e-12, atol=1e-12)
+        print(f"✓ Paridade com a implementação por query (aproximacao_trec_eval={aproximacao})")
+
+    resultado, qrels = _dados_grandes(n_queries=10_000, profundidade=1000, n_docs=5000, semente=3)
+    inicio = time.perf_counter()
+    obtido = metricas(resultado, qrels, k=[5, 10, 100, 1000])
+    duracao = time.perf_counter() - inicio
+    print(f"✓ {len(obtido)} queries x 1000 posições avaliadas em {duracao:.2f}s")
+    assert duracao < 30
+
+    print("\n--- Teste das Métricas Vetorizadas Concluído ---")
+
+
+if __name__ == "__main__":
+    teste_metricas_vetorizadas()
@@ -0,0 +1,155 @@
+import html
+import importlib.util
+import os
+import re
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# Adicionar o diretório raiz do projeto ao sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.preprocessamento import _BRANCOS, PreprocessadorTexto, _normalizar_pyarrow, _normalizar_python
+
+DOC_CSV = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "dados", "juris_tcu", "doc.csv")
+
+_TAGS_BLOCO = re.compile(r"</?(?:p|br|div|li|ul|ol|tr|td|th|h[1-6]|blockquote|table)\b[^>]*>", re.IGNORECASE)
+
+
+def _normalizar_um(texto):
+    """Referência por texto (mesmas regras, sem pandas)."""
+    if not isinstance(texto, str):
+        return ""
+    texto = re.sub(r"<[^>]*>", "", _TAGS_BLOCO.sub(" ", texto))
+    return " ".join(html.unescape(texto).split())
+
+
+def _corpus_sintetico(n, semente=0):
+    """Enunciados no formato do doc.csv: um parágrafo HTML, às vezes dois, negrito e entidades."""
+    rng = np.random.default_rng(semente)
+    vocabulario = ["licitação", "contrato", "pregão", "órgão", "dispensa", "serviços", "TCU", "análise",
+                   "art.", "Lei", "8.666/1993", "inexigibilidade", "responsável", "multa"]
+    extras = ["&nbsp;", "&quot;obras&quot;", "n&ordm;", "&sect;", "<em>caput</em>", "R$&nbsp;1.000,00"]
+    textos = []
+    for _ in range(n):
+        palavras = list(rng.choice(vocabulario, size=int(rng.integers(20, 80))))
+        if rng.random() < 0.3:
+            palavras.insert(int(rng.integers(0, len(palavras))), str(rng.choice(extras)))
+        if rng.random() < 0.2:
+            meio = len(palavras) // 2
+            textos.append("<p>" + " ".join(palavras[:meio]) + "</p>\n<p><strong>" + " ".join(palavras[meio:]) + "</strong></p>")
+        else:
+            textos.append("<p>" + " ".join(palavras) + "</p>")
+    return textos
+
+
+def _medir(funcao, repeticoes=3):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos)
+
+
+def _casos():
+    """Tags, entidades, espaços, valores ausentes e índice da entrada."""
+    preproc = PreprocessadorTexto()
+    entrada = pd.Series([
+        "<p>Primeiro parágrafo.</p><p>Segundo&nbsp;parágrafo.</p>",
+        "<b>pa</b>lavra &quot;entre aspas&quot; n&ordm; 10 &#231;&#xE3;",
+        "&lt;p&gt; é texto, não tag; &amp;lt; fica &lt;",
+        "  várias\n\nlinhas\t e   espaços  ",
+        None,
+        float("nan"),
+        "",
+        "P&D sem entidade",
+        "linha<br/>quebrada<BR>",
+        "\u3000ideográfico\u3000e\u200afino&thinsp;&emsp;\x1f",
+    ], index=range(10, 20))
+    esperado = [
+        "Primeiro parágrafo. Segundo parágrafo.",
+        "palavra \"entre aspas\" nº 10 çã",
+        "<p> é texto, não tag; &lt; fica <",
+        "várias linhas e espaços",
+        "",
+        "",
+        "",
+        "P&D sem entidade",
+        "linha quebrada",
+        "ideográfico e fino",
+    ]
+    obtido = preproc.normalizar_textos(entrada)
+    assert obtido.tolist() == esperado, obtido.tolist()
+    assert list(obtido.index) == list(entrada.index)
+    assert preproc.normalizar_textos(iter(["<p>x</p>"])).tolist() == ["x"]
+    assert preproc.normalizar_textos([]).tolist() == []
+    print("✓ Tags, entidades, espaços e valores ausentes")
+    # Uma única definição de espaço em branco, igual à de str.isspace()/str.split()
+    brancos = "".join(chr(c) for c in range(sys.maxunicode + 1) if chr(c).isspace())
+    assert re.findall(f"[{_BRANCOS}]", brancos + "a\u200b") == list(brancos)
+    assert preproc.normalizar_textos([f"a{brancos}b{brancos}", f" {brancos}"]).tolist() == ["a b", ""]
+
+
+def _paridade(textos):
+    """Lote == referência por texto; sem entidades/espaços extras, == remove_html."""
+    preproc = PreprocessadorTexto()
+    assert preproc.normalizar_textos(textos).tolist() == [_normalizar_um(t) for t in textos]
+    simples = [t for t in textos if "&" not in t and "  " not in t]
+    assert preproc.normalizar_textos(simples).tolist() == [" ".join(preproc.remove_html(t).split()) for t in simples]
+    print(f"✓ Paridade com a referência por texto ({len(textos)} enunciados)")
+
+
+def _paridade_pyarrow(textos):
+    """Caminho vetorizado (string[pyarrow]) == caminho por texto; pulado sem pyarrow."""
+    if importlib.util.find_spec("pyarrow") is None:
+        print("⚠ pyarrow não instalado: paridade do caminho vetorizado não verificada")
+        return
+    bordas = [
+        "<p>a</p><pre>b</pre><pá>c</pá><P class='x'>d<BR/>e",
+        " \u3000início\u200afim\xa0 ", "zero\u200blargura", "\x1cseparadores\x1f\x85",
+        "&lt;p&gt; &amp;nbsp; &nbsp;&nbsp;x", "", "  ", "sem nada",
+    ]
+    serie = pd.Series(bordas + list(textos)).fillna("").astype(str)
+    vetorizado = _normalizar_pyarrow(serie)
+    assert vetorizado.tolist() == _normalizar_python(serie).tolist()
+    assert list(vetorizado.index) == list(serie.index)
+    print(f"✓ Paridade do caminho pyarrow com o caminho por texto ({len(serie)} textos)")
+
+
+def _vazao(textos, origem):
+    """Documentos/s e MB/s: remove_html (só tags) vs. normalização completa (.apply e normalizar_textos)."""
+    preproc = PreprocessadorTexto()
+    serie = pd.Series(textos)
+    megabytes = sum(len(t.encode("utf-8")) for t in textos) / 1e6
+    tempos = {
+        "remove_html por linha (só tags)": _medir(lambda: serie.apply(preproc.remove_html)),
+        "normalização por linha (.apply)": _medir(lambda: serie.apply(_normalizar_um)),
+        "normalizar_textos (por texto)": _medir(lambda: _normalizar_python(serie)),
+    }
+    if importlib.util.find_spec("pyarrow") is not None:
+        tempos["normalizar_textos (pyarrow)"] = _medir(lambda: _normalizar_pyarrow(serie))
+    print(f"Vazão em {origem}: {len(textos)} enunciados, {megabytes:.1f} MB")
+    for nome, segundos in tempos.items():
+        print(f"  {nome:34s} {len(textos) / segundos:>10,.0f} docs/s  {megabytes / segundos:6.1f} MB/s")
+
+
+def teste_normalizacao_lote():
+    print("--- Iniciando Teste da Normalização em Lote ---")
+    _casos()
+    textos = _corpus_sintetico(50_000)
+    _paridade(textos)
+    _paridade_pyarrow(textos)
+    _vazao(textos, "corpus sintético")
+    if os.path.exists(DOC_CSV):
+        enunciados = pd.read_csv(DOC_CSV, dtype=str, encoding="utf-8", keep_default_na=False)["ENUNCIADO"].tolist()
+        _paridade(enunciados)
+        _paridade_pyarrow(enunciados)
+        _vazao(enunciados, "doc.csv")
+    print("\n--- Teste da Normalização em Lote Concluído ---")
+
+
+if __name__ == "__main__":
+    teste_normalizacao_lote()
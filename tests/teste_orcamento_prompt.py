@@ -0,0 +1,82 @@
+import logging
+import os
+import sys
+
+# Adicionar o diretório raiz do projeto ao sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.gemini import estimar_tokens
+from src.utils.orcamento_prompt import TrechoPrompt, ajustar_ao_orcamento, truncar_tokens
+
+
+def teste_orcamento_prompt():
+    """
+    Testa o ajuste de prompts ao orçamento de tokens:
+    1) Abaixo do orçamento, nada muda (chaves do cache de respostas preservadas)
+    2) Acima, os trechos de menor prioridade são cortados primeiro, respeitando mínimos
+    3) O modo "extremos" preserva a pergunta original e o último turno da conversa
+    4) O modo "turnos" descarta turnos inteiros do meio
+    5) Nas perguntas clarificadoras, os documentos são cortados antes da conversa
+    6) Cada ajuste é registrado em DEBUG, com a contagem de tokens em `extra`
+    """
+    print("--- Iniciando Teste do Orçamento de Prompt ---")
+    curto = [TrechoPrompt("a", "texto curto", prioridade=1), TrechoPrompt("b", "outro texto", prioridade=2)]
+    textos, total = ajustar_ao_orcamento(curto, orcamento=1000, tokens_fixos=10)
+    assert textos == ["texto curto", "outro texto"] and total == 10 + 2 + 2
+
+    longo = " ".join(f"termo{i}" for i in range(2000))
+    trechos = [
+        TrechoPrompt("conversa", longo, prioridade=1, minimo=100, manter="extremos"),
+        TrechoPrompt("documento", longo, prioridade=2, minimo=100),
+    ]
+    registros = []
+    captura = logging.Handler(logging.DEBUG)
+    captura.emit = registros.append
+    logger = logging.getLogger("src.utils.orcamento_prompt")
+    nivel_anterior = logger.level
+    logger.addHandler(captura)
+    logger.setLevel(logging.DEBUG)
+    try:
+        textos, total = ajustar_ao_orcamento(trechos, orcamento=1500, tokens_fixos=200)
+    finally:
+        logger.removeHandler(captura)
+        logger.setLevel(nivel_anterior)
+    assert [r.tokens_prompt for r in registros] == [total] and registros[0].cortes == ["conversa", "documento"]
+    tokens = [estimar_tokens(t) for t in textos]
+    print(f"Tokens por trecho após ajuste: {tokens} (total {total})")
+    assert total <= 1500
+    assert tokens[0] <= 102, "Conversa deveria ser cortada até o mínimo primeiro"
+    assert tokens[1] > 100
+
+    conversa = "PERGUNTA ORIGINAL " + longo + " ÚLTIMA RESPOSTA"
+    cortada = truncar_tokens(conversa, 50, "extremos")
+    assert cortada.startswith("PERGUNTA ORIGINAL") and cortada.endswith("ÚLTIMA RESPOSTA") and "[…]" in cortada
+
+    turnos = ["PERGUNTA ORIGINAL"] + [
+        f"Pergunta clarificadora: pergunta {i} " + "detalhe " * 40 + f"\nResposta: resposta {i}" for i in range(6)
+    ]
+    conversa = "\n\n".join(turnos)
+    cortada = truncar_tokens(conversa, 200, "turnos")
+    blocos = cortada.split("\n\n")
+    assert estimar_tokens(cortada) <= 200 and blocos[0] == "PERGUNTA ORIGINAL" and blocos[1] == "[…]"
+    assert blocos[2:] == turnos[-(len(blocos) - 2):], "Só turnos inteiros, os mais recentes, deveriam ficar"
+
+    from src.clarifying_questions import _ajustar_caso
+    documento = " ".join(f"doc{i}" for i in range(3000))
+    anterior = os.environ.get("GEMINI_ORCAMENTO_PROMPT")
+    os.environ["GEMINI_ORCAMENTO_PROMPT"] = "2000"
+    try:
+        conversa_ajustada, caso1, caso2 = _ajustar_caso(conversa, documento, documento, tokens_fixos=300)
+    finally:
+        if anterior is None:
+            del os.environ["GEMINI_ORCAMENTO_PROMPT"]
+        else:
+            os.environ["GEMINI_ORCAMENTO_PROMPT"] = anterior
+    assert conversa_ajustada == conversa, "Conversa dentro do orçamento não deveria perder turnos"
+    assert estimar_tokens(caso1) < estimar_tokens(documento) and estimar_tokens(caso2) < estimar_tokens(documento)
+
+    print("\n--- Teste do Orçamento de Prompt Concluído ---")
+
+
+if __name__ == "__main__":
+    teste_orcamento_prompt()
@@ -0,0 +1,91 @@
+import json
+import os
+import re
+import sys
+from unittest import mock
+
+# Adicionar o diretório raiz do projeto ao sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.servidor_gemini_fake import ServidorGeminiFake
+
+
+def _resposta_fake(prompt: str) -> str:
+    """Pergunta determinística a partir do Documento 1; no lote, omite o último caso."""
+    docs = re.findall(r"Documento 1: \[(.*?)\]", prompt)
+    if "### Caso" in prompt:
+        itens = [
+            {"id": i, "question": f"Seu caso envolve {doc}?", "rationale": "fake"}
+            for i, doc in enumerate(docs[:-1])
+        ]
+        return json.dumps(itens, ensure_ascii=False)
+    return json.dumps({"question": f"Seu caso envolve {docs[0]}?", "rationale": "fake"}, ensure_ascii=False)
+
+
+def teste_perguntas_lote():
+    """
+    Testa a geração de perguntas clarificadoras em lote contra o servidor fake:
+    1) Paridade: mesmas perguntas, na mesma ordem, que o modo por par
+    2) Casos ausentes na resposta do lote são refeitos individualmente
+    3) Menos requisições que o modo por par
+    4) Cota diária esgotada interrompe o lote, sem fallback por par
+    """
+    print("--- Iniciando Teste de Perguntas Clarificadoras em Lote ---")
+    from src.clarifying_questions import (
+        gerar_perguntas_clarificadoras_em_lote,
+        gerar_perguntas_clarificadoras_para_pares,
+    )
+    from src.utils.gemini import LimiteDiarioAtingido, redefinir_cliente_gemini
+
+    tarefas = [
+        {
+            "conversa": f"consulta {i}",
+            "par": {"documento_1": {"conteudo": f"licitação {i}"}, "documento_2": {"conteudo": f"contrato {i}"}},
+        }
+        for i in range(10)
+    ]
+
+    # Cliente global sem cache: todas as chamadas chegam ao servidor fake
+    with ServidorGeminiFake(resposta=_resposta_fake) as servidor, mock.patch.dict(os.environ, {
+        "GOOGLE_API_KEY": os.getenv("GOOGLE_API_KEY") or "chave-fake",
+        "GEMINI_API_ENDPOINT": servidor.endpoint,
+        "GEMINI_CACHE_MODO": "desligado",
+    }):
+        # O cliente global é recriado com este endpoint (sem o de testes anteriores)
+        redefinir_cliente_gemini()
+
+        por_par = [
+            gerar_perguntas_clarificadoras_para_pares([t["par"]], t["conversa"], max_perguntas=1)[0]["pergunta"]
+            for t in tarefas
+        ]
+        requisicoes_por_par = servidor.requisicoes
+
+        resultados = gerar_perguntas_clarificadoras_em_lote(tarefas, tamanho_lote=4)
+        requisicoes_lote = servidor.requisicoes - requisicoes_por_par
+        em_lote = [r["pergunta"] for r in resultados]
+        origens = [r["origem"] for r in resultados]
+
+        print(f"Requisições: por par={requisicoes_por_par}, em lote={requisicoes_lote}")
+        print(f"Origens: {origens}")
+        assert em_lote == por_par, "Perguntas em lote deveriam coincidir com o modo por par"
+        # Blocos de 4, 4 e 2: o último caso de cada bloco cai no fallback individual
+        assert origens.count("gemini") == 3
+        assert requisicoes_lote == 6 < requisicoes_por_par
+    redefinir_cliente_gemini()
+
+    cliente = mock.Mock()
+    cliente.gerar.side_effect = LimiteDiarioAtingido("429 GenerateRequestsPerDay")
+    with mock.patch("src.clarifying_questions.obter_cliente_gemini", return_value=cliente):
+        try:
+            gerar_perguntas_clarificadoras_em_lote(tarefas, tamanho_lote=4)
+            raise AssertionError("Cota diária esgotada deveria interromper o lote")
+        except LimiteDiarioAtingido:
+            pass
+    assert cliente.gerar.call_count == 1, "Sem fallback por par após cota diária esgotada"
+    print("✓ Cota diária esgotada propagada sem fallback por par")
+
+    print("\n--- Teste de Perguntas Clarificadoras em Lote Concluído ---")
+
+
+if __name__ == "__main__":
+    teste_perguntas_lote()
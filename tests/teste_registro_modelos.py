@@ -0,0 +1,73 @@
+import os
+import sys
+import threading
+import time
+
+# Adicionar o diretório raiz do projeto ao sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.modelos import RegistroModelos
+
+
+def teste_registro_modelos():
+    """
+    Testa o registro de modelos com carregadores fake (sem baixar pesos):
+    1) Pedidos simultâneos da mesma chave carregam o modelo uma única vez
+    2) Chaves com device/dtype diferentes geram cópias distintas
+    3) Referências são contadas e o descarregamento respeita handles ativos
+    4) O descarregamento forçado invalida os handles ainda ativos
+    """
+    print("--- Iniciando Teste do Registro de Modelos ---")
+
+    registro = RegistroModelos()
+    cargas = []
+
+    def carregador():
+        cargas.append(1)
+        time.sleep(0.1)
+        return object()
+
+    handles = []
+
+    def worker():
+        handles.append(registro.obter("reranker-fake", carregador, device="cpu"))
+
+    threads = [threading.Thread(target=worker) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(cargas) == 1, f"Esperado 1 carregamento, obtido {len(cargas)}"
+    assert len({id(h.modelo) for h in handles}) == 1, "Handles deveriam compartilhar o mesmo modelo"
+    assert registro.referencias("reranker-fake", device="cpu") == 6
+
+    outro = registro.obter("reranker-fake", carregador, device="cuda", dtype="float16")
+    assert outro.modelo is not handles[0].modelo and len(cargas) == 2
+
+    assert not registro.descarregar("reranker-fake", device="cpu"), "Não deveria descarregar com referências ativas"
+    for h in handles:
+        h.liberar()
+    handles[0].liberar()  # idempotente
+    assert registro.referencias("reranker-fake", device="cpu") == 0
+    assert registro.descarregar("reranker-fake", device="cpu")
+
+    with outro:
+        pass
+    print(f"Modelos carregados: {registro.modelos_carregados()}")
+    assert registro.descarregar_nao_usados() == 1
+    assert registro.modelos_carregados() == []
+
+    forcado = registro.obter("reranker-fake", carregador, device="cpu")
+    assert registro.descarregar("reranker-fake", device="cpu", forcar=True)
+    assert forcado.modelo is None, "Handle ativo deveria ser invalidado no descarregamento forçado"
+    novo = registro.obter("reranker-fake", carregador, device="cpu")
+    forcado.liberar()
+    assert novo.modelo is not None and registro.referencias("reranker-fake", device="cpu") == 1
+
+    print("✓ Registro de modelos funcionando")
+    print("\n--- Teste do Registro de Modelos Concluído ---")
+
+
+if __name__ == "__main__":
+    teste_registro_modelos()
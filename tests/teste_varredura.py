@@ -0,0 +1,129 @@
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+from rank_bm25 import BM25Okapi
+
+# Adicionar o diretório raiz do projeto ao sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.varredura import (
+    ConfiguracaoFusao,
+    IndiceBM25,
+    assinatura_scores_densos,
+    carregar_scores_densos,
+    executar_varredura,
+    fundir,
+    grade_configuracoes,
+)
+
+
+def _corpus(n_docs, semente):
+    rng = np.random.default_rng(semente)
+    vocabulario = [f"t{i}" for i in range(300)]
+    # "comum" aparece em quase todos os documentos (idf negativo -> piso epsilon)
+    return [
+        ["comum"] * int(rng.integers(0, 3)) + list(rng.choice(vocabulario, size=int(rng.integers(5, 60)), p=_zipf(300)))
+        for _ in range(n_docs)
+    ]
+
+
+def _zipf(n):
+    pesos = 1.0 / np.arange(1, n + 1)
+    return pesos / pesos.sum()
+
+
+def _rrf_referencia(listas, k=60.0):
+    """Scores do RRF como no QueryFusionRetriever (rank a partir de 0, k=60)."""
+    fundido = {}
+    for lista in listas:
+        for rank, doc in enumerate(lista):
+            fundido[doc] = fundido.get(doc, 0.0) + 1.0 / (rank + k)
+    return fundido
+
+
+def _teste_cache_densos():
+    calculos = []
+
+    def calcular():
+        calculos.append(1)
+        return np.full((2, 3), len(calculos), dtype=np.float32)
+
+    docs, consultas = ["doc a", "doc b", "doc c"], ["consulta 1", "consulta 2"]
+    with tempfile.TemporaryDirectory() as tmp:
+        caminho = os.path.join(tmp, "densos.npz")
+
+        def carregar(modelo, textos_docs=docs):
+            assinatura = assinatura_scores_densos(modelo, textos_docs, consultas)
+            return carregar_scores_densos(caminho, [1, 2], [10, 11, 12], calcular, assinatura)
+
+        carregar("modelo-a")
+        assert carregar("modelo-a")[0, 0] == 1 and len(calculos) == 1
+        assert carregar("modelo-b")[0, 0] == 2, "Outro modelo deveria recalcular"
+        assert carregar("modelo-b", ["doc a", "doc b", "doc C"])[0, 0] == 3, "Textos diferentes deveriam recalcular"
+        assert carregar("modelo-b", ["doc a", "doc b", "doc C"])[0, 0] == 3 and len(calculos) == 3
+    print("✓ Cache de scores densos amarrado ao modelo e aos textos")
+
+
+def teste_varredura():
+    """
+    Testa a varredura de BM25/fusão:
+    1) IndiceBM25.pontuar = BM25Okapi.get_scores para vários (k1, b), com tokens repetidos e desconhecidos
+    2) RRF com pesos 0.5/0.5 e rrf_k=60: metade do score do QueryFusionRetriever, mesmos documentos
+    3) Avaliação em processos = sequencial; leaderboard ordenado por nDCG@10
+    4) Cache de scores densos recalculado se o modelo ou os textos mudam
+    """
+    print("--- Iniciando Teste da Varredura BM25/Fusão ---")
+    corpus = _corpus(400, semente=1)
+    indice = IndiceBM25(corpus)
+    consultas = [["t1", "t7", "t7", "comum", "desconhecido"], ["t50", "t120"], []]
+    for k1, b in ((1.2, 0.75), (0.5, 0.2), (2.0, 1.0)):
+        referencia = BM25Okapi(corpus, k1=k1, b=b)
+        for consulta in consultas:
+            np.testing.assert_allclose(indice.pontuar(consulta, k1, b), referencia.get_scores(consulta), rtol=1e-12)
+    print("✓ Scores iguais aos do BM25Okapi")
+
+    rng = np.random.default_rng(2)
+    scores_bm25, scores_densos = rng.random((3, 400)), rng.random((3, 400))
+    fundido = fundir(ConfiguracaoFusao(1.2, 0.75, "rrf", 0.5, 60.0, 30), scores_bm25, scores_densos)
+    for q in range(3):
+        listas = [list(np.argsort(-s[q], kind="stable")[:30]) for s in (scores_bm25, scores_densos)]
+        esperado = _rrf_referencia(listas)
+        # Pesos 0.5/0.5: metade do score de referência, mesmos documentos
+        assert set(np.flatnonzero(np.isfinite(fundido[q]))) == set(esperado)
+        for doc, score in esperado.items():
+            assert abs(2 * fundido[q, doc] - score) < 1e-12
+    print("✓ RRF igual ao do QueryFusionRetriever")
+
+    # Consultas formadas por termos dos documentos relevantes; denso = ruído + sinal nos relevantes
+    doc_ids = np.arange(1000, 1400)
+    relevantes = [rng.choice(400, size=3, replace=False) for _ in range(40)]
+    consultas = [[t for d in rel for t in corpus[d][:3]] for rel in relevantes]
+    qrels = pd.DataFrame({
+        "QUERY_ID": np.repeat(np.arange(40), 3),
+        "DOC_ID": doc_ids[np.concatenate(relevantes)],
+        "SCORE": 1,
+    })
+    densos = rng.random((40, 400)).astype(np.float32)
+    for q, rel in enumerate(relevantes):
+        densos[q, rel] += 0.5
+    configuracoes = grade_configuracoes([0.9, 1.2, 1.5], [0.5, 0.75], ("rrf", "combinacao", "bm25"), (0.3, 0.7), (60.0,), (20,))
+    paralelo = executar_varredura(indice, consultas, np.arange(40), doc_ids, qrels, configuracoes, densos, k=[5, 10], workers=3)
+    sequencial = executar_varredura(indice, consultas, np.arange(40), doc_ids, qrels, configuracoes, densos, k=[5, 10], workers=1)
+    pd.testing.assert_frame_equal(paralelo, sequencial)
+    assert len(paralelo) == len(configuracoes) == 3 * 2 * (2 + 2 + 1)
+    assert paralelo["nDCG@10"].is_monotonic_decreasing
+    print(paralelo.head(5).to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+    # Com sinal nos dois retrievers, a fusão supera o BM25 sozinho
+    melhor_bm25 = paralelo[paralelo["fusao"] == "bm25"]["nDCG@10"].max()
+    assert paralelo.iloc[0]["fusao"] != "bm25" and paralelo.iloc[0]["nDCG@10"] > melhor_bm25
+
+    _teste_cache_densos()
+
+    print("\n--- Teste da Varredura BM25/Fusão Concluído ---")
+
+
+if __name__ == "__main__":
+    teste_varredura()
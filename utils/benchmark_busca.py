@@ -0,0 +1,283 @@
+"""
+Utilitário: benchmark de latência e throughput da busca (BM25, denso, híbrido, híbrido + rerank).
+
+Reexecuta as consultas de query.csv sobre o corpus (doc.csv ou um corpus sintético) e,
+opcionalmente, sobre versões escaladas dele (--escalas 1 2 4: documentos replicados com
+novos ids). Para cada escala mede:
+- construcao_s: tempo de carregar_documentos (nós, BM25 e índice vetorial)
+- modelos_s: tempo de carregamento dos modelos
+- por método: latência p50/p95/p99/média (ms), QPS e pico de RSS do processo ao final
+
+Roda só em CPU (CUDA_VISIBLE_DEVICES vazio) e, por padrão, com modelos pequenos no lugar
+dos de produção (--modelo-embeddings / --modelo-reranker; cross-encoders comuns usam o
+AdaptadorCrossEncoder de src/reranking.py). Os caches de embeddings e de resultados são
+limpos antes de cada consulta, para medir o caminho completo.
+
+O JSON de saída traz o commit e o ambiente; com --comparar, as latências são comparadas
+com um JSON anterior e variações acima de --tolerancia são marcadas como regressão.
+
+Execução:
+    python utils/benchmark_busca.py --n-consultas 50 --saida dados/benchmark_busca.json
+    python utils/benchmark_busca.py --sintetico 5000 --escalas 1 4 --metodos bm25 hibrido
+    python utils/benchmark_busca.py --saida dados/benchmark_novo.json --comparar dados/benchmark_busca.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+DATA_DIR = os.path.join(BASE_DIR, "dados", "juris_tcu")
+DOC_CSV = os.path.join(DATA_DIR, "doc.csv")
+QUERY_CSV = os.path.join(DATA_DIR, "query.csv")
+METODOS = ["bm25", "denso", "hibrido", "hibrido_rerank"]
+MODELO_EMBEDDINGS_PEQUENO = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+MODELO_RERANKER_PEQUENO = "cross-encoder/mmarco-mMiniLMv2-L12-H384-v1"
+
+
+def percentil(valores_ordenados: List[float], p: float) -> float:
+    """Percentil por interpolação linear (valores já ordenados)."""
+    if not valores_ordenados:
+        return float("nan")
+    posicao = (len(valores_ordenados) - 1) * p / 100
+    baixo = int(posicao)
+    alto = min(baixo + 1, len(valores_ordenados) - 1)
+    return valores_ordenados[baixo] + (valores_ordenados[alto] - valores_ordenados[baixo]) * (posicao - baixo)
+
+
+def pico_rss_mb() -> float:
+    """Pico de memória residente do processo (MB)."""
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa em KB; macOS em bytes
+    return pico / (1024 * 1024) if sys.platform == "darwin" else pico / 1024
+
+
+def resumir(tempos: List[float], total_s: float) -> Dict[str, float]:
+    """Latências (ms) e QPS de uma série de execuções."""
+    ordenados = sorted(t * 1000 for t in tempos)
+    return {
+        "consultas": len(tempos),
+        "p50_ms": percentil(ordenados, 50),
+        "p95_ms": percentil(ordenados, 95),
+        "p99_ms": percentil(ordenados, 99),
+        "media_ms": statistics.fmean(ordenados) if ordenados else float("nan"),
+        "qps": len(tempos) / total_s if total_s > 0 else float("nan"),
+        "pico_rss_mb": pico_rss_mb(),
+    }
+
+
+def corpus_sintetico(n: int, vocabulario: List[str], semente: int = 0):
+    """Documentos com enunciados sorteados do vocabulário das consultas (distribuição de Zipf)."""
+    from src.documento import DocumentoJuris
+
+    rng = random.Random(semente)
+    pesos = [1.0 / (i + 1) for i in range(len(vocabulario))]
+    return [
+        DocumentoJuris(
+            id=f"SINTETICO-{i}",
+            enunciado=" ".join(rng.choices(vocabulario, weights=pesos, k=rng.randint(20, 80))),
+            excerto="",
+        )
+        for i in range(n)
+    ]
+
+
+def escalar_corpus(documentos, fator: int):
+    """Replica os documentos `fator` vezes, com ids novos."""
+    from src.documento import DocumentoJuris
+
+    if fator <= 1:
+        return list(documentos)
+    return [
+        DocumentoJuris(id=f"{doc.id}-R{r}" if r else doc.id, enunciado=doc.enunciado, excerto=doc.excerto)
+        for r in range(fator)
+        for doc in documentos
+    ]
+
+
+def _silencioso(funcao: Callable, *args, **kwargs):
+    """Executa sem os prints de progresso do buscador."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return funcao(*args, **kwargs)
+
+
+def medir_escala(documentos, consultas: List[str], metodos: List[str], top_k: int, aquecimento: int) -> Dict:
+    from src.buscador_hibrido import BuscadorHibridoLlamaIndex
+
+    buscador = BuscadorHibridoLlamaIndex()
+    resultado: Dict = {"documentos": len(documentos)}
+
+    precisa_denso = any(m != "bm25" for m in metodos)
+    if precisa_denso:
+        inicio = time.perf_counter()
+        _silencioso(buscador.aquecer_modelos, em_background=False)
+        resultado["modelos_s"] = time.perf_counter() - inicio
+        resultado["tempos_carregamento"] = dict(buscador.tempos_carregamento)
+
+    inicio = time.perf_counter()
+    _silencioso(buscador.carregar_documentos, documentos, indexar_embeddings=precisa_denso)
+    resultado["construcao_s"] = time.perf_counter() - inicio
+    resultado["pico_rss_mb_indice"] = pico_rss_mb()
+    buscador.set_bm25_top_k(top_k)
+    buscador.set_embeddings_top_k(top_k)
+    buscador.set_hibrido_top_k(top_k)
+
+    chamadas = {
+        "bm25": lambda c: buscador.buscar_bm25(c, top_k=top_k),
+        "denso": lambda c: buscador.buscar_embeddings(c, top_k=top_k),
+        "hibrido": lambda c: buscador.buscar_hibrido(c, top_k=top_k),
+        "hibrido_rerank": lambda c: buscador.buscar_hibrido(c, top_k=top_k, use_reranker=True),
+    }
+    resultado["metodos"] = {}
+    for metodo in metodos:
+        if metodo != "bm25" and not buscador.vector_retriever:
+            print(f"⚠ {metodo}: índice vetorial indisponível; ignorado")
+            continue
+        for consulta in consultas[:aquecimento]:
+            _silencioso(chamadas[metodo], consulta)
+        tempos = []
+        inicio_total = time.perf_counter()
+        for consulta in consultas:
+            buscador.cache_resultados.limpar()
+            buscador.cache_embeddings.limpar()
+            inicio = time.perf_counter()
+            _silencioso(chamadas[metodo], consulta)
+            tempos.append(time.perf_counter() - inicio)
+        resultado["metodos"][metodo] = resumir(tempos, time.perf_counter() - inicio_total)
+        r = resultado["metodos"][metodo]
+        print(f"  {metodo:<15} p50={r['p50_ms']:>8.1f}ms p95={r['p95_ms']:>8.1f}ms "
+              f"p99={r['p99_ms']:>8.1f}ms qps={r['qps']:>7.1f} rss={r['pico_rss_mb']:.0f}MB")
+    buscador.liberar_modelos()
+    return resultado
+
+
+def _commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def comparar(atual: Dict, anterior: Dict, tolerancia: float) -> List[str]:
+    """Compara p50/p95/p99 e QPS por escala e método; retorna as regressões encontradas."""
+    regressoes = []
+    anteriores = {r["escala"]: r for r in anterior.get("resultados", [])}
+    print(f"\n=== Comparação com {anterior.get('commit') or 'execução anterior'} ===\n")
+    for resultado in atual["resultados"]:
+        base = anteriores.get(resultado["escala"])
+        if base is None:
+            continue
+        for metodo, r in resultado["metodos"].items():
+            b = base.get("metodos", {}).get(metodo)
+            if not b:
+                continue
+            for campo in ("p50_ms", "p95_ms", "p99_ms", "qps"):
+                variacao = (r[campo] - b[campo]) / b[campo] if b[campo] else 0.0
+                # Para QPS, queda é regressão; para latência, aumento
+                piorou = -variacao if campo == "qps" else variacao
+                marca = "✗" if piorou > tolerancia else "✓"
+                print(f"{marca} escala {resultado['escala']} {metodo:<15} {campo:<7} "
+                      f"{b[campo]:>9.2f} -> {r[campo]:>9.2f} ({variacao:+.1%})")
+                if piorou > tolerancia:
+                    regressoes.append(f"escala {resultado['escala']} {metodo} {campo} {variacao:+.1%}")
+    return regressoes
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--metodos", nargs="+", default=METODOS, choices=METODOS)
+    parser.add_argument("--n-consultas", type=int, default=0, help="Consultas de query.csv (0 = todas)")
+    parser.add_argument("--escalas", type=int, nargs="+", default=[1], help="Fatores de replicação do corpus")
+    parser.add_argument("--sintetico", type=int, default=0, help="Usa N documentos sintéticos em vez de doc.csv")
+    parser.add_argument("--top-k", type=int, default=20)
+    parser.add_argument("--aquecimento", type=int, default=3, help="Consultas descartadas antes da medição")
+    parser.add_argument("--modelo-embeddings", default=MODELO_EMBEDDINGS_PEQUENO)
+    parser.add_argument("--modelo-reranker", default=MODELO_RERANKER_PEQUENO)
+    parser.add_argument("--saida", default=None, help="Arquivo JSON com os resultados")
+    parser.add_argument("--comparar", default=None, help="JSON de uma execução anterior")
+    parser.add_argument("--tolerancia", type=float, default=0.10, help="Variação tolerada antes de acusar regressão")
+    args = parser.parse_args()
+
+    # Antes de importar torch/src: CPU apenas e modelos pequenos
+    os.environ["CUDA_VISIBLE_DEVICES"] = ""
+    os.environ["EMBEDDINGS_MODEL_NAME"] = args.modelo_embeddings
+    os.environ["RERANKER_MODEL_NAME"] = args.modelo_reranker
+
+    from src.utils.dados import carregar_dados_juris_tcu, load_queries_df
+
+    if not os.path.exists(QUERY_CSV):
+        print(f"Arquivo de consultas não encontrado: {QUERY_CSV}")
+        return
+    consultas = load_queries_df(QUERY_CSV)["TEXT"].astype(str).tolist()
+    if args.n_consultas > 0:
+        consultas = consultas[:args.n_consultas]
+
+    if args.sintetico > 0:
+        vocabulario = sorted({p for c in consultas for p in c.split() if len(p) > 3})
+        documentos = corpus_sintetico(args.sintetico, vocabulario)
+    elif os.path.exists(DOC_CSV):
+        documentos = carregar_dados_juris_tcu(DOC_CSV)
+    else:
+        print(f"Corpus não encontrado: {DOC_CSV} (use --sintetico N)")
+        return
+
+    saida: Dict = {
+        "commit": _commit(),
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "ambiente": {
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "config": {
+            "metodos": args.metodos,
+            "consultas": len(consultas),
+            "top_k": args.top_k,
+            "corpus": f"sintetico:{args.sintetico}" if args.sintetico else "doc.csv",
+            "modelo_embeddings": args.modelo_embeddings,
+            "modelo_reranker": args.modelo_reranker,
+        },
+        "resultados": [],
+    }
+
+    print(f"\n=== Benchmark da busca ({len(consultas)} consultas, CPU) ===")
+    for escala in args.escalas:
+        corpus = escalar_corpus(documentos, escala)
+        print(f"\nEscala {escala}: {len(corpus)} documentos")
+        resultado = medir_escala(corpus, consultas, args.metodos, args.top_k, args.aquecimento)
+        resultado["escala"] = escala
+        print(f"  construção do índice: {resultado['construcao_s']:.1f}s")
+        saida["resultados"].append(resultado)
+
+    if args.saida:
+        os.makedirs(os.path.dirname(os.path.abspath(args.saida)), exist_ok=True)
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump(saida, f, ensure_ascii=False, indent=2)
+        print(f"\nResultados salvos em: {args.saida}")
+
+    if args.comparar:
+        with open(args.comparar, "r", encoding="utf-8") as f:
+            regressoes = comparar(saida, json.load(f), args.tolerancia)
+        if regressoes:
+            print(f"\n✗ {len(regressoes)} regressões acima de {args.tolerancia:.0%}")
+            sys.exit(1)
+        print("\n✓ Sem regressões")
+
+
+if __name__ == "__main__":
+    main()
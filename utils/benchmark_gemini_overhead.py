@@ -0,0 +1,97 @@
+"""
+Utilitário: mede o overhead por chamada ao Gemini contra o servidor fake local.
+
+Compara duas estratégias, sem rede e sem cota (servidor fake com latência zero):
+- sem_reuso: reconfigura o SDK e cria um GenerativeModel a cada chamada (comportamento antigo)
+- com_reuso: obter_modelo() reaproveita a configuração, o modelo e a conexão HTTP (keep-alive)
+
+O cache de respostas não participa da medição (cada chamada usa um prompt diferente).
+
+Execução:
+    python utils/benchmark_gemini_overhead.py
+    python utils/benchmark_gemini_overhead.py --chamadas 200 --saida dados/benchmark_gemini_overhead.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from tests.servidor_gemini_fake import ServidorGeminiFake
+from src.utils.gemini import configurar_gemini, extrair_texto_resposta, importar_genai, obter_modelo
+
+GEN_CONFIG = {
+    "response_mime_type": "application/json",
+    "response_schema": {
+        "type": "OBJECT",
+        "properties": {"question": {"type": "STRING"}, "rationale": {"type": "STRING"}},
+        "required": ["question"],
+    },
+    "temperature": 0,
+}
+
+
+def _chamada_sem_reuso(model_name: str, prompt: str) -> str:
+    configurar_gemini(forcar=True)
+    model = importar_genai().GenerativeModel(model_name, generation_config=GEN_CONFIG)
+    return extrair_texto_resposta(model.generate_content(prompt, generation_config=GEN_CONFIG))
+
+
+def _chamada_com_reuso(model_name: str, prompt: str) -> str:
+    return extrair_texto_resposta(obter_modelo(model_name, GEN_CONFIG).generate_content(prompt))
+
+
+def medir(chamar: Callable[[str, str], str], model_name: str, chamadas: int) -> Dict[str, float]:
+    """Latência por chamada (ms): média, p50 e p95."""
+    chamar(model_name, "aquecimento")
+    tempos: List[float] = []
+    for i in range(chamadas):
+        inicio = time.perf_counter()
+        chamar(model_name, f"prompt {i}")
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    tempos.sort()
+    return {
+        "media_ms": statistics.fmean(tempos),
+        "p50_ms": tempos[len(tempos) // 2],
+        "p95_ms": tempos[min(len(tempos) - 1, int(len(tempos) * 0.95))],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chamadas", type=int, default=100, help="Chamadas medidas por estratégia")
+    parser.add_argument("--saida", default=None, help="Arquivo JSON opcional com os tempos medidos")
+    args = parser.parse_args()
+
+    model_name = os.getenv("GEMINI_MODEL_NAME", "gemini-2.5-flash-lite")
+    resultados: Dict[str, Dict[str, float]] = {}
+    with ServidorGeminiFake() as servidor:
+        os.environ["GOOGLE_API_KEY"] = os.getenv("GOOGLE_API_KEY") or "chave-fake"
+        os.environ["GEMINI_API_ENDPOINT"] = servidor.endpoint
+        importar_genai()
+
+        print("\n=== Overhead por chamada ao Gemini (servidor fake, latência 0) ===\n")
+        print(f"{'estratégia':<12} {'média':>10} {'p50':>10} {'p95':>10}")
+        for nome, chamar in (("sem_reuso", _chamada_sem_reuso), ("com_reuso", _chamada_com_reuso)):
+            tempos = medir(chamar, model_name, args.chamadas)
+            resultados[nome] = tempos
+            print(f"{nome:<12} {tempos['media_ms']:>8.2f}ms {tempos['p50_ms']:>8.2f}ms {tempos['p95_ms']:>8.2f}ms")
+
+    ganho = resultados["sem_reuso"]["media_ms"] / max(resultados["com_reuso"]["media_ms"], 1e-9)
+    print(f"\nReuso reduz o overhead médio em {ganho:.1f}x")
+
+    if args.saida:
+        os.makedirs(os.path.dirname(os.path.abspath(args.saida)), exist_ok=True)
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, indent=2)
+        print(f"\nTempos salvos em: {args.saida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Utilitário: mede o tempo de inicialização de cada ponto de entrada do projeto.
+
+Cada ponto de entrada é executado em um processo Python novo (imports frios), medindo:
+- importacao: tempo para importar o módulo do ponto de entrada
+- buscador: tempo para construir o BuscadorHibridoLlamaIndex (quando usado)
+- modelos: tempo até os modelos que o ponto de entrada usa estarem prontos
+
+Com --importtime, roda `python -X importtime` para cada ponto de entrada e lista o
+tempo cumulativo de import e os módulos mais pesados.
+
+Execução:
+    python utils/benchmark_inicializacao.py
+    python utils/benchmark_inicializacao.py --saida dados/benchmark_inicializacao.json
+    python utils/benchmark_inicializacao.py --importtime --top 10
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Ponto de entrada -> (usa buscador?, modelos acessados no primeiro uso)
+PONTOS_DE_ENTRADA: Dict[str, Dict] = {
+    "src.run_candidatos": {"buscador": True, "modelos": ["embeddings_model", "reranker_model"]},
+    "src.run_chat_rerank_candidatos": {"buscador": True, "modelos": ["embeddings_model", "reranker_model"]},
+    "src.run_metricas_candidatos": {"buscador": False, "modelos": []},
+    "src.gerar_intencoes_dataset": {"buscador": False, "modelos": []},
+    "tests.teste_similaridade": {"buscador": True, "modelos": ["embeddings_model"]},
+}
+
+_SCRIPT_FILHO = """
+import json, sys, time, importlib, io, contextlib
+sys.path.insert(0, {base!r})
+tempos = {{}}
+with contextlib.redirect_stdout(io.StringIO()):
+    t0 = time.perf_counter()
+    importlib.import_module({modulo!r})
+    tempos["importacao"] = time.perf_counter() - t0
+    if {buscador!r}:
+        from src.buscador_hibrido import BuscadorHibridoLlamaIndex
+        t0 = time.perf_counter()
+        buscador = BuscadorHibridoLlamaIndex()
+        tempos["buscador"] = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        for nome in {modelos!r}:
+            getattr(buscador, nome)
+        tempos["modelos"] = time.perf_counter() - t0
+print(json.dumps(tempos))
+"""
+
+
+def medir_ponto_de_entrada(modulo: str, config: Dict, sem_modelos: bool = False) -> Dict[str, float]:
+    """Executa o ponto de entrada em um processo novo e retorna os tempos por etapa."""
+    script = _SCRIPT_FILHO.format(
+        base=BASE_DIR,
+        modulo=modulo,
+        buscador=config["buscador"],
+        modelos=[] if sem_modelos else config["modelos"],
+    )
+    proc = subprocess.run([sys.executable, "-c", script], cwd=BASE_DIR, capture_output=True, text=True)
+    if proc.returncode != 0:
+        erro = (proc.stderr.strip().splitlines() or ["erro desconhecido"])[-1]
+        return {"erro": erro}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def medir_importtime(modulo: str) -> Tuple[float, List[Tuple[str, float, float]]]:
+    """Roda `python -X importtime -c 'import modulo'` em processo novo.
+
+    Retorna (tempo cumulativo do módulo em segundos, [(pacote, self_s, cumulativo_s), ...]).
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+        cwd=BASE_DIR, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        erro = (proc.stderr.strip().splitlines() or ["erro desconhecido"])[-1]
+        raise RuntimeError(erro)
+
+    linhas: List[Tuple[str, float, float]] = []
+    for linha in proc.stderr.splitlines():
+        # Formato: "import time:  self [us] | cumulative | imported package"
+        if not linha.startswith("import time:") or "imported package" in linha:
+            continue
+        partes = linha[len("import time:"):].split("|")
+        if len(partes) != 3:
+            continue
+        linhas.append((partes[2].strip(), int(partes[0]) / 1e6, int(partes[1]) / 1e6))
+
+    total = next((cum for nome, _, cum in linhas if nome == modulo), 0.0)
+    return total, linhas
+
+
+def relatorio_importtime(top: int) -> Dict[str, Dict]:
+    """Imprime o tempo de import de cada ponto de entrada e seus pacotes de topo mais pesados."""
+    resultados: Dict[str, Dict] = {}
+    print("\n=== python -X importtime por ponto de entrada ===")
+    for modulo in PONTOS_DE_ENTRADA:
+        try:
+            total, linhas = medir_importtime(modulo)
+        except RuntimeError as e:
+            print(f"\n{modulo}: ✗ {e}")
+            resultados[modulo] = {"erro": str(e)}
+            continue
+        # Pacotes de topo (sem '.' no nome), ordenados pelo tempo cumulativo
+        pesados = sorted(
+            ((nome, cum) for nome, _, cum in linhas if "." not in nome and nome != modulo),
+            key=lambda x: x[1], reverse=True,
+        )[:top]
+        print(f"\n{modulo}: {total:.3f}s")
+        for nome, cum in pesados:
+            print(f"    {nome:<28} {cum:.3f}s")
+        resultados[modulo] = {"total": total, "pacotes": dict(pesados)}
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sem-modelos", action="store_true", help="Não acessa os modelos (mede apenas import e construção)")
+    parser.add_argument("--saida", default=None, help="Arquivo JSON opcional com os tempos medidos")
+    parser.add_argument("--importtime", action="store_true", help="Detalha o custo de import com python -X importtime")
+    parser.add_argument("--top", type=int, default=8, help="Pacotes mais pesados listados em --importtime")
+    args = parser.parse_args()
+
+    if args.importtime:
+        resultados_import = relatorio_importtime(args.top)
+        if args.saida:
+            os.makedirs(os.path.dirname(os.path.abspath(args.saida)), exist_ok=True)
+            with open(args.saida, "w", encoding="utf-8") as f:
+                json.dump(resultados_import, f, indent=2)
+            print(f"\nTempos salvos em: {args.saida}")
+        return
+
+    resultados: Dict[str, Dict[str, float]] = {}
+    print("\n=== Tempo de inicialização por ponto de entrada ===\n")
+    print(f"{'ponto de entrada':<34} {'importacao':>11} {'buscador':>10} {'modelos':>10} {'total':>10}")
+    for modulo, config in PONTOS_DE_ENTRADA.items():
+        tempos = medir_ponto_de_entrada(modulo, config, sem_modelos=args.sem_modelos)
+        resultados[modulo] = tempos
+        if "erro" in tempos:
+            print(f"{modulo:<34} ✗ {tempos['erro']}")
+            continue
+        total = sum(tempos.values())
+        celulas = [
+            f"{tempos[etapa]:.2f}s" if etapa in tempos else "-"
+            for etapa in ("importacao", "buscador", "modelos")
+        ]
+        print(f"{modulo:<34} {celulas[0]:>11} {celulas[1]:>10} {celulas[2]:>10} {total:>9.2f}s")
+
+    if args.saida:
+        os.makedirs(os.path.dirname(os.path.abspath(args.saida)), exist_ok=True)
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, indent=2)
+        print(f"\nTempos salvos em: {args.saida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""
+Utilitário: converte execuções (runs) entre CSV de candidatos, TREC, .npy e .parquet.
+
+O formato é escolhido pela extensão. O .npy guarda ids inteiros e é lido por mmap,
+sem parse de texto nem extração de DOC_ID por regex.
+
+Execução:
+    python utils/converter_execucao.py dados/candidatos_top20_full.csv dados/candidatos_top20_full.npy
+    python utils/converter_execucao.py dados/candidatos_chat_top20.csv dados/candidatos_chat_top20.trec --tag chat
+"""
+
+import argparse
+import os
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from src.utils.execucoes import converter_execucao
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("origem", help="Execução de origem (.csv, .trec/.run/.txt, .npy, .parquet)")
+    parser.add_argument("destino", help="Arquivo de destino; o formato segue a extensão")
+    parser.add_argument("--tag", default=None, help="Identificação da execução no formato TREC (padrão: nome da origem)")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    linhas = converter_execucao(args.origem, args.destino, tag=args.tag)
+    print(f"✓ {linhas} linhas gravadas em {args.destino} ({time.perf_counter() - inicio:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Utilitário: confere que `run_chat_rerank_candidatos` paralelo gera os mesmos arquivos que o sequencial.
+
+Executa o pipeline duas vezes (sequencial e com `--workers`/`--lote`) e compara,
+linha a linha, o CSV de candidatos (QUERY_ID, DOC_ID e RANK idênticos; RERANK_SCORE
+dentro de uma tolerância) e o CSV de métricas. Sai com código 1 se houver diferença.
+
+As duas execuções precisam ver as mesmas respostas do LLM: rode com o cache LLM
+ligado (a primeira execução grava, a segunda reaproveita), com `--replay` sobre um
+cache já preenchido, ou com `LLM_BACKEND=fake`.
+
+Execução:
+    python utils/paridade_chat_paralelo.py --n 20 --workers 4
+    python utils/paridade_chat_paralelo.py --n 20 --workers 4 --lote 4 --replay
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from src.run_chat_rerank_candidatos import (
+    OUT_CSV_NO_PAIRS,
+    OUT_CSV_PAIRS,
+    OUT_METRICAS_NO_PAIRS,
+    OUT_METRICAS_PAIRS,
+)
+
+
+def executar(argumentos: List[str], destino: str, modo: str) -> None:
+    """Roda o pipeline e copia os CSVs gerados para `destino`."""
+    comando = [sys.executable, "-m", "src.run_chat_rerank_candidatos", "--modo", modo, *argumentos]
+    print(f"$ {' '.join(comando[1:])}")
+    subprocess.run(comando, cwd=BASE_DIR, check=True, stdout=subprocess.DEVNULL)
+    os.makedirs(destino, exist_ok=True)
+    saidas = (OUT_CSV_PAIRS, OUT_METRICAS_PAIRS) if modo == "pares" else (OUT_CSV_NO_PAIRS, OUT_METRICAS_NO_PAIRS)
+    for nome, origem in zip(("candidatos.csv", "metricas.csv"), saidas):
+        shutil.copyfile(origem, os.path.join(destino, nome))
+
+
+def comparar_candidatos(sequencial: pd.DataFrame, paralelo: pd.DataFrame, tolerancia: float) -> List[str]:
+    diferencas = []
+    if list(sequencial.columns) != list(paralelo.columns):
+        return [f"colunas diferentes: {list(sequencial.columns)} vs {list(paralelo.columns)}"]
+    if len(sequencial) != len(paralelo):
+        diferencas.append(f"linhas: {len(sequencial)} (sequencial) vs {len(paralelo)} (paralelo)")
+    n = min(len(sequencial), len(paralelo))
+    chaves = ["QUERY_ID", "DOC_ID", "RANK"]
+    a = sequencial[chaves].head(n).reset_index(drop=True)
+    b = paralelo[chaves].head(n).reset_index(drop=True)
+    divergentes = (a != b).any(axis=1)
+    for i in np.flatnonzero(divergentes.to_numpy())[:10]:
+        diferencas.append(f"linha {i + 2}: {a.iloc[i].tolist()} vs {b.iloc[i].tolist()}")
+    if divergentes.sum() > 10:
+        diferencas.append(f"... {int(divergentes.sum())} linhas com ordem diferente")
+    desvio = np.abs(sequencial["RERANK_SCORE"].head(n).to_numpy(float) - paralelo["RERANK_SCORE"].head(n).to_numpy(float))
+    if n and np.nanmax(desvio) > tolerancia:
+        diferencas.append(f"RERANK_SCORE: desvio máximo {np.nanmax(desvio):.3g} > {tolerancia:g}")
+    return diferencas
+
+
+def comparar_metricas(sequencial: pd.DataFrame, paralelo: pd.DataFrame) -> List[str]:
+    if sequencial.shape != paralelo.shape or list(sequencial.columns) != list(paralelo.columns):
+        return [f"métricas com formato diferente: {sequencial.shape} vs {paralelo.shape}"]
+    numericas = sequencial.select_dtypes("number").columns
+    iguais = np.isclose(sequencial[numericas].to_numpy(float), paralelo[numericas].to_numpy(float), atol=1e-12, equal_nan=True)
+    if iguais.all():
+        return []
+    linhas, colunas = np.nonzero(~iguais)
+    return [
+        f"métrica {numericas[c]} de {sequencial['QUERY_KEY'].iloc[i]}: "
+        f"{sequencial[numericas[c]].iloc[i]} vs {paralelo[numericas[c]].iloc[i]}"
+        for i, c in list(zip(linhas, colunas))[:10]
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--modo", choices=["pares", "sem_pares"], default="pares")
+    parser.add_argument("--n", type=int, default=20, help="Queries comparadas")
+    parser.add_argument("--workers", type=int, default=4, help="Workers da execução paralela")
+    parser.add_argument("--lote", type=int, default=1, help="--lote da execução paralela (modo pares)")
+    parser.add_argument("--replay", action="store_true", help="Passa --replay às duas execuções")
+    parser.add_argument("--tolerancia", type=float, default=1e-6, help="Desvio máximo aceito em RERANK_SCORE")
+    args = parser.parse_args()
+
+    comuns = ["--n", str(args.n)] + (["--replay"] if args.replay else [])
+    with tempfile.TemporaryDirectory() as tmp:
+        dir_seq = os.path.join(tmp, "sequencial")
+        dir_par = os.path.join(tmp, "paralelo")
+        executar(comuns, dir_seq, args.modo)
+        executar(comuns + ["--workers", str(args.workers), "--lote", str(args.lote)], dir_par, args.modo)
+
+        diferencas = comparar_candidatos(
+            pd.read_csv(os.path.join(dir_seq, "candidatos.csv")),
+            pd.read_csv(os.path.join(dir_par, "candidatos.csv")),
+            args.tolerancia,
+        )
+        diferencas += comparar_metricas(
+            pd.read_csv(os.path.join(dir_seq, "metricas.csv")),
+            pd.read_csv(os.path.join(dir_par, "metricas.csv")),
+        )
+
+    if diferencas:
+        print("✗ Execução paralela difere da sequencial:")
+        for linha in diferencas:
+            print(f"  {linha}")
+        sys.exit(1)
+    print(f"✓ Candidatos e métricas idênticos (sequencial vs --workers {args.workers} --lote {args.lote})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Utilitário: compara as perguntas clarificadoras do modo em lote com o modo por par.
+
+Para as N primeiras queries do arquivo de candidatos, monta o par (candidato 1, candidato 2)
+e gera a primeira pergunta clarificadora nos dois modos, medindo:
+- requisições ao Gemini em cada modo
+- similaridade lexical (Jaccard dos tokens stemizados) entre as perguntas dos dois modos
+- casos do lote que precisaram de fallback por par
+
+Usa o cliente Gemini configurado pelo ambiente (GEMINI_CACHE_MODO=desligado para
+medir requisições reais; GEMINI_API_ENDPOINT para o servidor fake).
+
+Execução:
+    python utils/paridade_perguntas_lote.py --n 20 --lote 8
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+from typing import Dict, List
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from src.clarifying_questions import gerar_perguntas_clarificadoras_em_lote, gerar_perguntas_clarificadoras_para_pares
+from src.utils.dados import load_docs_enunciado_map_clean, load_queries_df
+from src.utils.execucoes import ler_execucao
+from src.utils.gemini import obter_cliente_gemini
+from src.utils.preprocessamento import PreprocessadorTexto
+
+DATA_DIR = os.path.join(BASE_DIR, "dados", "juris_tcu")
+DOC_CSV = os.path.join(DATA_DIR, "doc.csv")
+QUERY_CSV = os.path.join(DATA_DIR, "query.csv")
+CANDIDATOS_CSV = os.path.join(BASE_DIR, "dados", "candidatos_top20_full.csv")
+
+
+def montar_tarefas(n: int) -> List[Dict]:
+    queries_df = load_queries_df(QUERY_CSV)
+    textos = dict(zip(queries_df["ID"], queries_df["TEXT"]))
+    docs_map = load_docs_enunciado_map_clean(DOC_CSV)
+    candidatos_df = ler_execucao(CANDIDATOS_CSV)
+
+    tarefas = []
+    for qid, grupo in candidatos_df.sort_values("RANK").groupby("QUERY_ID", sort=True):
+        if qid not in textos or len(grupo) < 2:
+            continue
+        doc1, doc2 = (int(d) for d in grupo["DOC_ID_NUM"].iloc[:2])
+        tarefas.append({
+            "conversa": str(textos[qid]),
+            "par": {
+                "documento_1": {"conteudo": docs_map.get(doc1, "")},
+                "documento_2": {"conteudo": docs_map.get(doc2, "")},
+            },
+        })
+        if len(tarefas) >= n:
+            break
+    return tarefas
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--n", type=int, default=20, help="Queries comparadas")
+    parser.add_argument("--lote", type=int, default=8, help="Casos por requisição no modo em lote")
+    parser.add_argument("--saida", default=None, help="Arquivo JSON opcional com as perguntas e medidas")
+    args = parser.parse_args()
+
+    tarefas = montar_tarefas(args.n)
+    cliente = obter_cliente_gemini()
+    preproc = PreprocessadorTexto()
+
+    inicio = cliente.estatisticas["requisicoes"]
+    por_par = [
+        gerar_perguntas_clarificadoras_para_pares([t["par"]], t["conversa"], max_perguntas=1)[0]["pergunta"]
+        for t in tarefas
+    ]
+    requisicoes_por_par = cliente.estatisticas["requisicoes"] - inicio
+
+    inicio = cliente.estatisticas["requisicoes"]
+    em_lote = gerar_perguntas_clarificadoras_em_lote(tarefas, tamanho_lote=args.lote)
+    requisicoes_lote = cliente.estatisticas["requisicoes"] - inicio
+
+    similaridades = []
+    for a, b in zip(por_par, em_lote):
+        if b is None:
+            continue
+        ta, tb = set(preproc.tokenizador_pt(a)), set(preproc.tokenizador_pt(b["pergunta"]))
+        similaridades.append(len(ta & tb) / len(ta | tb) if ta | tb else 1.0)
+    fallbacks = sum(1 for r in em_lote if r is not None and r["origem"] != "gemini_lote")
+    falhas = sum(1 for r in em_lote if r is None)
+
+    print(f"\n=== Paridade: perguntas em lote x por par ({len(tarefas)} queries) ===\n")
+    print(f"Requisições: por par={requisicoes_por_par}, em lote={requisicoes_lote}")
+    if similaridades:
+        print(f"Jaccard médio={statistics.fmean(similaridades):.3f}, mediano={statistics.median(similaridades):.3f}")
+    print(f"Fallback por par={fallbacks}, falhas={falhas}")
+
+    if args.saida:
+        os.makedirs(os.path.dirname(os.path.abspath(args.saida)), exist_ok=True)
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump({
+                "requisicoes": {"por_par": requisicoes_por_par, "em_lote": requisicoes_lote},
+                "perguntas": [
+                    {"por_par": a, "em_lote": b["pergunta"] if b else None}
+                    for a, b in zip(por_par, em_lote)
+                ],
+                "jaccard": similaridades,
+            }, f, ensure_ascii=False, indent=2)
+        print(f"\nResultados salvos em: {args.saida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,7 +3,8 @@ Utilitário: imprime 5 queries aleatórias do dataset jurisTCU
 e lista os documentos retornados com seus scores, juntando:
 - query.csv (ID, TEXT, SOURCE)
 - qrel.csv (QUERY_ID, DOC_ID, SCORE, ENGINE, RANK)
-- doc.csv (usa o ENUNCIADO do documento via sufixo numérico da coluna KEY)
+- doc.csv (usa o ENUNCIADO limpo do documento via sufixo numérico da coluna KEY,
+  lido do corpus em colunas de src/utils/corpus.py)
 
 Execução:
     python utils/preview_random_queries.py
@@ -14,12 +15,16 @@ Opcional:
 
 import os
 import random
-import re
+import sys
 from typing import Dict, List
 import pandas as pd
 
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from src.utils.corpus import carregar_corpus
+
 DATA_DIR = os.path.join(BASE_DIR, "dados", "juris_tcu")
 
 QUERY_CSV = os.path.join(DATA_DIR, "query.csv")
@@ -49,22 +54,6 @@ def _load_qrels(path: str) -> Dict[int, List[Dict[str, str]]]:
     return by_query
 
 
-def _load_docs_enunciado_by_numeric_key(path: str) -> Dict[int, str]:
-    """Cria um mapa DOC_ID (número) -> ENUNCIADO usando pandas."""
-    df = pd.read_csv(path, dtype=str, encoding="utf-8")
-    df = df.fillna("")
-    df["NUM"] = df["KEY"].astype(str).str.extract(r"(\d+)$")
-    df["NUM"] = pd.to_numeric(df["NUM"], errors="coerce")
-    df = df.dropna(subset=["NUM"]).astype({"NUM": int})
-    mapping = df.set_index("NUM")["ENUNCIADO"].to_dict()
-    return mapping
-
-
-def _strip_html(text: str) -> str:
-    # Remoção simples de tags HTML
-    return re.sub(r"<[^>]*>", "", text or "").strip()
-
-
 def main():
     if not (os.path.exists(QUERY_CSV) and os.path.exists(QREL_CSV) and os.path.exists(DOC_CSV)):
         print("❌ Arquivos necessários não encontrados em dados/juris_tcu")
@@ -73,7 +62,7 @@ def main():
 
     queries = _load_queries(QUERY_CSV)
     qrels_by_query = _load_qrels(QREL_CSV)
-    docs_map = _load_docs_enunciado_by_numeric_key(DOC_CSV)
+    corpus = carregar_corpus(DOC_CSV)
 
     # Seleciona IDs de queries que têm resultados no qrels
     query_ids_with_results = [int(q["ID"]) for q in queries if q.get("ID") and int(q["ID"]) in qrels_by_query]
@@ -105,8 +94,7 @@ def main():
             doc_id = item["DOC_ID"]
             score = item["SCORE"]
             rank = item["RANK"]
-            enunciado = docs_map.get(doc_id)
-            enun_clean = _strip_html(enunciado) if enunciado else "(enunciado não encontrado)"
+            enun_clean = corpus.enunciado_limpo(doc_id) or "(enunciado não encontrado)"
             # Pequena truncagem para caber no terminal
             if len(enun_clean) > 300:
                 enun_clean = enun_clean[:300].rstrip() + "..."